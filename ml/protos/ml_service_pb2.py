@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x10ml_service.proto\x12\x05\x65voke\"9\n\x13\x41nalyzeAudioRequest\x12\x12\n\naudio_data\x18\x01 \x01(\x0c\x12\x0e\n\x06\x66ormat\x18\x02 \x01(\t\"~\n\x14\x41nalyzeAudioResponse\x12\x11\n\tembedding\x18\x01 \x03(\x02\x12\x13\n\x0bmood_energy\x18\x02 \x01(\x02\x12\x14\n\x0cmood_valence\x18\x03 \x01(\x02\x12\x12\n\nmood_tempo\x18\x04 \x01(\x02\x12\x14\n\x0cmood_texture\x18\x05 \x01(\x02\"q\n\x16RefineEmbeddingRequest\x12\x16\n\x0e\x62\x61se_embedding\x18\x01 \x03(\x02\x12\x0e\n\x06\x65nergy\x18\x02 \x01(\x02\x12\x0f\n\x07valence\x18\x03 \x01(\x02\x12\r\n\x05tempo\x18\x04 \x01(\x02\x12\x0f\n\x07texture\x18\x05 \x01(\x02\",\n\x17RefineEmbeddingResponse\x12\x11\n\tembedding\x18\x01 \x03(\x02\"\x14\n\x12HealthCheckRequest\"7\n\x13HealthCheckResponse\x12\x0f\n\x07healthy\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t2\xec\x01\n\tMLService\x12G\n\x0c\x41nalyzeAudio\x12\x1a.evoke.AnalyzeAudioRequest\x1a\x1b.evoke.AnalyzeAudioResponse\x12P\n\x0fRefineEmbedding\x12\x1d.evoke.RefineEmbeddingRequest\x1a\x1e.evoke.RefineEmbeddingResponse\x12\x44\n\x0bHealthCheck\x12\x19.evoke.HealthCheckRequest\x1a\x1a.evoke.HealthCheckResponseB Z\x1egithub.com/evoke/backend/protob\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x10ml_service.proto\x12\x05\x65voke\"b\n\x13\x41nalyzeAudioRequest\x12\x12\n\naudio_data\x18\x01 \x01(\x0c\x12\x0e\n\x06\x66ormat\x18\x02 \x01(\t\x12\x0f\n\x07profile\x18\x03 \x01(\t\x12\x16\n\x0e\x61llow_degraded\x18\x04 \x01(\x08\"\x90\x01\n\x14\x41nalyzeAudioResponse\x12\x11\n\tembedding\x18\x01 \x03(\x02\x12\x13\n\x0bmood_energy\x18\x02 \x01(\x02\x12\x14\n\x0cmood_valence\x18\x03 \x01(\x02\x12\x12\n\nmood_tempo\x18\x04 \x01(\x02\x12\x14\n\x0cmood_texture\x18\x05 \x01(\x02\x12\x10\n\x08\x64\x65graded\x18\x06 \x01(\x08\"`\n\x11\x41nalyzeAudioChunk\x12\x12\n\naudio_data\x18\x01 \x01(\x0c\x12\x0e\n\x06\x66ormat\x18\x02 \x01(\t\x12\x0f\n\x07profile\x18\x03 \x01(\t\x12\x16\n\x0e\x61llow_degraded\x18\x04 \x01(\x08\"E\n\x18\x42\x61tchAnalyzeAudioRequest\x12)\n\x05items\x18\x01 \x03(\x0b\x32\x1a.evoke.AnalyzeAudioRequest\"U\n\x17\x42\x61tchAnalyzeAudioResult\x12+\n\x06result\x18\x01 \x01(\x0b\x32\x1b.evoke.AnalyzeAudioResponse\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"L\n\x19\x42\x61tchAnalyzeAudioResponse\x12/\n\x07results\x18\x01 \x03(\x0b\x32\x1e.evoke.BatchAnalyzeAudioResult\"q\n\x16RefineEmbeddingRequest\x12\x16\n\x0e\x62\x61se_embedding\x18\x01 \x03(\x02\x12\x0e\n\x06\x65nergy\x18\x02 \x01(\x02\x12\x0f\n\x07valence\x18\x03 \x01(\x02\x12\r\n\x05tempo\x18\x04 \x01(\x02\x12\x0f\n\x07texture\x18\x05 \x01(\x02\",\n\x17RefineEmbeddingResponse\x12\x11\n\tembedding\x18\x01 \x03(\x02\"N\n\x0bMoodSetting\x12\x0e\n\x06\x65nergy\x18\x01 \x01(\x02\x12\x0f\n\x07valence\x18\x02 \x01(\x02\x12\r\n\x05tempo\x18\x03 \x01(\x02\x12\x0f\n\x07texture\x18\x04 \x01(\x02\"a\n\x12\x42\x61tchRefineRequest\x12\x16\n\x0e\x62\x61se_embedding\x18\x01 \x03(\x02\x12$\n\x08settings\x18\x02 \x03(\x0b\x32\x12.evoke.MoodSetting\x12\r\n\x05top_k\x18\x03 \x01(\x05\"F\n\rRefinedResult\x12\x11\n\tembedding\x18\x01 \x03(\x02\x12\"\n\x06images\x18\x02 \x03(\x0b\x32\x12.evoke.ImageResult\"<\n\x13\x42\x61tchRefineResponse\x12%\n\x07results\x18\x01 \x03(\x0b\x32\x14.evoke.RefinedResult\";\n\x0bImageResult\x12\n\n\x02id\x18\x01 \x01(\x03\x12\x11\n\timage_url\x18\x02 \x01(\t\x12\r\n\x05score\x18\x03 \x01(\x02\"7\n\x13SearchImagesRequest\x12\x11\n\tembedding\x18\x01 \x03(\x02\x12\r\n\x05top_k\x18\x02 \x01(\x05\":\n\x14SearchImagesResponse\x12\"\n\x06images\x18\x01 \x03(\x0b\x32\x12.evoke.ImageResult\"u\n\x17\x41nalyzeAndSearchRequest\x12\x12\n\naudio_data\x18\x01 \x01(\x0c\x12\x0e\n\x06\x66ormat\x18\x02 \x01(\t\x12\r\n\x05top_k\x18\x03 \x01(\x05\x12\x0f\n\x07profile\x18\x04 \x01(\t\x12\x16\n\x0e\x61llow_degraded\x18\x05 \x01(\x08\"m\n\x18\x41nalyzeAndSearchResponse\x12-\n\x08\x61nalysis\x18\x01 \x01(\x0b\x32\x1b.evoke.AnalyzeAudioResponse\x12\"\n\x06images\x18\x02 \x03(\x0b\x32\x12.evoke.ImageResult\"\x14\n\x12HealthCheckRequest\"\xfb\x01\n\x13HealthCheckResponse\x12\x0f\n\x07healthy\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\r\n\x05ready\x18\x03 \x01(\x08\x12\x45\n\x0estartup_phases\x18\x04 \x03(\x0b\x32-.evoke.HealthCheckResponse.StartupPhasesEntry\x12\x11\n\tin_flight\x18\x05 \x01(\x05\x12\x15\n\rmax_in_flight\x18\x06 \x01(\x05\x12\x0c\n\x04load\x18\x07 \x01(\x02\x1a\x34\n\x12StartupPhasesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x02:\x02\x38\x01\"\x13\n\x11GetMetricsRequest\"8\n\x12GetMetricsResponse\x12\x0c\n\x04text\x18\x01 \x01(\t\x12\x14\n\x0c\x63ontent_type\x18\x02 \x01(\t2\xba\x05\n\tMLService\x12G\n\x0c\x41nalyzeAudio\x12\x1a.evoke.AnalyzeAudioRequest\x1a\x1b.evoke.AnalyzeAudioResponse\x12M\n\x12\x41nalyzeAudioStream\x12\x18.evoke.AnalyzeAudioChunk\x1a\x1b.evoke.AnalyzeAudioResponse(\x01\x12V\n\x11\x42\x61tchAnalyzeAudio\x12\x1f.evoke.BatchAnalyzeAudioRequest\x1a .evoke.BatchAnalyzeAudioResponse\x12P\n\x0fRefineEmbedding\x12\x1d.evoke.RefineEmbeddingRequest\x1a\x1e.evoke.RefineEmbeddingResponse\x12\x44\n\x0b\x42\x61tchRefine\x12\x19.evoke.BatchRefineRequest\x1a\x1a.evoke.BatchRefineResponse\x12G\n\x0cSearchImages\x12\x1a.evoke.SearchImagesRequest\x1a\x1b.evoke.SearchImagesResponse\x12S\n\x10\x41nalyzeAndSearch\x12\x1e.evoke.AnalyzeAndSearchRequest\x1a\x1f.evoke.AnalyzeAndSearchResponse\x12\x44\n\x0bHealthCheck\x12\x19.evoke.HealthCheckRequest\x1a\x1a.evoke.HealthCheckResponse\x12\x41\n\nGetMetrics\x12\x18.evoke.GetMetricsRequest\x1a\x19.evoke.GetMetricsResponseB Z\x1egithub.com/evoke/backend/protob\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -32,18 +32,52 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'ml_service_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   _globals['DESCRIPTOR']._loaded_options = None
   _globals['DESCRIPTOR']._serialized_options = b'Z\036github.com/evoke/backend/proto'
+  _globals['_HEALTHCHECKRESPONSE_STARTUPPHASESENTRY']._loaded_options = None
+  _globals['_HEALTHCHECKRESPONSE_STARTUPPHASESENTRY']._serialized_options = b'8\001'
   _globals['_ANALYZEAUDIOREQUEST']._serialized_start=27
-  _globals['_ANALYZEAUDIOREQUEST']._serialized_end=84
-  _globals['_ANALYZEAUDIORESPONSE']._serialized_start=86
-  _globals['_ANALYZEAUDIORESPONSE']._serialized_end=212
-  _globals['_REFINEEMBEDDINGREQUEST']._serialized_start=214
-  _globals['_REFINEEMBEDDINGREQUEST']._serialized_end=327
-  _globals['_REFINEEMBEDDINGRESPONSE']._serialized_start=329
-  _globals['_REFINEEMBEDDINGRESPONSE']._serialized_end=373
-  _globals['_HEALTHCHECKREQUEST']._serialized_start=375
-  _globals['_HEALTHCHECKREQUEST']._serialized_end=395
-  _globals['_HEALTHCHECKRESPONSE']._serialized_start=397
-  _globals['_HEALTHCHECKRESPONSE']._serialized_end=452
-  _globals['_MLSERVICE']._serialized_start=455
-  _globals['_MLSERVICE']._serialized_end=691
+  _globals['_ANALYZEAUDIOREQUEST']._serialized_end=125
+  _globals['_ANALYZEAUDIORESPONSE']._serialized_start=128
+  _globals['_ANALYZEAUDIORESPONSE']._serialized_end=272
+  _globals['_ANALYZEAUDIOCHUNK']._serialized_start=274
+  _globals['_ANALYZEAUDIOCHUNK']._serialized_end=370
+  _globals['_BATCHANALYZEAUDIOREQUEST']._serialized_start=372
+  _globals['_BATCHANALYZEAUDIOREQUEST']._serialized_end=441
+  _globals['_BATCHANALYZEAUDIORESULT']._serialized_start=443
+  _globals['_BATCHANALYZEAUDIORESULT']._serialized_end=528
+  _globals['_BATCHANALYZEAUDIORESPONSE']._serialized_start=530
+  _globals['_BATCHANALYZEAUDIORESPONSE']._serialized_end=606
+  _globals['_REFINEEMBEDDINGREQUEST']._serialized_start=608
+  _globals['_REFINEEMBEDDINGREQUEST']._serialized_end=721
+  _globals['_REFINEEMBEDDINGRESPONSE']._serialized_start=723
+  _globals['_REFINEEMBEDDINGRESPONSE']._serialized_end=767
+  _globals['_MOODSETTING']._serialized_start=769
+  _globals['_MOODSETTING']._serialized_end=847
+  _globals['_BATCHREFINEREQUEST']._serialized_start=849
+  _globals['_BATCHREFINEREQUEST']._serialized_end=946
+  _globals['_REFINEDRESULT']._serialized_start=948
+  _globals['_REFINEDRESULT']._serialized_end=1018
+  _globals['_BATCHREFINERESPONSE']._serialized_start=1020
+  _globals['_BATCHREFINERESPONSE']._serialized_end=1080
+  _globals['_IMAGERESULT']._serialized_start=1082
+  _globals['_IMAGERESULT']._serialized_end=1141
+  _globals['_SEARCHIMAGESREQUEST']._serialized_start=1143
+  _globals['_SEARCHIMAGESREQUEST']._serialized_end=1198
+  _globals['_SEARCHIMAGESRESPONSE']._serialized_start=1200
+  _globals['_SEARCHIMAGESRESPONSE']._serialized_end=1258
+  _globals['_ANALYZEANDSEARCHREQUEST']._serialized_start=1260
+  _globals['_ANALYZEANDSEARCHREQUEST']._serialized_end=1377
+  _globals['_ANALYZEANDSEARCHRESPONSE']._serialized_start=1379
+  _globals['_ANALYZEANDSEARCHRESPONSE']._serialized_end=1488
+  _globals['_HEALTHCHECKREQUEST']._serialized_start=1490
+  _globals['_HEALTHCHECKREQUEST']._serialized_end=1510
+  _globals['_HEALTHCHECKRESPONSE']._serialized_start=1513
+  _globals['_HEALTHCHECKRESPONSE']._serialized_end=1764
+  _globals['_HEALTHCHECKRESPONSE_STARTUPPHASESENTRY']._serialized_start=1712
+  _globals['_HEALTHCHECKRESPONSE_STARTUPPHASESENTRY']._serialized_end=1764
+  _globals['_GETMETRICSREQUEST']._serialized_start=1766
+  _globals['_GETMETRICSREQUEST']._serialized_end=1785
+  _globals['_GETMETRICSRESPONSE']._serialized_start=1787
+  _globals['_GETMETRICSRESPONSE']._serialized_end=1843
+  _globals['_MLSERVICE']._serialized_start=1846
+  _globals['_MLSERVICE']._serialized_end=2544
 # @@protoc_insertion_point(module_scope)
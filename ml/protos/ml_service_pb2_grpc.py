@@ -39,16 +39,46 @@ class MLServiceStub(object):
                 request_serializer=ml__service__pb2.AnalyzeAudioRequest.SerializeToString,
                 response_deserializer=ml__service__pb2.AnalyzeAudioResponse.FromString,
                 _registered_method=True)
+        self.AnalyzeAudioStream = channel.stream_unary(
+                '/evoke.MLService/AnalyzeAudioStream',
+                request_serializer=ml__service__pb2.AnalyzeAudioChunk.SerializeToString,
+                response_deserializer=ml__service__pb2.AnalyzeAudioResponse.FromString,
+                _registered_method=True)
+        self.BatchAnalyzeAudio = channel.unary_unary(
+                '/evoke.MLService/BatchAnalyzeAudio',
+                request_serializer=ml__service__pb2.BatchAnalyzeAudioRequest.SerializeToString,
+                response_deserializer=ml__service__pb2.BatchAnalyzeAudioResponse.FromString,
+                _registered_method=True)
         self.RefineEmbedding = channel.unary_unary(
                 '/evoke.MLService/RefineEmbedding',
                 request_serializer=ml__service__pb2.RefineEmbeddingRequest.SerializeToString,
                 response_deserializer=ml__service__pb2.RefineEmbeddingResponse.FromString,
                 _registered_method=True)
+        self.BatchRefine = channel.unary_unary(
+                '/evoke.MLService/BatchRefine',
+                request_serializer=ml__service__pb2.BatchRefineRequest.SerializeToString,
+                response_deserializer=ml__service__pb2.BatchRefineResponse.FromString,
+                _registered_method=True)
+        self.SearchImages = channel.unary_unary(
+                '/evoke.MLService/SearchImages',
+                request_serializer=ml__service__pb2.SearchImagesRequest.SerializeToString,
+                response_deserializer=ml__service__pb2.SearchImagesResponse.FromString,
+                _registered_method=True)
+        self.AnalyzeAndSearch = channel.unary_unary(
+                '/evoke.MLService/AnalyzeAndSearch',
+                request_serializer=ml__service__pb2.AnalyzeAndSearchRequest.SerializeToString,
+                response_deserializer=ml__service__pb2.AnalyzeAndSearchResponse.FromString,
+                _registered_method=True)
         self.HealthCheck = channel.unary_unary(
                 '/evoke.MLService/HealthCheck',
                 request_serializer=ml__service__pb2.HealthCheckRequest.SerializeToString,
                 response_deserializer=ml__service__pb2.HealthCheckResponse.FromString,
                 _registered_method=True)
+        self.GetMetrics = channel.unary_unary(
+                '/evoke.MLService/GetMetrics',
+                request_serializer=ml__service__pb2.GetMetricsRequest.SerializeToString,
+                response_deserializer=ml__service__pb2.GetMetricsResponse.FromString,
+                _registered_method=True)
 
 
 class MLServiceServicer(object):
@@ -60,18 +90,54 @@ class MLServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def AnalyzeAudioStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BatchAnalyzeAudio(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def RefineEmbedding(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BatchRefine(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchImages(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def AnalyzeAndSearch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def HealthCheck(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetMetrics(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_MLServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -80,16 +146,46 @@ def add_MLServiceServicer_to_server(servicer, server):
                     request_deserializer=ml__service__pb2.AnalyzeAudioRequest.FromString,
                     response_serializer=ml__service__pb2.AnalyzeAudioResponse.SerializeToString,
             ),
+            'AnalyzeAudioStream': grpc.stream_unary_rpc_method_handler(
+                    servicer.AnalyzeAudioStream,
+                    request_deserializer=ml__service__pb2.AnalyzeAudioChunk.FromString,
+                    response_serializer=ml__service__pb2.AnalyzeAudioResponse.SerializeToString,
+            ),
+            'BatchAnalyzeAudio': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchAnalyzeAudio,
+                    request_deserializer=ml__service__pb2.BatchAnalyzeAudioRequest.FromString,
+                    response_serializer=ml__service__pb2.BatchAnalyzeAudioResponse.SerializeToString,
+            ),
             'RefineEmbedding': grpc.unary_unary_rpc_method_handler(
                     servicer.RefineEmbedding,
                     request_deserializer=ml__service__pb2.RefineEmbeddingRequest.FromString,
                     response_serializer=ml__service__pb2.RefineEmbeddingResponse.SerializeToString,
             ),
+            'BatchRefine': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchRefine,
+                    request_deserializer=ml__service__pb2.BatchRefineRequest.FromString,
+                    response_serializer=ml__service__pb2.BatchRefineResponse.SerializeToString,
+            ),
+            'SearchImages': grpc.unary_unary_rpc_method_handler(
+                    servicer.SearchImages,
+                    request_deserializer=ml__service__pb2.SearchImagesRequest.FromString,
+                    response_serializer=ml__service__pb2.SearchImagesResponse.SerializeToString,
+            ),
+            'AnalyzeAndSearch': grpc.unary_unary_rpc_method_handler(
+                    servicer.AnalyzeAndSearch,
+                    request_deserializer=ml__service__pb2.AnalyzeAndSearchRequest.FromString,
+                    response_serializer=ml__service__pb2.AnalyzeAndSearchResponse.SerializeToString,
+            ),
             'HealthCheck': grpc.unary_unary_rpc_method_handler(
                     servicer.HealthCheck,
                     request_deserializer=ml__service__pb2.HealthCheckRequest.FromString,
                     response_serializer=ml__service__pb2.HealthCheckResponse.SerializeToString,
             ),
+            'GetMetrics': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetMetrics,
+                    request_deserializer=ml__service__pb2.GetMetricsRequest.FromString,
+                    response_serializer=ml__service__pb2.GetMetricsResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'evoke.MLService', rpc_method_handlers)
@@ -128,6 +224,60 @@ class MLService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def AnalyzeAudioStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/evoke.MLService/AnalyzeAudioStream',
+            ml__service__pb2.AnalyzeAudioChunk.SerializeToString,
+            ml__service__pb2.AnalyzeAudioResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BatchAnalyzeAudio(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/evoke.MLService/BatchAnalyzeAudio',
+            ml__service__pb2.BatchAnalyzeAudioRequest.SerializeToString,
+            ml__service__pb2.BatchAnalyzeAudioResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def RefineEmbedding(request,
             target,
@@ -155,6 +305,87 @@ class MLService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def BatchRefine(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/evoke.MLService/BatchRefine',
+            ml__service__pb2.BatchRefineRequest.SerializeToString,
+            ml__service__pb2.BatchRefineResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SearchImages(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/evoke.MLService/SearchImages',
+            ml__service__pb2.SearchImagesRequest.SerializeToString,
+            ml__service__pb2.SearchImagesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def AnalyzeAndSearch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/evoke.MLService/AnalyzeAndSearch',
+            ml__service__pb2.AnalyzeAndSearchRequest.SerializeToString,
+            ml__service__pb2.AnalyzeAndSearchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def HealthCheck(request,
             target,
@@ -181,3 +412,30 @@ class MLService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def GetMetrics(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/evoke.MLService/GetMetrics',
+            ml__service__pb2.GetMetricsRequest.SerializeToString,
+            ml__service__pb2.GetMetricsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
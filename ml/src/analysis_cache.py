@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .config import config
+
+CacheValue = Tuple[np.ndarray, dict]
+
+
+class AnalysisCache:
+    """
+    Content-addressed cache for AudioEncoder.encode results.
+
+    Entries are keyed by a hash of the audio bytes plus the encoder version,
+    so a change to feature extraction never serves stale embeddings. A
+    bounded in-memory LRU sits in front of an optional on-disk tier; both
+    evict least-recently-used entries once full. The lock only guards the
+    in-memory bookkeeping; disk reads, writes and deletes run outside it.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: Optional[int] = None,
+    ):
+        self.max_entries = config.ANALYSIS_CACHE_ENTRIES if max_entries is None else max_entries
+        self.disk_dir = config.ANALYSIS_CACHE_DIR if disk_dir is None else disk_dir
+        self.disk_max_bytes = (
+            config.ANALYSIS_CACHE_DISK_MB * 1024 * 1024 if disk_max_bytes is None else disk_max_bytes
+        )
+
+        self._memory: OrderedDict[str, CacheValue] = OrderedDict()
+        self._disk: OrderedDict[str, int] = OrderedDict()
+        self._disk_bytes = 0
+        # Keys whose disk file is being written or deleted outside the lock
+        self._disk_busy: set[str] = set()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+
+        if self.disk_enabled:
+            self._load_disk_index()
+
+    @property
+    def disk_enabled(self) -> bool:
+        return bool(self.disk_dir) and self.disk_max_bytes > 0
+
+    @staticmethod
+    def key(audio_data: bytes, audio_format: str, version: str) -> str:
+        """Content hash of the audio plus everything that affects the result."""
+        digest = AnalysisCache.hasher(audio_format, version)
+        digest.update(audio_data)
+        return digest.hexdigest()
+
+    @staticmethod
+    def hasher(audio_format: str, version: str):
+        """key() for audio arriving in chunks: update() with each, then hexdigest()."""
+        digest = hashlib.sha256()
+        digest.update(f"{version}:{audio_format}:".encode())
+        return digest
+
+    def get(self, key: str) -> Optional[CacheValue]:
+        """Look up an entry, promoting disk hits into memory."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return value
+            on_disk = key in self._disk
+
+        # Disk reads happen outside the lock so memory hits never wait on IO
+        value = self._read_disk(key) if on_disk else None
+
+        with self._lock:
+            if value is None:
+                if on_disk:
+                    # Missing or corrupt entry; forget it and recompute
+                    self._disk_bytes -= self._disk.pop(key, 0)
+                self.misses += 1
+                return None
+
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self._put_memory(key, value)
+            self.hits += 1
+            self.disk_hits += 1
+            return value
+
+    def put(self, key: str, embedding: np.ndarray, mood: dict):
+        """Store an entry in memory and, if enabled, on disk."""
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.setflags(write=False)
+        value = (embedding, {k: float(v) for k, v in mood.items()})
+
+        with self._lock:
+            self._put_memory(key, value)
+            write = self.disk_enabled and key not in self._disk and key not in self._disk_busy
+            if write:
+                self._disk_busy.add(key)
+        if not write:
+            return
+
+        size = None
+        try:
+            size = self._write_disk(key, value)
+        finally:
+            evicted = []
+            with self._lock:
+                self._disk_busy.discard(key)
+                if size is not None:
+                    self._disk[key] = size
+                    self._disk_bytes += size
+                    evicted = self._evict_disk()
+            self._remove_disk(evicted)
+
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters and current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_max_entries": self.max_entries,
+                "memory_evictions": self.memory_evictions,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "disk_max_bytes": self.disk_max_bytes if self.disk_enabled else 0,
+                "disk_evictions": self.disk_evictions,
+            }
+
+    def clear(self):
+        """Drop the in-memory tier (disk entries are kept)."""
+        with self._lock:
+            self._memory.clear()
+
+    def _put_memory(self, key: str, value: CacheValue):
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.memory_evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.npz")
+
+    def _load_disk_index(self):
+        """Rebuild the LRU order of existing disk entries from their mtimes."""
+        os.makedirs(self.disk_dir, exist_ok=True)
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".npz"):
+                continue
+            stat = os.stat(os.path.join(self.disk_dir, name))
+            entries.append((stat.st_mtime, name[:-4], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._remove_disk(self._evict_disk())
+
+    def _read_disk(self, key: str) -> Optional[CacheValue]:
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                embedding = data["embedding"]
+                mood = json.loads(str(data["mood"]))
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            return None
+
+        embedding.setflags(write=False)
+        return embedding, mood
+
+    def _write_disk(self, key: str, value: CacheValue) -> Optional[int]:
+        """Write an entry file; returns its size, or None if the write failed."""
+        embedding, mood = value
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, embedding=embedding, mood=np.array(json.dumps(mood)))
+            os.replace(tmp_path, path)
+            return os.path.getsize(path)
+        except OSError as e:
+            print(f"Analysis cache write failed: {e}")
+            return None
+
+    def _evict_disk(self) -> list[str]:
+        """Drop least-recently-used disk entries over budget; call with the lock held."""
+        evicted = []
+        while self._disk and self._disk_bytes > self.disk_max_bytes:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.disk_evictions += 1
+            # Until its file is gone, a put of the same key must not rewrite it
+            self._disk_busy.add(key)
+            evicted.append(key)
+        return evicted
+
+    def _remove_disk(self, keys: list[str]):
+        """Delete evicted entry files; call without the lock."""
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+        if keys:
+            with self._lock:
+                self._disk_busy.difference_update(keys)
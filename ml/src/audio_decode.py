@@ -0,0 +1,168 @@
+"""
+Decode uploaded audio to a mono waveform at the encoder's sample rate.
+
+The format hint picks the decoder:
+
+- Formats libsndfile reads natively (WAV, FLAC, Ogg/Opus, AIFF, and
+  MP3 with libsndfile >= 1.1) are decoded in-process with soundfile,
+  which reads only the first max_duration seconds and is downmixed
+  block by block as it decodes.
+- Everything else (M4A/AAC, WebM, ...) goes through ffmpeg, which
+  demuxes and decodes in one pass and stops after max_duration
+  seconds; its output is downmixed like soundfile's. The input is a
+  temporary file, so MP4/M4A files with their index (moov atom) at the
+  end decode too.
+- Unknown hints try soundfile first (it sniffs the header), then
+  ffmpeg, then librosa.load as a last resort.
+
+Every decoder returns native-rate audio, which is resampled with soxr at
+a configurable quality (config.AUDIO_RESAMPLE_QUALITY); "hq" matches
+librosa.load exactly.
+"""
+
+import io
+import shutil
+import subprocess
+import tempfile
+import time
+from typing import Optional
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+from .audio_stream import downmix_pcm, ffmpeg_command, parse_wav_header, resample
+from .config import config
+
+# soxr quality recipes, fastest last
+RESAMPLE_QUALITIES = ("vhq", "hq", "mq", "lq", "qq")
+
+BLOCK_FRAMES = 65536
+
+_SOUNDFILE_FORMATS = {"wav", "wave", "flac", "ogg", "oga", "opus", "aiff", "aif", "aifc", "au", "caf"}
+if "MP3" in sf.available_formats():
+    _SOUNDFILE_FORMATS.add("mp3")
+
+
+def decode_audio(
+    audio_data: bytes,
+    audio_format: str = "auto",
+    sample_rate: Optional[int] = None,
+    max_duration: Optional[float] = None,
+    quality: Optional[str] = None,
+    timings: Optional[dict] = None,
+) -> np.ndarray:
+    """
+    Decode the first max_duration seconds of audio_data to mono float32.
+
+    Args:
+        audio_format: File extension or "auto"; only used to pick a decoder
+        quality: soxr resampling quality, one of RESAMPLE_QUALITIES
+        timings: If given, filled with seconds per stage ("decode",
+            "resample") and the name of the decoder used
+
+    Returns:
+        Mono float32 waveform at sample_rate
+    """
+    sample_rate = sample_rate or config.AUDIO_SAMPLE_RATE
+    max_duration = max_duration or config.AUDIO_MAX_DURATION
+    quality = quality or config.AUDIO_RESAMPLE_QUALITY
+    if quality not in RESAMPLE_QUALITIES:
+        raise ValueError(f"Unknown resample quality {quality!r}; expected one of {RESAMPLE_QUALITIES}")
+    timings = {} if timings is None else timings
+
+    audio_format = (audio_format or "auto").lower().lstrip(".")
+    if audio_format in _SOUNDFILE_FORMATS:
+        decoders = (_decode_soundfile, _decode_ffmpeg, _decode_librosa)
+    elif audio_format == "auto":
+        decoders = (_decode_soundfile, _decode_ffmpeg, _decode_librosa)
+    else:
+        decoders = (_decode_ffmpeg, _decode_soundfile, _decode_librosa)
+
+    errors = []
+    for decoder in decoders:
+        started = time.perf_counter()
+        try:
+            waveform, native_rate = decoder(audio_data, audio_format, sample_rate, max_duration)
+        except Exception as e:
+            errors.append(f"{decoder.__name__.removeprefix('_decode_')}: {e}")
+            continue
+        if waveform is None:
+            continue
+        timings["decode"] = time.perf_counter() - started
+        timings["decoder"] = decoder.__name__.removeprefix("_decode_")
+        break
+    else:
+        raise ValueError(f"Could not decode {audio_format} audio ({'; '.join(errors) or 'no decoder available'})")
+
+    started = time.perf_counter()
+    waveform = resample(waveform, native_rate, sample_rate, quality)
+    timings["resample"] = time.perf_counter() - started
+
+    return waveform
+
+
+def _decode_soundfile(audio_data: bytes, audio_format: str, sample_rate: int, max_duration: float):
+    """In-process partial decode, downmixed per block. Returns native-rate audio."""
+    with sf.SoundFile(io.BytesIO(audio_data)) as f:
+        native_rate = f.samplerate
+        frames = int(max_duration * native_rate)
+
+        blocks = []
+        for block in f.blocks(blocksize=BLOCK_FRAMES, frames=frames, dtype="float32", always_2d=True):
+            blocks.append(block[:, 0].copy() if block.shape[1] == 1 else block.mean(axis=1, dtype=np.float32))
+
+    waveform = np.concatenate(blocks) if blocks else np.empty(0, dtype=np.float32)
+    return waveform, native_rate
+
+
+def _decode_ffmpeg(audio_data: bytes, audio_format: str, sample_rate: int, max_duration: float):
+    """ffmpeg decode at the native rate; (None, _) if ffmpeg is missing."""
+    if not shutil.which("ffmpeg"):
+        return None, sample_rate
+
+    with tempfile.NamedTemporaryFile(suffix=f".{audio_format}") as f:
+        f.write(audio_data)
+        f.flush()
+        result = subprocess.run(ffmpeg_command(f.name, max_duration), capture_output=True)
+
+    header = parse_wav_header(result.stdout)
+    if header is None or len(result.stdout) == header[2]:
+        raise ValueError(result.stderr.decode(errors="replace").strip() or f"ffmpeg exited with {result.returncode}")
+
+    native_rate, channels, offset = header
+    waveform = downmix_pcm(memoryview(result.stdout)[offset:], channels, int(max_duration * native_rate))
+    return waveform, native_rate
+
+
+def _decode_librosa(audio_data: bytes, audio_format: str, sample_rate: int, max_duration: float):
+    """librosa's generic loader at native rate, as a last resort."""
+    waveform, native_rate = librosa.load(io.BytesIO(audio_data), sr=None, mono=True, duration=max_duration)
+    return waveform, native_rate
+
+
+def main():
+    """Report per-stage decode timings for audio files."""
+    import argparse
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Time the audio decode path")
+    parser.add_argument("files", nargs="+", type=Path)
+    parser.add_argument("--quality", choices=RESAMPLE_QUALITIES, default=config.AUDIO_RESAMPLE_QUALITY)
+    args = parser.parse_args()
+
+    for path in args.files:
+        audio_data = path.read_bytes()
+        timings = {}
+        started = time.perf_counter()
+        waveform = decode_audio(audio_data, path.suffix, quality=args.quality, timings=timings)
+        total = time.perf_counter() - started
+        print(
+            f"{path.name}: {waveform.size / config.AUDIO_SAMPLE_RATE:.1f}s via {timings['decoder']}, "
+            f"decode {timings['decode'] * 1000:.1f}ms, resample {timings['resample'] * 1000:.1f}ms, "
+            f"total {total * 1000:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
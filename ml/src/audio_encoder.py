@@ -1,5 +1,6 @@
-import io
-from typing import Tuple
+import time
+from contextlib import nullcontext
+from typing import Optional, Tuple
 
 import librosa
 import numpy as np
@@ -8,8 +9,23 @@ import torch
 import torchaudio
 from transformers import AutoModel, AutoProcessor
 
+from .audio_decode import decode_audio
+from .cancellation import COSTS, Deadline
 from .config import config
 
+# Bump whenever feature extraction or embedding layout changes, so cached
+# analyses from an older encoder are never served
+ENCODER_VERSION = "1"
+
+# Spectral front end parameters (librosa defaults)
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MELS = 128
+MEL_FMAX = 8000
+
+# Feature profiles; see docs/FEATURE_PROFILES.md for the compatibility contract
+PROFILES = ("full", "fast")
+
 
 class AudioEncoder:
     """Encodes audio into embeddings using MuQ-style feature extraction."""
@@ -22,6 +38,29 @@ class AudioEncoder:
         self._model = None
         self._processor = None
 
+    @property
+    def version(self) -> str:
+        """Identifies everything that affects encode() output, for cache keys."""
+        return self.version_for()
+
+    def version_for(self, profile: Optional[str] = None) -> str:
+        """Cache version of encode() output under a feature profile (default config)."""
+        profile = self._profile(profile)
+        version = f"{ENCODER_VERSION}:{self.sample_rate}:{self.max_duration}:{config.EMBEDDING_DIM}"
+        # "hq" reproduces the original librosa.load resampling, so it keeps old keys
+        if config.AUDIO_RESAMPLE_QUALITY != "hq":
+            version += f":{config.AUDIO_RESAMPLE_QUALITY}"
+        if profile != "full":
+            version += f":{profile}"
+        return version
+
+    @staticmethod
+    def _profile(profile: Optional[str]) -> str:
+        profile = profile or config.AUDIO_FEATURE_PROFILE
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown feature profile {profile!r}; expected one of {PROFILES}")
+        return profile
+
     def load_model(self):
         """Load the audio model (lazy loading)."""
         if self._model is not None:
@@ -32,70 +71,181 @@ class AudioEncoder:
         # In production, this would load the actual MuQ model
         print(f"Audio encoder initialized on {self.device}")
 
-    def encode(self, audio_data: bytes, audio_format: str = "wav") -> Tuple[np.ndarray, dict]:
+    def encode(
+        self,
+        audio_data: bytes,
+        audio_format: str = "wav",
+        timings: Optional[dict] = None,
+        profile: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Tuple[np.ndarray, dict]:
         """
         Encode audio data into a fixed-size embedding.
 
+        Args:
+            timings: If given, filled with seconds per pipeline stage
+                (decode, resample, features, embedding, mood)
+            profile: Feature profile, one of PROFILES (default config)
+            deadline: Checked between stages; see src/cancellation.py
+
         Returns:
             Tuple of (embedding, mood_features)
+
+        Raises:
+            RequestCancelled: if the deadline fires between stages
         """
         self.load_model()
+        profile = self._profile(profile)
+        deadline = deadline or Deadline()
 
         # Load audio from bytes
-        waveform = self._load_audio(audio_data, audio_format)
+        deadline.checkpoint("decode")
+        waveform = self._load_audio(audio_data, audio_format, timings)
+
+        return self.encode_waveform(waveform, profile, timings, deadline)
+
+    def encode_waveform(
+        self,
+        waveform: np.ndarray,
+        profile: Optional[str] = None,
+        timings: Optional[dict] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Tuple[np.ndarray, dict]:
+        """
+        Encode an already decoded mono waveform at the encoder's sample rate.
+
+        Returns:
+            Tuple of (embedding, mood_features)
+        """
+        self.load_model()
+        timings = {} if timings is None else timings
+        deadline = deadline or Deadline()
 
         # Extract features
-        features = self._extract_features(waveform)
+        deadline.checkpoint("features")
+        started = time.perf_counter()
+        features = self._extract_features(waveform, self._profile(profile), deadline)
+        timings["features"] = time.perf_counter() - started
 
         # Compute embedding (placeholder - would use actual MuQ model)
+        deadline.checkpoint("embedding")
+        started = time.perf_counter()
         embedding = self._compute_embedding(features)
+        timings["embedding"] = time.perf_counter() - started
 
         # Extract mood features
+        deadline.checkpoint("mood")
+        started = time.perf_counter()
         mood = self._extract_mood(waveform, features)
+        timings["mood"] = time.perf_counter() - started
 
+        # Close the stage on this thread; callers may project on another
+        deadline.finish()
         return embedding, mood
 
-    def _load_audio(self, audio_data: bytes, audio_format: str) -> np.ndarray:
-        """Load and preprocess audio from bytes."""
-        audio_io = io.BytesIO(audio_data)
+    def _load_audio(self, audio_data: bytes, audio_format: str, timings: Optional[dict] = None) -> np.ndarray:
+        """Decode the first max_duration seconds of audio bytes to a mono waveform."""
+        return decode_audio(audio_data, audio_format, self.sample_rate, self.max_duration, timings=timings)
 
-        # Load with librosa for robust format handling
-        waveform, sr = librosa.load(
-            audio_io,
-            sr=self.sample_rate,
-            mono=True,
-            duration=self.max_duration
-        )
+    def _compute_spectra(self, waveform: np.ndarray) -> dict:
+        """
+        Compute the shared spectral front end for feature extraction.
 
-        return waveform
+        A single STFT feeds every spectral feature: the magnitude spectrogram
+        is used directly by the spectral descriptors, its square by the mel
+        filterbank, and the log-power mel bank by MFCCs and onset detection.
+        Parameters match librosa's defaults so derived features are
+        numerically equivalent to computing each one from the waveform.
+        """
+        stft = librosa.stft(waveform, n_fft=N_FFT, hop_length=HOP_LENGTH)
+        magnitude = np.abs(stft)
+        power = magnitude ** 2
 
-    def _extract_features(self, waveform: np.ndarray) -> dict:
-        """Extract spectral and temporal features."""
-        # Mel spectrogram
+        # Mel bank limited to 8kHz for the embedding's mel statistics
         mel_spec = librosa.feature.melspectrogram(
-            y=waveform,
+            S=power,
             sr=self.sample_rate,
-            n_mels=128,
-            fmax=8000
+            n_mels=N_MELS,
+            fmax=MEL_FMAX
         )
-        mel_db = librosa.power_to_db(mel_spec, ref=np.max)
 
-        # Chromagram
-        chroma = librosa.feature.chroma_cqt(y=waveform, sr=self.sample_rate)
+        # MFCC and onset detection use a full-band mel bank; at 16kHz
+        # the Nyquist frequency equals MEL_FMAX and the banks coincide
+        if MEL_FMAX == self.sample_rate / 2:
+            full_mel = mel_spec
+        else:
+            full_mel = librosa.feature.melspectrogram(
+                S=power,
+                sr=self.sample_rate,
+                n_mels=N_MELS
+            )
+
+        return {
+            "magnitude": magnitude,
+            "power": power,
+            "mel_spec": mel_spec,
+            "log_mel": librosa.power_to_db(full_mel),
+        }
+
+    def _extract_features(
+        self,
+        waveform: np.ndarray,
+        profile: str = "full",
+        deadline: Optional[Deadline] = None,
+    ) -> dict:
+        """
+        Extract spectral and temporal features.
+
+        The "fast" profile derives chroma from the shared STFT instead of a
+        constant-Q transform and estimates tempo from the onset envelope's
+        tempogram without running beat tracking. A full-profile request
+        that allows degraded results takes the same shortcuts for either
+        step when its deadline can't cover the step's usual cost.
+        """
+        deadline = deadline or Deadline()
+        full = profile == "full"
+        spectra = self._compute_spectra(waveform)
+        magnitude = spectra["magnitude"]
+        log_mel = spectra["log_mel"]
+
+        # Mel spectrogram
+        mel_db = librosa.power_to_db(spectra["mel_spec"], ref=np.max)
+
+        # Chromagram (constant-Q, cannot be derived from the STFT)
+        deadline.check("chroma_cqt", full)
+        if full and deadline.affords("chroma_cqt"):
+            with COSTS.measure("chroma_cqt"):
+                chroma = librosa.feature.chroma_cqt(y=waveform, sr=self.sample_rate)
+        else:
+            with deadline.degrading("chroma_cqt") if full else nullcontext():
+                chroma = librosa.feature.chroma_stft(S=spectra["power"], sr=self.sample_rate)
 
         # MFCCs
-        mfccs = librosa.feature.mfcc(y=waveform, sr=self.sample_rate, n_mfcc=20)
+        mfccs = librosa.feature.mfcc(S=log_mel, n_mfcc=20)
 
         # Spectral features
-        spectral_centroid = librosa.feature.spectral_centroid(y=waveform, sr=self.sample_rate)
-        spectral_rolloff = librosa.feature.spectral_rolloff(y=waveform, sr=self.sample_rate)
-        spectral_contrast = librosa.feature.spectral_contrast(y=waveform, sr=self.sample_rate)
-
-        # Rhythm features
-        tempo, beats = librosa.beat.beat_track(y=waveform, sr=self.sample_rate)
-        onset_env = librosa.onset.onset_strength(y=waveform, sr=self.sample_rate)
+        spectral_centroid = librosa.feature.spectral_centroid(S=magnitude, sr=self.sample_rate)
+        spectral_rolloff = librosa.feature.spectral_rolloff(S=magnitude, sr=self.sample_rate)
+        spectral_contrast = librosa.feature.spectral_contrast(S=magnitude, sr=self.sample_rate)
+
+        # Rhythm features (beat tracking uses a median-aggregated envelope)
+        onset_env = librosa.onset.onset_strength(S=log_mel, sr=self.sample_rate)
+        beat_env = librosa.onset.onset_strength(
+            S=log_mel,
+            sr=self.sample_rate,
+            aggregate=np.median
+        )
+        deadline.check("beat_track", full)
+        if full and deadline.affords("beat_track"):
+            with COSTS.measure("beat_track"):
+                tempo, beats = librosa.beat.beat_track(onset_envelope=beat_env, sr=self.sample_rate)
+        else:
+            # beat_track's own tempo estimate, minus the beat-placement DP
+            with deadline.degrading("beat_track") if full else nullcontext():
+                tempo = librosa.feature.tempo(onset_envelope=beat_env, sr=self.sample_rate)
+                beats = np.empty(0, dtype=int)
 
-        # RMS energy
+        # RMS energy (time-domain; the windowed STFT would change the values)
         rms = librosa.feature.rms(y=waveform)
 
         return {
@@ -212,7 +362,7 @@ class AudioEncoder:
         valence = float(np.clip((spectral_brightness + mode_score) / 2, 0, 1))
 
         # Tempo: normalized to 0-1 (assuming 60-180 BPM range)
-        tempo_raw = float(features["tempo"])
+        tempo_raw = float(np.asarray(features["tempo"]).flat[0])
         tempo = float(np.clip((tempo_raw - 60) / 120, 0, 1))
 
         # Texture: based on spectral contrast and complexity
@@ -0,0 +1,265 @@
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Optional, Tuple
+
+import librosa
+import numpy as np
+
+from .config import config
+
+READ_SIZE = 64 * 1024
+BYTES_PER_SAMPLE = 4  # float32 PCM
+
+# Containers that may need seeking to decode, so are never piped to ffmpeg
+SEEKABLE_FORMATS = {"mp4", "m4a", "m4b", "mov", "3gp"}
+
+
+def ffmpeg_command(source: str, max_duration: float) -> list[str]:
+    """
+    ffmpeg arguments decoding source (a path or "pipe:0") to float32 WAV on stdout.
+
+    The audio keeps its native rate and channels, read from the WAV
+    header with parse_wav_header, so callers downmix (downmix_pcm) and
+    resample it exactly as in-process decodes are. ffmpeg's own mono
+    downmix is 3dB louder than the channel mean.
+    """
+    return [
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-i", source,
+        "-t", str(max_duration),
+        "-c:a", "pcm_f32le",
+        "-f", "wav",
+        "pipe:1",
+    ]
+
+
+def parse_wav_header(data: bytes) -> Optional[Tuple[int, int, int]]:
+    """
+    Sample rate, channel count and sample offset of the WAV stream ffmpeg_command writes.
+
+    Returns None until data holds the complete header.
+
+    Raises:
+        ValueError: if data is not a WAV stream
+    """
+    if len(data) < 12:
+        return None
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("ffmpeg did not produce WAV output")
+
+    sample_rate = channels = None
+    offset = 12
+    while len(data) >= offset + 8:
+        chunk_id = data[offset:offset + 4]
+        size = int.from_bytes(data[offset + 4:offset + 8], "little")
+        # Streamed output has no length, so samples run from here to EOF
+        if chunk_id == b"data":
+            if sample_rate is None:
+                raise ValueError("WAV output has no fmt chunk")
+            return sample_rate, channels, offset + 8
+        if len(data) < offset + 8 + size:
+            return None
+        if chunk_id == b"fmt ":
+            channels = int.from_bytes(data[offset + 10:offset + 12], "little")
+            sample_rate = int.from_bytes(data[offset + 12:offset + 16], "little")
+        offset += 8 + size + (size & 1)
+    return None
+
+
+def downmix_pcm(data: bytes, channels: int, max_frames: Optional[int] = None) -> np.ndarray:
+    """Mono float32 mean of interleaved float32 PCM, ignoring a trailing partial frame."""
+    frames = len(data) // (BYTES_PER_SAMPLE * channels)
+    if max_frames is not None:
+        frames = min(frames, max_frames)
+    pcm = np.frombuffer(data, dtype="<f4", count=frames * channels).reshape(frames, channels)
+    return pcm[:, 0].astype(np.float32) if channels == 1 else pcm.mean(axis=1, dtype=np.float32)
+
+
+def resample(waveform: np.ndarray, native_rate: int, sample_rate: int, quality: str) -> np.ndarray:
+    """soxr resampling shared by every decode path, so they agree sample for sample."""
+    if native_rate == sample_rate:
+        return waveform
+    return librosa.resample(waveform, orig_sr=native_rate, target_sr=sample_rate, res_type=f"soxr_{quality}")
+
+
+class StreamingDecoder:
+    """
+    Incrementally decode an audio byte stream to mono float32 PCM.
+
+    Chunks are piped into an ffmpeg process as they arrive, which demuxes
+    and decodes on the fly while a reader thread collects its native-rate
+    PCM. Decoding stops once max_duration seconds have been produced, so
+    callers can stop reading the upload at that point. finish() downmixes
+    and resamples the result exactly as decode_audio does, so streamed
+    and unary uploads of a file give the same waveform.
+
+    Decoded incrementally, the upload itself is never held in memory.
+    Streams that can't be decoded that way are buffered instead, and
+    finish() returns None for them: without ffmpeg on PATH, or for
+    MP4-family containers (whose index may sit at the end of the file,
+    out of reach of a pipe). The caller then decodes buffered_bytes() in
+    one go with AudioEncoder._load_audio.
+    """
+
+    def __init__(
+        self,
+        audio_format: str = "wav",
+        sample_rate: Optional[int] = None,
+        max_duration: Optional[int] = None,
+        quality: Optional[str] = None,
+    ):
+        self.audio_format = audio_format
+        self.sample_rate = sample_rate or config.AUDIO_SAMPLE_RATE
+        self.max_duration = max_duration or config.AUDIO_MAX_DURATION
+        self.quality = quality or config.AUDIO_RESAMPLE_QUALITY
+
+        self.bytes_received = 0
+        self.error: Optional[str] = None
+        self._output = bytearray()
+        self._header: Optional[Tuple[int, int, int]] = None
+        self._buffered: list[bytes] = []
+        self._done = threading.Event()
+        self._stdin_closed = False
+
+        self._process: Optional[subprocess.Popen] = None
+        self._stderr = None
+        self._reader: Optional[threading.Thread] = None
+        if shutil.which("ffmpeg") and audio_format.lower().lstrip(".") not in SEEKABLE_FORMATS:
+            self._start_ffmpeg()
+
+    @property
+    def incremental(self) -> bool:
+        """Whether chunks are decoded as they arrive."""
+        return self._process is not None
+
+    @property
+    def done(self) -> bool:
+        """True once max_duration seconds of audio have been decoded."""
+        return self._done.is_set()
+
+    @property
+    def seconds_decoded(self) -> float:
+        if self._header is None:
+            return 0.0
+        native_rate, channels, offset = self._header
+        frames = max(len(self._output) - offset, 0) // (BYTES_PER_SAMPLE * channels)
+        return min(frames / native_rate, self.max_duration)
+
+    def feed(self, chunk: bytes):
+        """Push the next chunk of the encoded stream."""
+        if not chunk or self.done:
+            return
+        self.bytes_received += len(chunk)
+        if self._process is None:
+            self._buffered.append(chunk)
+            return
+
+        if self._stdin_closed:
+            return
+        try:
+            self._process.stdin.write(chunk)
+        except (BrokenPipeError, ValueError):
+            # ffmpeg exited: either it hit the duration limit or the
+            # input is invalid; finish() tells the two apart
+            self._stdin_closed = True
+
+    def finish(self, timings: Optional[dict] = None) -> Optional[np.ndarray]:
+        """
+        Signal end of input and return the decoded waveform at sample_rate.
+
+        Args:
+            timings: If given, filled with the seconds spent resampling
+
+        Returns None when the stream was not decoded incrementally (see
+        the class docstring).
+
+        Raises:
+            ValueError: if ffmpeg could not decode the stream (also kept in error)
+        """
+        if self._process is None:
+            return None
+
+        self._close_stdin()
+        self._reader.join()
+        returncode = self._process.wait()
+
+        if self._header is None or len(self._output) == self._header[2]:
+            self._stderr.seek(0)
+            self.error = self._stderr.read().decode(errors="replace").strip() or f"ffmpeg exited with {returncode}"
+            raise ValueError(f"Could not decode {self.audio_format} audio (ffmpeg: {self.error})")
+
+        native_rate, channels, offset = self._header
+        waveform = downmix_pcm(memoryview(self._output)[offset:], channels, self.max_duration * native_rate)
+        started = time.perf_counter()
+        waveform = resample(waveform, native_rate, self.sample_rate, self.quality)
+        if timings is not None:
+            timings["resample"] = time.perf_counter() - started
+        return waveform
+
+    def buffered_bytes(self) -> bytes:
+        """All chunks received so far, when the stream is not decoded incrementally."""
+        return b"".join(self._buffered)
+
+    def abort(self):
+        """Stop decoding and release the ffmpeg process."""
+        if self._process is None:
+            return
+        self._done.set()
+        self._close_stdin()
+        self._process.kill()
+        self._process.wait()
+        self._reader.join()
+        self._stderr.close()
+
+    def _start_ffmpeg(self):
+        # A file, not a pipe: nothing reads stderr until ffmpeg exits, and a
+        # full pipe would block it mid-decode
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(
+            ffmpeg_command("pipe:0", self.max_duration),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self._stderr,
+        )
+        self._reader = threading.Thread(target=self._read_pcm, daemon=True)
+        self._reader.start()
+
+    def _read_pcm(self):
+        max_bytes = None
+        while True:
+            data = self._process.stdout.read1(READ_SIZE)
+            if not data:
+                break
+            self._output += data
+
+            if self._header is None:
+                try:
+                    self._header = parse_wav_header(self._output)
+                except ValueError:
+                    # Left unread, ffmpeg would block on a full pipe
+                    self._process.kill()
+                    break
+                if self._header is None:
+                    continue
+                native_rate, channels, offset = self._header
+                max_bytes = offset + self.max_duration * native_rate * channels * BYTES_PER_SAMPLE
+
+            if len(self._output) >= max_bytes:
+                self._done.set()
+                break
+
+        if self._done.is_set():
+            # Enough audio; don't make ffmpeg decode the rest
+            self._process.kill()
+
+    def _close_stdin(self):
+        if self._stdin_closed:
+            return
+        self._stdin_closed = True
+        try:
+            self._process.stdin.close()
+        except (BrokenPipeError, ValueError):
+            pass
@@ -1,7 +1,13 @@
+import hashlib
+import json
+import os
+from typing import Iterable, Optional
+
 import numpy as np
 import torch
 from transformers import CLIPModel, CLIPProcessor
 
+from .clip_backend import backend_tag, load_backend
 from .config import config
 
 
@@ -32,31 +38,37 @@ class CrossModalBridge:
         },
     }
 
-    def __init__(self):
+    # Prompt templates applied to every mood word; add more for an ensemble
+    MOOD_TEMPLATES = ["{}"]
+
+    # Strength of each slider's direction, in MOOD_PROMPTS order
+    MOOD_SCALES = np.array([0.2, 0.2, 0.15, 0.15], dtype=np.float32)
+
+    def __init__(self, backend: Optional[str] = None, quantize: Optional[bool] = None):
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.embedding_dim = config.EMBEDDING_DIM
+        self.backend_name = backend or config.CLIP_BACKEND
+        self.quantize = config.CLIP_QUANTIZE if quantize is None else quantize
 
-        self._clip_model = None
+        self._backend = None
         self._clip_processor = None
         self._direction_vectors = None
+        self._direction_matrix = None
 
         # Learned projection matrix (placeholder - would be trained)
         self._projection = None
 
     def load_model(self):
         """Load CLIP model for visual embedding reference."""
-        if self._clip_model is not None:
+        if self._backend is not None:
             return
 
-        print(f"Loading CLIP model: {config.CLIP_MODEL}")
-        self._clip_model = CLIPModel.from_pretrained(
-            config.CLIP_MODEL,
-            cache_dir=config.MODEL_CACHE_DIR
-        ).to(self.device)
+        print(f"Loading CLIP model: {config.CLIP_MODEL} ({backend_tag(self.backend_name, self.quantize)})")
         self._clip_processor = CLIPProcessor.from_pretrained(
             config.CLIP_MODEL,
             cache_dir=config.MODEL_CACHE_DIR
         )
+        self._backend = load_backend(self.backend_name, self.quantize, self._load_clip_model, self.device)
 
         # Initialize projection matrix (identity + small noise for now)
         # In production, this would be a trained neural network
@@ -64,6 +76,16 @@ class CrossModalBridge:
 
         print("CLIP model loaded successfully")
 
+        # Map persisted direction vectors now so the first refine is free
+        if os.path.exists(self.direction_cache_path()):
+            self.load_direction_vectors()
+
+    def _load_clip_model(self) -> CLIPModel:
+        return CLIPModel.from_pretrained(
+            config.CLIP_MODEL,
+            cache_dir=config.MODEL_CACHE_DIR
+        ).to(self.device)
+
     def project_to_clip_space(self, audio_embedding: np.ndarray) -> np.ndarray:
         """
         Project audio embedding into CLIP visual embedding space.
@@ -100,27 +122,47 @@ class CrossModalBridge:
         This applies semantic adjustments to the embedding based on
         user-specified mood parameters.
         """
+        return self.refine_embeddings(base_embedding, [[energy, valence, tempo, texture]])[0]
+
+    def refine_embeddings(self, base_embedding: np.ndarray, settings) -> np.ndarray:
+        """
+        Refine one base embedding for many slider settings at once.
+
+        Args:
+            base_embedding: (embedding_dim,) CLIP-space embedding
+            settings: (M, 4) slider values as (energy, valence, tempo, texture)
+
+        Returns:
+            (M, embedding_dim) float32 matrix of L2-normalized embeddings
+        """
         self.load_model()
 
-        if self._direction_vectors is None:
-            self._direction_vectors = self.compute_direction_vectors()
+        if self._direction_matrix is None:
+            self.load_direction_vectors()
 
-        # Create mood adjustment vector using semantic CLIP directions
-        adjustment = np.zeros(self.embedding_dim, dtype=np.float32)
-        adjustment += self._direction_vectors["energy"] * (energy - 0.5) * 0.2
-        adjustment += self._direction_vectors["valence"] * (valence - 0.5) * 0.2
-        adjustment += self._direction_vectors["tempo"] * (tempo - 0.5) * 0.15
-        adjustment += self._direction_vectors["texture"] * (texture - 0.5) * 0.15
+        # Create mood adjustment vectors using semantic CLIP directions
+        adjustments = self.slider_weights(settings) @ self._direction_matrix
 
-        # Apply adjustment
-        refined = base_embedding + adjustment
+        # Apply adjustments
+        refined = np.asarray(base_embedding, dtype=np.float32)[None, :] + adjustments
 
         # L2 normalize
-        norm = np.linalg.norm(refined)
-        if norm > 0:
-            refined = refined / norm
+        norms = np.linalg.norm(refined, axis=1, keepdims=True)
+        np.divide(refined, norms, out=refined, where=norms > 0)
+
+        return refined.astype(np.float32, copy=False)
+
+    @property
+    def direction_matrix(self) -> np.ndarray:
+        """(4, embedding_dim) mood directions, rows in MOOD_PROMPTS order."""
+        if self._direction_matrix is None:
+            self.load_direction_vectors()
+        return self._direction_matrix
 
-        return refined.astype(np.float32)
+    def slider_weights(self, settings) -> np.ndarray:
+        """(M, 4) coefficients of the direction vectors for slider settings."""
+        settings = np.asarray(settings, dtype=np.float32).reshape(-1, len(self.MOOD_PROMPTS))
+        return (settings - 0.5) * self.MOOD_SCALES
 
     def encode_image(self, image) -> np.ndarray:
         """
@@ -128,22 +170,36 @@ class CrossModalBridge:
 
         Used for building the image index in Milvus.
         """
-        self.load_model()
+        return self.encode_images([image])[0]
 
-        inputs = self._clip_processor(images=image, return_tensors="pt").to(self.device)
+    def encode_images(self, images: Iterable, batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Encode many images into CLIP embedding space.
 
-        with torch.no_grad():
-            output = self._clip_model.get_image_features(**inputs)
-            image_features = output.pooler_output if hasattr(output, 'pooler_output') else output
+        Images are run through CLIP in micro-batches of batch_size
+        (default config.CLIP_BATCH_SIZE).
 
-        embedding = image_features.cpu().numpy().flatten()
+        Returns:
+            Contiguous float32 array of shape (N, embedding_dim), L2-normalized
+        """
+        self.load_model()
+        batch_size = batch_size or config.CLIP_BATCH_SIZE
 
-        # L2 normalize
-        norm = np.linalg.norm(embedding)
-        if norm > 0:
-            embedding = embedding / norm
+        images = list(images)
+        embeddings = np.empty((len(images), self.embedding_dim), dtype=np.float32)
+
+        with torch.inference_mode():
+            for start in range(0, len(images), batch_size):
+                batch = images[start:start + batch_size]
+                inputs = self._clip_processor(images=batch, return_tensors="pt").to(self.device)
+                image_features = self._backend.image_features(inputs["pixel_values"])
+                embeddings[start:start + len(batch)] = image_features.cpu().numpy()
 
-        return embedding.astype(np.float32)
+        # L2 normalize rows
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+
+        return embeddings
 
     def encode_text(self, text: str) -> np.ndarray:
         """
@@ -151,38 +207,62 @@ class CrossModalBridge:
 
         Can be used for text-based mood adjustments.
         """
-        self.load_model()
+        return self.encode_texts([text])[0]
 
-        inputs = self._clip_processor(text=text, return_tensors="pt", padding=True).to(self.device)
+    def encode_texts(self, texts: Iterable[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Encode many text prompts into CLIP embedding space.
+
+        Returns:
+            Contiguous float32 array of shape (N, embedding_dim), L2-normalized
+        """
+        self.load_model()
+        batch_size = batch_size or config.CLIP_BATCH_SIZE
 
-        with torch.no_grad():
-            output = self._clip_model.get_text_features(**inputs)
-            text_features = output.pooler_output if hasattr(output, 'pooler_output') else output
+        texts = list(texts)
+        embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
 
-        embedding = text_features.cpu().numpy().flatten()
+        with torch.inference_mode():
+            for start in range(0, len(texts), batch_size):
+                batch = texts[start:start + batch_size]
+                inputs = self._clip_processor(text=batch, return_tensors="pt", padding=True).to(self.device)
+                text_features = self._backend.text_features(inputs["input_ids"], inputs["attention_mask"])
+                embeddings[start:start + len(batch)] = text_features.cpu().numpy()
 
-        # L2 normalize
-        norm = np.linalg.norm(embedding)
-        if norm > 0:
-            embedding = embedding / norm
+        # L2 normalize rows
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        np.divide(embeddings, norms, out=embeddings, where=norms > 0)
 
-        return embedding.astype(np.float32)
+        return embeddings
 
     def compute_direction_vectors(self) -> dict[str, np.ndarray]:
         """
         Compute semantic direction vectors from CLIP text embeddings.
 
-        For each mood dimension, encodes high/low text prompts and computes
-        the direction as mean(high) - mean(low), L2-normalized.
+        Every template/word prompt is encoded in one batched pass. For each
+        mood dimension the direction is mean(high) - mean(low) over all of
+        its prompts, L2-normalized. With equal templates per word this is
+        the same as averaging each word's template ensemble first.
         """
         self.load_model()
 
-        directions = {}
-        for mood, prompts in self.MOOD_PROMPTS.items():
-            high_embeddings = np.stack([self.encode_text(w) for w in prompts["high"]])
-            low_embeddings = np.stack([self.encode_text(w) for w in prompts["low"]])
+        prompts = []
+        groups = []
+        for mood in self.MOOD_PROMPTS:
+            for pole in ("high", "low"):
+                words = self.MOOD_PROMPTS[mood][pole]
+                groups.append((len(prompts), len(prompts) + len(words) * len(self.MOOD_TEMPLATES)))
+                prompts.extend(template.format(w) for w in words for template in self.MOOD_TEMPLATES)
+
+        embeddings = self.encode_texts(prompts)
 
-            direction = high_embeddings.mean(axis=0) - low_embeddings.mean(axis=0)
+        directions = {}
+        for i, mood in enumerate(self.MOOD_PROMPTS):
+            (high_start, high_end), (low_start, low_end) = groups[2 * i], groups[2 * i + 1]
+            direction = (
+                embeddings[high_start:high_end].mean(axis=0)
+                - embeddings[low_start:low_end].mean(axis=0)
+            )
             norm = np.linalg.norm(direction)
             if norm > 0:
                 direction = direction / norm
@@ -190,3 +270,51 @@ class CrossModalBridge:
             directions[mood] = direction.astype(np.float32)
 
         return directions
+
+    def direction_cache_path(self) -> str:
+        """Path of the persisted direction matrix for this model and prompt set."""
+        prompt_set = json.dumps(
+            {"prompts": self.MOOD_PROMPTS, "templates": self.MOOD_TEMPLATES},
+            sort_keys=True,
+        )
+        prompt_hash = hashlib.sha256(prompt_set.encode()).hexdigest()[:16]
+        model_id = config.CLIP_MODEL.strip("/").replace("/", "--")
+        tag = backend_tag(self.backend_name, self.quantize)
+        # fp32 eager keeps the original file name
+        suffix = "" if tag == "eager" else f"-{tag}"
+        return os.path.join(config.DIRECTION_CACHE_DIR, f"{model_id}-{prompt_hash}{suffix}.npy")
+
+    def load_direction_vectors(self) -> dict[str, np.ndarray]:
+        """
+        Return the direction vectors, memory-mapping the persisted matrix if
+        available and otherwise computing and persisting it.
+        """
+        if self._direction_vectors is not None:
+            return self._direction_vectors
+
+        path = self.direction_cache_path()
+        matrix = None
+        if os.path.exists(path):
+            try:
+                matrix = np.load(path, mmap_mode="r")
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable direction cache {path}: {e}")
+
+        if matrix is None or matrix.shape != (len(self.MOOD_PROMPTS), self.embedding_dim):
+            directions = self.compute_direction_vectors()
+            matrix = np.stack([directions[mood] for mood in self.MOOD_PROMPTS])
+            self._save_direction_matrix(path, matrix)
+
+        self._direction_matrix = matrix
+        self._direction_vectors = {mood: matrix[i] for i, mood in enumerate(self.MOOD_PROMPTS)}
+        return self._direction_vectors
+
+    def _save_direction_matrix(self, path: str, matrix: np.ndarray):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                np.save(f, matrix)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not persist direction vectors to {path}: {e}")
@@ -0,0 +1,199 @@
+"""
+Cooperative cancellation for the analysis pipeline.
+
+A Deadline travels with one request through AudioEncoder and the CLIP
+projection. The pipeline calls checkpoint() at every stage boundary
+(decode, features, embedding, mood, project) and check() before the
+costly steps inside feature extraction. Both raise RequestCancelled
+once the client has gone (gRPC call no longer active, HTTP client
+disconnected) or the deadline has passed, so abandoned work stops at
+the next boundary instead of running to completion.
+
+Requests that allow degraded results may also skip optional work the
+remaining time can't cover: the full profile's constant-Q chroma and
+beat tracking fall back to their "fast" profile equivalents. Callers
+must not cache degraded results.
+
+Thread CPU time per stage is kept as a moving average, so a cancelled
+request is credited with the CPU of the stages it never ran.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from . import metrics
+
+# Stage boundaries, in pipeline order
+PIPELINE_STAGES = ("decode", "features", "embedding", "mood", "project")
+# Costly steps inside the features stage, also checked before they start
+FEATURE_STEPS = ("chroma_cqt", "beat_track")
+
+
+class RequestCancelled(RuntimeError):
+    """Raised at a stage boundary once a request is cancelled or out of time."""
+
+    def __init__(self, reason: str, stage: str):
+        super().__init__(f"Request {'cancelled' if reason == 'cancelled' else 'deadline exceeded'} before {stage}")
+        self.reason = reason
+        self.stage = stage
+
+
+class CostModel:
+    """
+    Moving average of thread CPU seconds per pipeline stage or optional step.
+
+    The first run of each step pays for JIT compilation and cold caches,
+    so it is not counted.
+    """
+
+    def __init__(self, smoothing: float = 0.2):
+        self.smoothing = smoothing
+        self._costs: dict[str, float] = {}
+        self._seen: set[str] = set()
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            if name not in self._seen:
+                self._seen.add(name)
+                return
+            previous = self._costs.get(name)
+            self._costs[name] = seconds if previous is None else previous + self.smoothing * (seconds - previous)
+
+    def estimate(self, name: str) -> float:
+        """Expected CPU seconds, or 0 until the step has run twice."""
+        return self._costs.get(name, 0.0)
+
+    @contextmanager
+    def measure(self, name: str):
+        started = time.thread_time()
+        try:
+            yield
+        finally:
+            self.record(name, time.thread_time() - started)
+
+
+COSTS = CostModel()
+
+
+class Deadline:
+    """
+    Cancellation state and time budget of one request.
+
+    A Deadline without a timeout or cancellation source never fires; the
+    pipeline uses one by default so stage costs are always measured.
+    Stage CPU time is read per thread, so a stage must start and end on
+    the same thread (AudioEncoder ends its last stage before returning).
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        allow_degraded: bool = False,
+    ):
+        self.expires_at = None if timeout is None else time.monotonic() + timeout
+        self.allow_degraded = allow_degraded
+        self.degraded: list[str] = []
+        self._is_cancelled = is_cancelled
+        self._cancelled = False
+        self._stage: Optional[str] = None
+        self._stage_started = 0.0
+
+    @classmethod
+    def from_grpc(cls, context, allow_degraded: bool = False) -> "Deadline":
+        """Deadline and liveness of a gRPC call, from a sync or aio servicer context."""
+        is_active = getattr(context, "is_active", None)
+        is_cancelled = (lambda: not is_active()) if is_active is not None else context.cancelled
+        return cls(context.time_remaining(), is_cancelled, allow_degraded)
+
+    def cancel(self):
+        """Stop the request at its next stage boundary."""
+        self._cancelled = True
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled or (self._is_cancelled is not None and self._is_cancelled())
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None without a deadline."""
+        return None if self.expires_at is None else self.expires_at - time.monotonic()
+
+    def affords(self, step: str) -> bool:
+        """
+        Whether to run an optional step in full.
+
+        Always true unless the request allows degraded results and the
+        step's estimated cost exceeds the time left.
+        """
+        if not self.allow_degraded:
+            return True
+        remaining = self.remaining()
+        return remaining is None or remaining >= COSTS.estimate(step)
+
+    @contextmanager
+    def degrading(self, step: str):
+        """Run the cheap stand-in for a skipped step, recording the CPU it saved."""
+        started = time.thread_time()
+        try:
+            yield
+        finally:
+            saved = max(COSTS.estimate(step) - (time.thread_time() - started), 0.0)
+            self.degraded.append(step)
+            metrics.DEGRADED_STEPS_TOTAL.labels(step).inc()
+            metrics.CPU_SAVED_SECONDS_TOTAL.labels("degraded").inc(saved)
+
+    def checkpoint(self, stage: str):
+        """
+        Mark the start of a pipeline stage.
+
+        Raises:
+            RequestCancelled: if the request was cancelled or its deadline
+                passed; the estimated CPU of this and later stages is
+                recorded as saved.
+        """
+        self.finish()
+        self._raise_if_stopped(stage, PIPELINE_STAGES[PIPELINE_STAGES.index(stage):])
+        self._stage = stage
+        self._stage_started = time.thread_time()
+
+    def check(self, step: str, full: bool = True):
+        """
+        Check before one of the FEATURE_STEPS, within the features stage.
+
+        Args:
+            full: Whether the remaining FEATURE_STEPS would run (false for
+                the "fast" profile), for the CPU-saved estimate
+
+        Raises:
+            RequestCancelled: as checkpoint()
+        """
+        not_run = PIPELINE_STAGES[PIPELINE_STAGES.index("features") + 1:]
+        if full:
+            not_run = FEATURE_STEPS[FEATURE_STEPS.index(step):] + not_run
+        self._raise_if_stopped(step, not_run)
+
+    def _raise_if_stopped(self, stage: str, not_run: tuple):
+        # An expired gRPC deadline also makes the call inactive; report it as a deadline
+        if self.expires_at is not None and time.monotonic() >= self.expires_at:
+            reason = "deadline"
+        elif self.cancelled:
+            reason = "cancelled"
+        else:
+            return
+
+        self._stage = None
+        metrics.CANCELLED_TOTAL.labels(stage, reason).inc()
+        metrics.CPU_SAVED_SECONDS_TOTAL.labels(reason).inc(sum(COSTS.estimate(name) for name in not_run))
+        raise RequestCancelled(reason, stage)
+
+    def finish(self):
+        """End the current stage, recording its CPU time."""
+        if self._stage is None:
+            return
+        # Degraded runs would drag the estimates of full stages down
+        if not self.degraded:
+            COSTS.record(self._stage, time.thread_time() - self._stage_started)
+        self._stage = None
@@ -0,0 +1,232 @@
+"""
+Pluggable CPU inference backends for the CLIP vision and text towers.
+
+``eager``
+    The HuggingFace CLIPModel as loaded, in PyTorch eager mode.
+
+``torchscript``
+    Each tower traced to TorchScript and frozen, saved under
+    config.CLIP_EXPORT_DIR, and optimized for inference on load. Later
+    starts load the saved graphs without touching the HuggingFace
+    weights. The text tower is traced at CLIP's full context length and
+    keeps dynamic sequence shapes, so short prompts stay cheap.
+
+Either backend can apply dynamic int8 quantization to the linear
+layers (config.CLIP_QUANTIZE), which holds nearly all of CLIP's
+compute. Run ``python -m src.clip_backend`` to export the configured
+backend and report its cosine similarity to fp32 eager.
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+import torch
+
+from .config import config
+
+BACKENDS = ("eager", "torchscript")
+
+# CLIP's text context length, used to trace the text tower
+TEXT_LENGTH = 77
+
+
+def backend_tag(name: str, quantize: bool) -> str:
+    """Short identifier of a backend configuration, e.g. "torchscript-int8"."""
+    return f"{name}-int8" if quantize else name
+
+
+def export_dir(tag: str, model_id: Optional[str] = None) -> Path:
+    """Directory holding the exported towers for a model and backend tag."""
+    model_id = (model_id or config.CLIP_MODEL).strip("/").replace("/", "--")
+    return Path(config.CLIP_EXPORT_DIR) / f"{model_id}-{tag}"
+
+
+def _features(output) -> torch.Tensor:
+    return output.pooler_output if hasattr(output, "pooler_output") else output
+
+
+class _VisionTower(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return _features(self.model.get_image_features(pixel_values=pixel_values))
+
+
+class _TextTower(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        return _features(self.model.get_text_features(input_ids=input_ids, attention_mask=attention_mask))
+
+
+class ClipBackend:
+    """Runs the CLIP towers on preprocessed tensors."""
+
+    def __init__(self, tag: str, vision, text):
+        self.tag = tag
+        self.vision = vision
+        self.text = text
+
+    def image_features(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return self.vision(pixel_values)
+
+    def text_features(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        return self.text(input_ids, attention_mask)
+
+
+def _quantize(model):
+    """Dynamic int8 quantization of every linear layer (CPU only)."""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def eager_backend(model, quantize: bool = False) -> ClipBackend:
+    model = _quantize(model.eval()) if quantize else model.eval()
+    return ClipBackend(backend_tag("eager", quantize), _VisionTower(model), _TextTower(model))
+
+
+def export_torchscript(model, path: Path, quantize: bool = False) -> ClipBackend:
+    """Trace, freeze and save both towers of model to path."""
+    model = _quantize(model.eval()) if quantize else model.eval()
+    image_size = model.config.vision_config.image_size
+
+    example_pixels = torch.zeros(2, 3, image_size, image_size)
+    example_ids = torch.ones(2, TEXT_LENGTH, dtype=torch.long)
+    example_mask = torch.ones(2, TEXT_LENGTH, dtype=torch.long)
+
+    with torch.inference_mode(False), torch.no_grad():
+        vision = torch.jit.freeze(torch.jit.trace(_VisionTower(model), example_pixels, check_trace=False).eval())
+        text = torch.jit.freeze(torch.jit.trace(_TextTower(model), (example_ids, example_mask), check_trace=False).eval())
+
+    path.mkdir(parents=True, exist_ok=True)
+    for name, module in (("vision", vision), ("text", text)):
+        tmp_path = path / f"{name}.pt.{os.getpid()}.tmp"
+        torch.jit.save(module, str(tmp_path))
+        os.replace(tmp_path, path / f"{name}.pt")
+    print(f"Exported CLIP towers to {path}")
+
+    return ClipBackend(
+        backend_tag("torchscript", quantize),
+        torch.jit.optimize_for_inference(vision),
+        torch.jit.optimize_for_inference(text),
+    )
+
+
+def load_backend(
+    name: str,
+    quantize: bool,
+    load_model: Callable[[], torch.nn.Module],
+    device: torch.device,
+) -> ClipBackend:
+    """
+    Build the named backend.
+
+    load_model returns the HuggingFace CLIPModel; it is only called when
+    needed (always for eager, on first export for torchscript).
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown CLIP backend {name!r}; expected one of {BACKENDS}")
+    if name != "eager" or quantize:
+        if device.type != "cpu":
+            raise ValueError(f"CLIP backend {backend_tag(name, quantize)!r} is CPU only")
+
+    if name == "eager":
+        return eager_backend(load_model(), quantize)
+
+    path = export_dir(backend_tag(name, quantize))
+    if (path / "vision.pt").exists() and (path / "text.pt").exists():
+        print(f"Loading exported CLIP towers from {path}")
+        # Graphs are saved frozen; optimized graphs don't reload reliably
+        vision = torch.jit.optimize_for_inference(torch.jit.load(str(path / "vision.pt"), map_location=device))
+        text = torch.jit.optimize_for_inference(torch.jit.load(str(path / "text.pt"), map_location=device))
+        return ClipBackend(backend_tag(name, quantize), vision, text)
+
+    return export_torchscript(load_model(), path, quantize)
+
+
+def parity_check(reference, candidate, images: list, texts: list[str]) -> dict:
+    """
+    Compare a CrossModalBridge against an fp32 eager reference.
+
+    Returns:
+        Dict with min/mean cosine similarity of image and text embeddings
+        and the encode time of each bridge
+    """
+    report = {}
+    for kind, inputs, encode in (
+        ("image", images, lambda bridge: bridge.encode_images(inputs)),
+        ("text", texts, lambda bridge: bridge.encode_texts(inputs)),
+    ):
+        # Untimed first pass: TorchScript profiles and specializes on early calls
+        encode(reference)
+        encode(candidate)
+
+        started = time.perf_counter()
+        expected = encode(reference)
+        reference_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        actual = encode(candidate)
+        candidate_seconds = time.perf_counter() - started
+
+        # Both are L2-normalized
+        cosine = np.einsum("ij,ij->i", expected, actual)
+        report[kind] = {
+            "count": len(inputs),
+            "min_cosine": float(cosine.min()),
+            "mean_cosine": float(cosine.mean()),
+            "reference_seconds": round(reference_seconds, 3),
+            "candidate_seconds": round(candidate_seconds, 3),
+        }
+    return report
+
+
+def main():
+    """Export the configured backend and check it against fp32 eager."""
+    import argparse
+    import json
+
+    from PIL import Image
+
+    from .bridge import CrossModalBridge
+
+    parser = argparse.ArgumentParser(description="Export CLIP and check parity with fp32")
+    parser.add_argument("--backend", choices=BACKENDS, default=config.CLIP_BACKEND)
+    parser.add_argument("--quantize", action="store_true", default=config.CLIP_QUANTIZE)
+    parser.add_argument("--images", type=int, default=32, help="Synthetic images to compare")
+    parser.add_argument("--image-dir", type=Path, help="Compare on the images in this directory instead")
+    args = parser.parse_args()
+
+    reference = CrossModalBridge(backend="eager", quantize=False)
+    candidate = CrossModalBridge(backend=args.backend, quantize=args.quantize)
+    reference.load_model()
+    candidate.load_model()
+
+    if args.image_dir:
+        images = [Image.open(path).convert("RGB") for path in sorted(args.image_dir.iterdir()) if path.is_file()]
+    else:
+        rng = np.random.default_rng(0)
+        images = [
+            Image.fromarray(rng.integers(0, 256, (224, 224, 3), dtype=np.uint8))
+            for _ in range(args.images)
+        ]
+    texts = [
+        template.format(word)
+        for mood in CrossModalBridge.MOOD_PROMPTS.values()
+        for words in mood.values()
+        for word in words
+        for template in CrossModalBridge.MOOD_TEMPLATES
+    ]
+
+    report = parity_check(reference, candidate, images, texts)
+    print(json.dumps({"backend": backend_tag(args.backend, args.quantize), **report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
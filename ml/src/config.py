@@ -4,14 +4,76 @@ import os
 class Config:
     GRPC_PORT: int = int(os.getenv("PORT", os.getenv("GRPC_PORT", "50051")))
     GRPC_MAX_WORKERS: int = int(os.getenv("GRPC_MAX_WORKERS", "10"))
+    # "sync" (thread-per-RPC grpc.server) or "aio" (grpc.aio with admission control)
+    GRPC_SERVER_MODE: str = os.getenv("GRPC_SERVER_MODE", "sync")
+    # aio mode: analyses running at once; more are rejected with RESOURCE_EXHAUSTED
+    GRPC_MAX_IN_FLIGHT: int = int(os.getenv("GRPC_MAX_IN_FLIGHT", str(os.cpu_count() or 1)))
+    # Unary AnalyzeAudio carries the whole file; AnalyzeAudioStream clients
+    # only need room for one chunk, so this can be lowered once they migrate
+    GRPC_MAX_MESSAGE_MB: int = int(os.getenv("GRPC_MAX_MESSAGE_MB", "100"))
+
+    # Plain-HTTP /metrics listener for the gRPC server (0 = GetMetrics RPC only)
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
+
+    # Honor the x-evoke-profile request header/metadata (see src/profiling.py)
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "/tmp/evoke-profiles")
+    PROFILE_MAX_FILES: int = int(os.getenv("PROFILE_MAX_FILES", "50"))
+
+    # One worker per core, up to 4 by default; each holds its own audio encoder
+    ANALYSIS_POOL_WORKERS: int = int(os.getenv("ANALYSIS_POOL_WORKERS", str(min(os.cpu_count() or 1, 4))))
+
+    # HTTP inference scheduler: "thread" or "process" (uses the analysis pool)
+    INFERENCE_EXECUTOR: str = os.getenv("INFERENCE_EXECUTOR", "thread")
+    INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", "2"))
+    INFERENCE_MAX_QUEUE: int = int(os.getenv("INFERENCE_MAX_QUEUE", "32"))
+    INFERENCE_TIMEOUT: float = float(os.getenv("INFERENCE_TIMEOUT", "120"))
 
     CLIP_MODEL: str = os.getenv("CLIP_MODEL", "openai/clip-vit-base-patch32")
     EMBEDDING_DIM: int = 512
+    CLIP_BATCH_SIZE: int = int(os.getenv("CLIP_BATCH_SIZE", "32"))
+    # "eager" (HuggingFace PyTorch) or "torchscript" (exported, frozen towers)
+    CLIP_BACKEND: str = os.getenv("CLIP_BACKEND", "eager")
+    # Dynamic int8 quantization of CLIP's linear layers (CPU only)
+    CLIP_QUANTIZE: bool = os.getenv("CLIP_QUANTIZE", "false").lower() == "true"
+
+    IMAGE_DOWNLOAD_WORKERS: int = int(os.getenv("IMAGE_DOWNLOAD_WORKERS", "16"))
+    IMAGE_DECODE_WORKERS: int = int(os.getenv("IMAGE_DECODE_WORKERS", "4"))
 
     AUDIO_SAMPLE_RATE: int = 16000
     AUDIO_MAX_DURATION: int = 30
+    # soxr quality for in-process resampling: vhq, hq (librosa's default), mq, lq, qq
+    AUDIO_RESAMPLE_QUALITY: str = os.getenv("AUDIO_RESAMPLE_QUALITY", "hq")
+    # Default feature profile: "full" or "fast"; requests may override it
+    AUDIO_FEATURE_PROFILE: str = os.getenv("AUDIO_FEATURE_PROFILE", "full")
 
     MODEL_CACHE_DIR: str = os.getenv("MODEL_CACHE_DIR", "/app/models")
+    DIRECTION_CACHE_DIR: str = os.getenv(
+        "DIRECTION_CACHE_DIR", os.path.join(MODEL_CACHE_DIR, "directions")
+    )
+    CLIP_EXPORT_DIR: str = os.getenv("CLIP_EXPORT_DIR", os.path.join(MODEL_CACHE_DIR, "clip_export"))
+    NUMBA_CACHE_DIR: str = os.getenv("NUMBA_CACHE_DIR", os.path.join(MODEL_CACHE_DIR, "numba"))
+
+    # Run synthetic requests through every hot path before reporting ready
+    WARMUP: bool = os.getenv("WARMUP", "true").lower() == "true"
+    # Start serving health checks while loading; other requests get 503/UNAVAILABLE
+    # until ready. Off by default so the port only opens once the service is warm.
+    WARMUP_IN_BACKGROUND: bool = os.getenv("WARMUP_IN_BACKGROUND", "false").lower() == "true"
+
+    IMAGE_INDEX_PATH: str = os.getenv("IMAGE_INDEX_PATH", "/app/data/embeddings/images.emb")
+    SEARCH_TOP_K: int = int(os.getenv("SEARCH_TOP_K", "20"))
+    # Scan quantized codes (built by precompute --quantize) and re-rank a shortlist exactly
+    SEARCH_QUANTIZED: bool = os.getenv("SEARCH_QUANTIZED", "false").lower() == "true"
+    SEARCH_RERANK: int = int(os.getenv("SEARCH_RERANK", "200"))
+    PQ_SUBSPACES: int = int(os.getenv("PQ_SUBSPACES", "128"))
+    # Base embeddings whose corpus products are kept for slider refinement
+    REFINE_BASE_CACHE: int = int(os.getenv("REFINE_BASE_CACHE", "64"))
+
+    ANALYSIS_CACHE_ENTRIES: int = int(os.getenv("ANALYSIS_CACHE_ENTRIES", "256"))
+    ANALYSIS_CACHE_DIR: str = os.getenv(
+        "ANALYSIS_CACHE_DIR", os.path.join(MODEL_CACHE_DIR, "analysis_cache")
+    )
+    ANALYSIS_CACHE_DISK_MB: int = int(os.getenv("ANALYSIS_CACHE_DISK_MB", "0"))
 
 
 config = Config()
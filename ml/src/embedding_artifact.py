@@ -0,0 +1,240 @@
+"""
+Compact binary artifact for image embedding corpora.
+
+An artifact is two files:
+
+``<name>.emb``
+    A fixed 256-byte header followed by a contiguous little-endian
+    ``(count, dim)`` float32 or float16 matrix, starting 256-byte aligned.
+    Header layout (little-endian): magic ``EVOKEEMB``, uint32 version,
+    uint32 dim, uint32 dtype code (0 = float32, 1 = float16), uint64 count,
+    uint32 model id length, then the UTF-8 model id.
+
+``<name>.urls``
+    A 32-byte header (magic ``EVOKEURL``, uint32 version, uint32 padding,
+    uint64 count, uint64 offset of the offsets table), the concatenated
+    UTF-8 URLs, then ``count + 1`` uint64 offsets into that blob.
+
+Both files are written in a single streaming pass; counts are patched
+into the headers on close and the files are renamed into place
+atomically. Readers memory-map the matrix, so opening an artifact costs
+no parsing or copying regardless of corpus size.
+"""
+
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+EMB_MAGIC = b"EVOKEEMB"
+URL_MAGIC = b"EVOKEURL"
+FORMAT_VERSION = 1
+HEADER_SIZE = 256
+
+_EMB_HEADER = struct.Struct("<8sIIIQI")
+_URL_HEADER = struct.Struct("<8sIIQQ")
+
+DTYPES = {"float32": (0, np.dtype("<f4")), "float16": (1, np.dtype("<f2"))}
+_DTYPE_NAMES = {code: name for name, (code, _) in DTYPES.items()}
+
+PathLike = Union[str, Path]
+
+
+def url_path(path: PathLike) -> Path:
+    """Path of the URL sidecar for an artifact."""
+    return Path(path).with_suffix(".urls")
+
+
+class EmbeddingWriter:
+    """Streams embeddings and their URLs into an artifact."""
+
+    def __init__(self, path: PathLike, dim: int, model_id: str, dtype: str = "float32"):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported dtype {dtype!r}; expected one of {list(DTYPES)}")
+
+        model_bytes = model_id.encode()
+        if _EMB_HEADER.size + len(model_bytes) > HEADER_SIZE:
+            raise ValueError(f"Model id too long for artifact header: {model_id!r}")
+
+        self.path = Path(path)
+        self.dim = dim
+        self.model_id = model_id
+        self.dtype = dtype
+        self.count = 0
+
+        self._dtype_code, self._np_dtype = DTYPES[dtype]
+        self._model_bytes = model_bytes
+        self._offsets = array("Q", [0])
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._emb_tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        self._url_tmp = url_path(self.path).with_name(f"{url_path(self.path).name}.{os.getpid()}.tmp")
+        self._emb = open(self._emb_tmp, "wb")
+        self._urls = open(self._url_tmp, "wb")
+
+        # Headers are rewritten with the final counts on close
+        self._emb.write(self._emb_header())
+        self._urls.write(bytes(_URL_HEADER.size))
+
+    def append(self, url: str, embedding: np.ndarray):
+        """Append one embedding."""
+        self.append_batch([url], np.asarray(embedding).reshape(1, -1))
+
+    def append_batch(self, urls: Iterable[str], embeddings: np.ndarray):
+        """Append a (n, dim) block of embeddings with their URLs."""
+        urls = list(urls)
+        embeddings = np.ascontiguousarray(embeddings, dtype=self._np_dtype)
+        if embeddings.shape != (len(urls), self.dim):
+            raise ValueError(
+                f"Expected embeddings of shape ({len(urls)}, {self.dim}), got {embeddings.shape}"
+            )
+
+        self._emb.write(embeddings.tobytes())
+        for url in urls:
+            encoded = url.encode()
+            self._urls.write(encoded)
+            self._offsets.append(self._offsets[-1] + len(encoded))
+        self.count += len(urls)
+
+    def close(self):
+        """Finalize headers and move both files into place."""
+        if self._emb.closed:
+            return
+
+        self._emb.seek(0)
+        self._emb.write(self._emb_header())
+        self._emb.close()
+
+        offsets_pos = _URL_HEADER.size + self._offsets[-1]
+        self._urls.write(np.asarray(self._offsets, dtype="<u8").tobytes())
+        self._urls.seek(0)
+        self._urls.write(_URL_HEADER.pack(URL_MAGIC, FORMAT_VERSION, 0, self.count, offsets_pos))
+        self._urls.close()
+
+        os.replace(self._url_tmp, url_path(self.path))
+        os.replace(self._emb_tmp, self.path)
+
+    def abort(self):
+        """Discard a partially written artifact."""
+        for f, tmp in ((self._emb, self._emb_tmp), (self._urls, self._url_tmp)):
+            f.close()
+            if tmp.exists():
+                tmp.unlink()
+
+    def __enter__(self) -> "EmbeddingWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _emb_header(self) -> bytes:
+        header = _EMB_HEADER.pack(
+            EMB_MAGIC, FORMAT_VERSION, self.dim, self._dtype_code, self.count, len(self._model_bytes)
+        ) + self._model_bytes
+        return header.ljust(HEADER_SIZE, b"\0")
+
+
+class UrlTable:
+    """Lazily decoded, memory-mapped list of URLs."""
+
+    def __init__(self, path: PathLike):
+        with open(path, "rb") as f:
+            magic, version, _, count, offsets_pos = _URL_HEADER.unpack(f.read(_URL_HEADER.size))
+        if magic != URL_MAGIC:
+            raise ValueError(f"{path} is not an embedding URL table")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported URL table version {version} in {path}")
+
+        self._count = count
+        blob_size = offsets_pos - _URL_HEADER.size
+        if blob_size:
+            self._blob = np.memmap(path, dtype=np.uint8, mode="r", offset=_URL_HEADER.size, shape=(blob_size,))
+        else:
+            self._blob = np.empty(0, dtype=np.uint8)
+        self._offsets = np.memmap(path, dtype="<u8", mode="r", offset=offsets_pos, shape=(count + 1,))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+        return bytes(self._blob[start:end]).decode()
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+
+class EmbeddingArtifact:
+    """Read-only, memory-mapped view of an embedding artifact."""
+
+    def __init__(self, path: PathLike):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+
+        magic, version, dim, dtype_code, count, model_len = _EMB_HEADER.unpack_from(header)
+        if magic != EMB_MAGIC:
+            raise ValueError(f"{self.path} is not an embedding artifact")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported artifact version {version} in {self.path}")
+        if dtype_code not in _DTYPE_NAMES:
+            raise ValueError(f"Unknown dtype code {dtype_code} in {self.path}")
+
+        self.dim = dim
+        self.count = count
+        self.dtype = _DTYPE_NAMES[dtype_code]
+        self.model_id = header[_EMB_HEADER.size:_EMB_HEADER.size + model_len].decode()
+
+        np_dtype = DTYPES[self.dtype][1]
+        if count:
+            self.embeddings = np.memmap(
+                self.path, dtype=np_dtype, mode="r", offset=HEADER_SIZE, shape=(count, dim)
+            )
+        else:
+            self.embeddings = np.empty((0, dim), dtype=np_dtype)
+        self.urls = UrlTable(url_path(self.path))
+
+        if len(self.urls) != count:
+            raise ValueError(f"URL sidecar has {len(self.urls)} entries, expected {count}")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def as_float32(self) -> np.ndarray:
+        """The matrix as float32; zero-copy for float32 artifacts."""
+        if self.dtype == "float32":
+            return self.embeddings
+        return np.asarray(self.embeddings, dtype=np.float32)
+
+
+def write_artifact(
+    path: PathLike,
+    urls: Iterable[str],
+    embeddings: np.ndarray,
+    model_id: str,
+    dtype: str = "float32",
+    chunk_size: int = 4096,
+):
+    """Write a whole (N, dim) matrix as an artifact."""
+    urls = list(urls)
+    with EmbeddingWriter(path, embeddings.shape[1], model_id, dtype) as writer:
+        for start in range(0, len(urls), chunk_size):
+            writer.append_batch(urls[start:start + chunk_size], embeddings[start:start + chunk_size])
+
+
+def open_artifact(path: PathLike) -> Optional[EmbeddingArtifact]:
+    """Open an artifact, or return None if it does not exist."""
+    if not Path(path).exists():
+        return None
+    return EmbeddingArtifact(path)
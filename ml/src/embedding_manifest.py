@@ -0,0 +1,161 @@
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Iterable, Tuple
+
+import numpy as np
+
+from .config import config
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+
+Key = Tuple[str, str]
+
+
+class EmbeddingManifest:
+    """
+    Persistent record of image embeddings for incremental index builds.
+
+    Entries are keyed by (CLIP model id, URL) and hold either an embedding
+    or the reason the image failed. A build only needs to process URLs
+    without a successful entry for the current model, and checkpointing
+    after each chunk lets an interrupted build resume where it stopped.
+
+    Stored as a base .npz (embedding matrix + JSON index) plus a directory
+    of checkpoint shards in the same format next to it. checkpoint()
+    appends only the entries recorded since the last write as a new
+    shard, so a run's checkpoints cost O(N) in total; save() compacts
+    everything into a new base and removes the shards. Every file is
+    written atomically, and load() replays the shards over the base.
+    """
+
+    def __init__(self, path: Path, model_id: str):
+        self.path = Path(path)
+        self.model_id = model_id
+        self._embeddings: dict[Key, np.ndarray] = {}
+        self._failures: dict[Key, str] = {}
+        # Keys recorded since the last write, in recording order
+        self._unsaved: dict[Key, None] = {}
+        self._shard_count = 0
+
+    @classmethod
+    def load(cls, path: Path, model_id: str) -> "EmbeddingManifest":
+        """Load an existing manifest and its checkpoints, or start an empty one."""
+        manifest = cls(path, model_id)
+        if manifest.path.exists():
+            manifest._apply(manifest.path)
+        for shard in manifest._shard_paths():
+            manifest._apply(shard)
+            manifest._shard_count += 1
+        return manifest
+
+    @property
+    def shard_dir(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.shards")
+
+    def __len__(self) -> int:
+        return len(self._embeddings) + len(self._failures)
+
+    def retain(self, urls: Iterable[str]) -> int:
+        """Drop entries for URLs no longer in the corpus; returns how many."""
+        keep = set(urls)
+        removed = 0
+        for entries in (self._embeddings, self._failures):
+            for key in [key for key in entries if key[1] not in keep]:
+                del entries[key]
+                self._unsaved.pop(key, None)
+                removed += 1
+        return removed
+
+    def pending(self, urls: Iterable[str]) -> list[str]:
+        """URLs that are new or previously failed for the current model."""
+        return [url for url in urls if (self.model_id, url) not in self._embeddings]
+
+    def record(self, urls: Iterable[str], embeddings: np.ndarray):
+        """Store successful embeddings for the current model."""
+        for url, embedding in zip(urls, embeddings):
+            key = (self.model_id, url)
+            self._embeddings[key] = np.asarray(embedding, dtype=np.float32)
+            self._failures.pop(key, None)
+            self._unsaved[key] = None
+
+    def record_failures(self, failures: Iterable[Tuple[str, str]]):
+        """Mark URLs as failed so the next build retries them."""
+        for url, error in failures:
+            key = (self.model_id, url)
+            self._failures[key] = error
+            self._unsaved[key] = None
+
+    def embeddings(self, urls: Iterable[str]) -> Tuple[list[str], np.ndarray]:
+        """Embeddings for the given URLs (current model), in input order, skipping missing ones."""
+        valid_urls = [url for url in urls if (self.model_id, url) in self._embeddings]
+        matrix = np.empty((len(valid_urls), config.EMBEDDING_DIM), dtype=np.float32)
+        for row, url in enumerate(valid_urls):
+            matrix[row] = self._embeddings[(self.model_id, url)]
+        return valid_urls, matrix
+
+    def failures(self) -> list[Tuple[str, str]]:
+        """(url, error) for URLs that failed under the current model."""
+        return [(url, error) for (model, url), error in self._failures.items() if model == self.model_id]
+
+    def checkpoint(self):
+        """Append the entries recorded since the last write as a new shard."""
+        if not self._unsaved:
+            return
+        self._write(self.shard_dir / f"{self._shard_count:06d}.npz", list(self._unsaved))
+        self._shard_count += 1
+        self._unsaved.clear()
+
+    def save(self):
+        """
+        Compact the manifest into a new base file and remove its shards.
+
+        Entries of other CLIP models are dropped; a build never reads them.
+        """
+        for entries in (self._embeddings, self._failures):
+            for key in [key for key in entries if key[0] != self.model_id]:
+                del entries[key]
+
+        self._write(self.path, list(dict.fromkeys([*self._embeddings, *self._failures])))
+        shutil.rmtree(self.shard_dir, ignore_errors=True)
+        self._shard_count = 0
+        self._unsaved.clear()
+
+    def _shard_paths(self) -> list[Path]:
+        if not self.shard_dir.is_dir():
+            return []
+        return sorted(self.shard_dir.glob("*.npz"))
+
+    def _apply(self, path: Path):
+        """Merge the entries of a base or shard file, later files winning."""
+        with np.load(path) as data:
+            matrix = data["embeddings"]
+            index = json.loads(str(data["index"]))
+
+        for entry in index:
+            key = (entry["model"], entry["url"])
+            if entry["status"] == STATUS_OK:
+                self._embeddings[key] = matrix[entry["row"]]
+                self._failures.pop(key, None)
+            else:
+                self._failures[key] = entry.get("error", "")
+
+    def _write(self, path: Path, keys: list[Key]):
+        """Atomically write the entries for keys in the manifest file format."""
+        ok_keys = [key for key in keys if key in self._embeddings]
+        matrix = np.empty((len(ok_keys), config.EMBEDDING_DIM), dtype=np.float32)
+        index = []
+        for row, key in enumerate(ok_keys):
+            matrix[row] = self._embeddings[key]
+            index.append({"model": key[0], "url": key[1], "status": STATUS_OK, "row": row})
+        for key in keys:
+            if key in self._failures:
+                index.append({"model": key[0], "url": key[1], "status": STATUS_FAILED, "error": self._failures[key]})
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, embeddings=matrix, index=np.array(json.dumps(index)))
+        os.replace(tmp_path, path)
@@ -1,47 +1,440 @@
-from typing import Optional
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
 
-from fastapi import FastAPI, File, UploadFile
+import numpy as np
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel
+from starlette.routing import Match
 
+from src import metrics
+from src.analysis_cache import AnalysisCache
 from src.audio_encoder import AudioEncoder
 from src.bridge import CrossModalBridge
+from src.cancellation import Deadline, RequestCancelled
+from src.config import config
+from src.profiling import PROFILE_HEADER, PROFILE_ID_HEADER, ProfileStore, requested as profile_requested
+from src.scheduler import InferenceScheduler, SchedulerFullError, SchedulerTimeoutError
+from src.refine_search import RefineSearch
+from src.search import SearchIndex, check_embedding, check_top_k, load_index
+from src.warmup import StartupState, configure_numba_cache, warm_up
+from src.worker_pool import AnalysisPool, project_result
 
 app = FastAPI()
 
 audio_encoder: Optional[AudioEncoder] = None
 bridge: Optional[CrossModalBridge] = None
+analysis_pool = AnalysisPool()
+analysis_cache: Optional[AnalysisCache] = None
+scheduler: Optional[InferenceScheduler] = None
+inference_executor: Optional[ThreadPoolExecutor] = None
+submit_encode: Optional[Callable] = None
+search_index: Optional[SearchIndex] = None
+refine_search: Optional[RefineSearch] = None
+startup_state = StartupState()
+profiles = ProfileStore()
+# Profiled requests run one at a time so they don't skew each other
+profile_executor: Optional[ThreadPoolExecutor] = None
 
 
 @app.on_event("startup")
 async def startup():
-    global audio_encoder, bridge
-    print("Loading models...")
-    audio_encoder = AudioEncoder()
-    audio_encoder.load_model()
-    bridge = CrossModalBridge()
-    bridge.load_model()
-    print("Models loaded successfully")
+    if config.WARMUP_IN_BACKGROUND:
+        # Serve /health/live right away; /health/ready flips once warm
+        asyncio.get_running_loop().run_in_executor(None, _start_up)
+    else:
+        _start_up()
 
 
-@app.post("/analyze")
-async def analyze(audio: UploadFile = File(...)):
-    if audio_encoder is None or bridge is None:
-        raise RuntimeError("Models not loaded")
+def _start_up():
+    global audio_encoder, bridge, analysis_cache, scheduler, inference_executor, submit_encode
+    global search_index, refine_search
+    try:
+        configure_numba_cache()
+
+        with startup_state.phase("load_models"):
+            audio_encoder = AudioEncoder()
+            audio_encoder.load_model()
+            bridge = CrossModalBridge()
+            bridge.load_model()
+            analysis_cache = AnalysisCache()
+            metrics.REGISTRY.add_collector("analysis_cache", metrics.cache_collector(analysis_cache))
+
+        with startup_state.phase("directions"):
+            bridge.load_direction_vectors()
+
+        with startup_state.phase("load_index"):
+            search_index = load_index()
+            if search_index is not None:
+                exact_index = getattr(search_index, "exact", search_index)
+                refine_search = RefineSearch(exact_index, bridge)
+
+        # /analyze/batch always fans out over the pool, and so does every
+        # analysis with the process executor
+        with startup_state.phase("analysis_pool"):
+            analysis_pool.warm_up()
+
+        # Inference runs off the event loop so /health stays responsive
+        if config.INFERENCE_EXECUTOR == "process":
+            submit_encode = _submit_to_pool
+            scheduler = InferenceScheduler(max_concurrency=analysis_pool.max_workers)
+        else:
+            inference_executor = ThreadPoolExecutor(max_workers=config.INFERENCE_WORKERS)
+            submit_encode = _submit_to_threads
+            scheduler = InferenceScheduler(max_concurrency=config.INFERENCE_WORKERS)
+        metrics.REGISTRY.add_collector("scheduler", metrics.scheduler_collector(scheduler))
+
+        if config.WARMUP:
+            warm_up(audio_encoder, bridge, startup_state, search_index, refine_search)
+    except Exception as e:
+        startup_state.mark_failed(e)
+        raise
+
+    startup_state.mark_ready()
+
+
+def _submit_to_pool(
+    audio_data: bytes,
+    audio_format: str,
+    profile: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+) -> Future:
+    # Worker processes can't see the request's Deadline, so
+    # cancellation only applies to the thread executor
+    return analysis_pool.submit_encode(audio_data, audio_format, profile)
+
+
+def _submit_to_threads(
+    audio_data: bytes,
+    audio_format: str,
+    profile: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+) -> Future:
+    return inference_executor.submit(_encode, audio_data, audio_format, profile, deadline)
+
+
+def _encode(
+    audio_data: bytes,
+    audio_format: str,
+    profile: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+):
+    """AudioEncoder.encode with its stage timings, matching AnalysisPool.submit_encode."""
+    timings = {}
+    embedding, mood = audio_encoder.encode(audio_data, audio_format, timings, profile, deadline)
+    return embedding, mood, timings
+
+
+def _require_ready():
+    if not startup_state.ready:
+        raise HTTPException(status_code=503, detail="Service is starting up", headers={"Retry-After": "5"})
+
+
+def _route_path(request: Request) -> str:
+    """Route template for a request, so path parameters don't split series."""
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
 
-    audio_data = await audio.read()
-    audio_format = audio.filename.rsplit(".", 1)[-1] if audio.filename and "." in audio.filename else "wav"
 
-    embedding, mood = audio_encoder.encode(audio_data, audio_format)
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Latency, in-flight and status counts per route."""
+    timer = metrics.RequestTimer("http", _route_path(request))
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        timer.finish(status)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    analysis_pool.shutdown()
+    for executor in (inference_executor, profile_executor):
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _audio_format(audio: UploadFile) -> str:
+    return audio.filename.rsplit(".", 1)[-1] if audio.filename and "." in audio.filename else "wav"
+
+
+def _encoder_version(profile: Optional[str]) -> str:
+    """Cache version for a feature profile; unknown profiles are a 400."""
+    try:
+        return audio_encoder.version_for(profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _profiling(request: Request) -> bool:
+    """Whether this request opted into profiling (and the server allows it)."""
+    return config.PROFILING_ENABLED and profile_requested(request.headers.get(PROFILE_HEADER))
+
+
+def _analyze_profiled(audio_data: bytes, audio_format: str, profile: Optional[str]):
+    """Encode and project in the calling thread, for the profiler to see both."""
+    timings = {}
+    embedding, mood = audio_encoder.encode(audio_data, audio_format, timings, profile)
     clip_embedding = bridge.project_to_clip_space(embedding)
+    return clip_embedding, mood, timings
+
+
+def _submit_profiled(audio_data: bytes, audio_format: str, profile: Optional[str], label: str):
+    global profile_executor
+    if profile_executor is None:
+        profile_executor = ThreadPoolExecutor(max_workers=1)
+    return profile_executor.submit(profiles.capture, label, _analyze_profiled, audio_data, audio_format, profile)
+
+
+async def _cancel_on_disconnect(request: Request, deadline: Deadline):
+    """
+    Cancel the deadline once the client hangs up.
+
+    The upload has been read by now, so the next ASGI message is the
+    disconnect. (Request.is_disconnected() can't see it through the
+    metrics middleware, which drops messages on a cancelled receive.)
+    """
+    message = await request.receive()
+    if message["type"] == "http.disconnect":
+        deadline.cancel()
+
+
+async def _analyze_upload(
+    audio: UploadFile,
+    profile: Optional[str] = None,
+    profile_into: Optional[Response] = None,
+    request: Optional[Request] = None,
+    allow_degraded: bool = False,
+):
+    """
+    Encode an uploaded clip off the event loop and project it to CLIP space.
+
+    With profile_into, the analysis bypasses the cache and runs under the
+    profiler, labelled with request's route; the profile ID is set as a
+    header on that response.
+    Otherwise the encode stops between stages once the client (request)
+    disconnects or INFERENCE_TIMEOUT passes; see src/cancellation.py.
+
+    Returns:
+        Tuple of (clip_embedding, mood, degraded)
+    """
+    _require_ready()
+    version = _encoder_version(profile)
+
+    audio_data = await audio.read()
+    audio_format = _audio_format(audio)
+
+    if profile_into is not None:
+        try:
+            (clip_embedding, mood, timings), profile_id = await scheduler.run(
+                _submit_profiled, audio_data, audio_format, profile, _route_path(request)
+            )
+        except SchedulerFullError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except SchedulerTimeoutError as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        metrics.observe_stages(timings)
+        profile_into.headers[PROFILE_ID_HEADER] = profile_id
+        return clip_embedding, mood, False
+
+    # The scheduler gives up after INFERENCE_TIMEOUT, so the pipeline may too
+    deadline = Deadline(scheduler.timeout, allow_degraded=allow_degraded)
+    watcher = asyncio.create_task(_cancel_on_disconnect(request, deadline)) if request is not None else None
+    try:
+        # Cache hits are answered inline without queueing
+        cache_key = analysis_cache.key(audio_data, audio_format, version)
+        cached = analysis_cache.get(cache_key)
+        if cached is not None:
+            embedding, mood = cached
+        else:
+            try:
+                embedding, mood, timings = await scheduler.run(
+                    submit_encode, audio_data, audio_format, profile, deadline
+                )
+            except SchedulerFullError as e:
+                raise HTTPException(status_code=503, detail=str(e))
+            except SchedulerTimeoutError as e:
+                raise HTTPException(status_code=504, detail=str(e))
+            metrics.observe_stages(timings)
+            if not deadline.degraded:
+                analysis_cache.put(cache_key, embedding, mood)
+
+        deadline.checkpoint("project")
+        with metrics.stage("project"):
+            clip_embedding = bridge.project_to_clip_space(embedding)
+        deadline.finish()
+    except RequestCancelled as e:
+        # 499: client closed the request (nginx's convention)
+        raise HTTPException(status_code=504 if e.reason == "deadline" else 499, detail=str(e))
+    finally:
+        # Stops work the scheduler abandoned on timeout, and the watcher
+        deadline.cancel()
+        if watcher is not None:
+            watcher.cancel()
+    return clip_embedding, mood, bool(deadline.degraded)
+
 
+def _analysis_response(clip_embedding: np.ndarray, mood: dict, degraded: bool = False) -> dict:
     return {
         "embedding": clip_embedding.tolist(),
         "mood_energy": float(mood["energy"]),
         "mood_valence": float(mood["valence"]),
         "mood_tempo": float(mood["tempo"]),
         "mood_texture": float(mood["texture"]),
+        "degraded": degraded,
     }
 
 
+def _require_index():
+    _require_ready()
+    if search_index is None:
+        raise HTTPException(status_code=503, detail="No image index loaded")
+
+
+def _top_k(top_k: Optional[int]) -> int:
+    """Validated result count; a negative top_k is a 400."""
+    try:
+        return check_top_k(top_k)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _search(embedding: np.ndarray, top_k: int) -> list[dict]:
+    _require_index()
+    # BLAS releases the GIL, so large corpora don't stall the event loop
+    with metrics.stage("search"):
+        return await asyncio.to_thread(search_index.results, embedding, top_k)
+
+
+@app.post("/analyze")
+async def analyze(
+    request: Request,
+    response: Response,
+    audio: UploadFile = File(...),
+    profile: Optional[str] = None,
+    allow_degraded: bool = False,
+):
+    profile_into = response if _profiling(request) else None
+    clip_embedding, mood, degraded = await _analyze_upload(audio, profile, profile_into, request, allow_degraded)
+    return _analysis_response(clip_embedding, mood, degraded)
+
+
+@app.post("/analyze/search")
+async def analyze_and_search(
+    request: Request,
+    response: Response,
+    audio: UploadFile = File(...),
+    top_k: Optional[int] = None,
+    profile: Optional[str] = None,
+    allow_degraded: bool = False,
+):
+    top_k = _top_k(top_k)
+    profile_into = response if _profiling(request) else None
+    clip_embedding, mood, degraded = await _analyze_upload(audio, profile, profile_into, request, allow_degraded)
+    result = _analysis_response(clip_embedding, mood, degraded)
+    result["images"] = await _search(clip_embedding, top_k)
+    return result
+
+
+class SearchRequest(BaseModel):
+    embedding: list[float]
+    top_k: Optional[int] = None
+
+
+@app.post("/search")
+async def search(request: SearchRequest):
+    _require_index()
+    top_k = _top_k(request.top_k)
+    try:
+        embedding = check_embedding(request.embedding, search_index.dim)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"images": await _search(embedding, top_k)}
+
+
+@app.post("/analyze/batch")
+async def analyze_batch(audio: list[UploadFile] = File(...), profile: Optional[str] = None):
+    _require_ready()
+    _encoder_version(profile)
+    clips = [(await clip.read(), _audio_format(clip)) for clip in audio]
+
+    # The batch fans out over the process pool as one scheduler job, so it
+    # is admitted (or turned away) as a whole rather than per clip
+    try:
+        outcomes = await scheduler.run(
+            analysis_pool.submit_batch, clips, profile, analysis_cache, audio_encoder.version_for
+        )
+    except SchedulerFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except SchedulerTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+    results = []
+    for outcome in outcomes:
+        clip_embedding, mood, error = project_result(outcome, bridge.project_to_clip_space)
+        if error is not None:
+            results.append({"error": error})
+            continue
+
+        results.append(_analysis_response(clip_embedding, mood))
+
+    return {"results": results}
+
+
 @app.get("/health")
 async def health():
-    return {"healthy": True, "message": "ML service is running"}
+    return {"healthy": True, "ready": startup_state.ready, "message": "ML service is running"}
+
+
+@app.get("/health/live")
+async def health_live():
+    if not startup_state.live:
+        return JSONResponse(status_code=503, content=startup_state.report())
+    return {"live": startup_state.live}
+
+
+@app.get("/health/ready")
+async def health_ready():
+    report = startup_state.report()
+    if not startup_state.ready:
+        return JSONResponse(status_code=503, content=report)
+    return report
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: str = "txt"):
+    """A stored request profile: the text summary, or the raw pstats dump with format=prof."""
+    if not config.PROFILING_ENABLED or format not in ("txt", "prof"):
+        raise HTTPException(status_code=404, detail="Not found")
+    path = profiles.path(profile_id, f".{format}")
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"No profile {profile_id}")
+    if format == "prof":
+        return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+    return PlainTextResponse(path.read_text())
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    if analysis_cache is None:
+        raise RuntimeError("Models not loaded")
+    return analysis_cache.stats()
+
+
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    if scheduler is None:
+        raise RuntimeError("Models not loaded")
+    return scheduler.stats()
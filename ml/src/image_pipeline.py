@@ -0,0 +1,156 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .bridge import CrossModalBridge
+from .config import config
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def make_session(pool_size: int, retries: int, backoff: float) -> requests.Session:
+    """HTTP session with a connection pool sized for pool_size workers and retry/backoff."""
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=("GET",),
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class ImagePipeline:
+    """
+    Download -> decode -> CLIP encode pipeline for building image indexes.
+
+    Downloads run on a bounded pool sharing one keep-alive session, decoding
+    runs on its own worker threads, and the calling thread batches decoded
+    images into CrossModalBridge.encode_images. The stages overlap, so CLIP
+    stays busy while the next images are in flight. At most max_pending
+    images are held in memory at once.
+    """
+
+    def __init__(
+        self,
+        bridge: CrossModalBridge,
+        download_workers: Optional[int] = None,
+        decode_workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 30,
+        session: Optional[requests.Session] = None,
+    ):
+        self.bridge = bridge
+        self.download_workers = download_workers or config.IMAGE_DOWNLOAD_WORKERS
+        self.decode_workers = decode_workers or config.IMAGE_DECODE_WORKERS
+        self.batch_size = batch_size or config.CLIP_BATCH_SIZE
+        self.timeout = timeout
+        self.max_pending = max(self.batch_size * 2, self.download_workers)
+        self.session = session or make_session(self.download_workers, retries, backoff)
+
+    def run(
+        self,
+        urls: Iterable[str],
+    ) -> Tuple[list[str], np.ndarray, list[Tuple[str, str]]]:
+        """
+        Download, decode and embed every URL.
+
+        Returns:
+            Tuple of (urls, embeddings, failures). urls and the rows of the
+            (N, embedding_dim) embeddings keep input order; failures lists
+            (url, reason) for images that could not be processed.
+        """
+        urls = list(urls)
+        total = len(urls)
+        decoded: queue.Queue = queue.Queue()
+        pending = threading.BoundedSemaphore(self.max_pending)
+
+        embeddings: dict[int, np.ndarray] = {}
+        failures: dict[int, str] = {}
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(self.download_workers, thread_name_prefix="download") as downloads, \
+                ThreadPoolExecutor(self.decode_workers, thread_name_prefix="decode") as decodes:
+
+            def decode(index: int, content: bytes):
+                try:
+                    decoded.put((index, Image.open(BytesIO(content)).convert("RGB"), None))
+                except Exception as e:
+                    decoded.put((index, None, f"decode failed: {e}"))
+
+            def download(index: int):
+                try:
+                    response = self.session.get(urls[index], timeout=self.timeout)
+                    response.raise_for_status()
+                except Exception as e:
+                    # Anything uncaught here would leave run() waiting forever
+                    decoded.put((index, None, f"download failed: {e}"))
+                    return
+                decodes.submit(decode, index, response.content)
+
+            def feed():
+                for index in range(total):
+                    pending.acquire()
+                    downloads.submit(download, index)
+
+            threading.Thread(target=feed, daemon=True).start()
+
+            batch: list[Tuple[int, Image.Image]] = []
+            for done in range(1, total + 1):
+                index, image, error = decoded.get()
+                if error is not None:
+                    print(f"  Failed {urls[index][:60]}: {error}")
+                    failures[index] = error
+                    pending.release()
+                else:
+                    batch.append((index, image))
+
+                if len(batch) >= self.batch_size or (done == total and batch):
+                    self._encode_batch(batch, embeddings, failures)
+                    for _ in batch:
+                        pending.release()
+                    batch = []
+                    elapsed = time.perf_counter() - started
+                    print(f"  [{done}/{total}] {len(embeddings)} embedded ({done / elapsed:.1f} img/s)")
+
+        order = sorted(embeddings)
+        matrix = np.empty((len(order), self.bridge.embedding_dim), dtype=np.float32)
+        for row, index in enumerate(order):
+            matrix[row] = embeddings[index]
+
+        return (
+            [urls[i] for i in order],
+            matrix,
+            [(urls[i], failures[i]) for i in sorted(failures)],
+        )
+
+    def _encode_batch(
+        self,
+        batch: list[Tuple[int, Image.Image]],
+        embeddings: dict[int, np.ndarray],
+        failures: dict[int, str],
+    ):
+        try:
+            batch_embeddings = self.bridge.encode_images([image for _, image in batch])
+        except Exception as e:
+            for index, _ in batch:
+                failures[index] = f"encode failed: {e}"
+            return
+
+        for (index, _), embedding in zip(batch, batch_embeddings):
+            embeddings[index] = embedding
@@ -0,0 +1,359 @@
+"""
+Latency and throughput metrics in the Prometheus text exposition format.
+
+Both services record:
+
+- ``evoke_stage_seconds{stage}``: time per pipeline stage (queue,
+  decode, resample, features, embedding, mood, project, search, refine,
+  refine_search, stream_finish)
+- ``evoke_request_seconds{transport,method}``: end-to-end time per RPC
+  or HTTP route
+- ``evoke_requests_total{transport,method,status}``: completed requests
+  by status code, so error rates fall out of the same series
+- ``evoke_requests_in_flight{transport,method}``: requests being served
+- ``evoke_cancelled_total{stage,reason}`` and
+  ``evoke_cancellation_cpu_saved_seconds_total{reason}``: analyses
+  stopped early by src/cancellation.py and the CPU that saved
+
+plus gauges and counters read from the scheduler, admission control
+and analysis cache at scrape time. The HTTP server exposes them on
+``/metrics``; the gRPC server answers the GetMetrics RPC and, with
+METRICS_PORT set, serves the same text over plain HTTP for scrapers.
+
+Recording a sample is a lock, a bisect and two additions. A fully
+instrumented analyze request records under 10us of metrics, against
+~100ms of feature extraction (~1ms on a cache hit).
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans a cache hit to a cold five-minute decode
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """The child series for one combination of label values."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self, values: tuple, child) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in sorted(children):
+            lines.extend(self._samples(values, child))
+        return lines
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. requests by status."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def _samples(self, values, child):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. requests in flight."""
+
+    kind = "gauge"
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def _samples(self, values, child):
+        with child._lock:
+            counts = list(child.counts)
+            total = child.sum
+
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+# A collector returns (name, kind, documentation, [(labels, value), ...]) tuples
+Collector = Callable[[], Iterable[tuple]]
+
+
+class Registry:
+    """Metrics owned by this process plus collectors polled at scrape time."""
+
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._collectors: dict[str, Collector] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, name: str, collector: Collector):
+        """Register (or replace) a scrape-time source of gauges and counters."""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors.values())
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    names = tuple(labels)
+                    values = tuple(labels[label] for label in names)
+                    lines.append(f"{name}{_format_labels(names, values)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "evoke_stage_seconds", "Time spent in each pipeline stage.", ("stage",),
+))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "evoke_request_seconds", "End-to-end request latency.", ("transport", "method"),
+))
+REQUESTS_TOTAL = REGISTRY.register(Counter(
+    "evoke_requests_total", "Completed requests by status.", ("transport", "method", "status"),
+))
+REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "evoke_requests_in_flight", "Requests currently being served.", ("transport", "method"),
+))
+CANCELLED_TOTAL = REGISTRY.register(Counter(
+    "evoke_cancelled_total", "Analyses stopped at a stage boundary, by reason.", ("stage", "reason"),
+))
+CPU_SAVED_SECONDS_TOTAL = REGISTRY.register(Counter(
+    "evoke_cancellation_cpu_saved_seconds_total",
+    "Estimated CPU seconds not spent on cancelled, expired or degraded work.", ("reason",),
+))
+DEGRADED_STEPS_TOTAL = REGISTRY.register(Counter(
+    "evoke_degraded_steps_total", "Optional steps replaced by a cheaper estimate to meet a deadline.", ("step",),
+))
+
+# Keys of AudioEncoder.encode timings that are stage durations
+TIMED_STAGES = ("decode", "resample", "features", "embedding", "mood", "project")
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+def observe_stages(timings: Optional[dict]):
+    """Record the stage durations in a timings dict filled by the pipeline."""
+    if not timings:
+        return
+    for stage in TIMED_STAGES:
+        seconds = timings.get(stage)
+        if seconds is not None:
+            STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as one pipeline stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(name).observe(time.perf_counter() - started)
+
+
+class RequestTimer:
+    """Tracks one request: in-flight while open, then latency and status."""
+
+    __slots__ = ("transport", "method", "_started")
+
+    def __init__(self, transport: str, method: str):
+        self.transport = transport
+        self.method = method
+        REQUESTS_IN_FLIGHT.labels(transport, method).inc()
+        self._started = time.perf_counter()
+
+    def finish(self, status: str):
+        elapsed = time.perf_counter() - self._started
+        REQUESTS_IN_FLIGHT.labels(self.transport, self.method).dec()
+        REQUEST_SECONDS.labels(self.transport, self.method).observe(elapsed)
+        REQUESTS_TOTAL.labels(self.transport, self.method, status).inc()
+
+
+def cache_collector(analysis_cache) -> Collector:
+    """Expose AnalysisCache counters and size."""
+    def collect():
+        stats = analysis_cache.stats()
+        return [
+            ("evoke_analysis_cache_lookups_total", "counter", "Analysis cache lookups by result.", [
+                ({"result": "memory_hit"}, stats["memory_hits"]),
+                ({"result": "disk_hit"}, stats["disk_hits"]),
+                ({"result": "miss"}, stats["misses"]),
+            ]),
+            ("evoke_analysis_cache_entries", "gauge", "Entries held by the analysis cache.", [
+                ({"tier": "memory"}, stats["memory_entries"]),
+                ({"tier": "disk"}, stats["disk_entries"]),
+            ]),
+            ("evoke_analysis_cache_evictions_total", "counter", "Analysis cache evictions.", [
+                ({"tier": "memory"}, stats["memory_evictions"]),
+                ({"tier": "disk"}, stats["disk_evictions"]),
+            ]),
+        ]
+    return collect
+
+
+def scheduler_collector(scheduler) -> Collector:
+    """Expose InferenceScheduler queue gauges and outcome counters."""
+    def collect():
+        stats = scheduler.stats()
+        return [
+            ("evoke_scheduler_queue_depth", "gauge", "Requests waiting for an inference slot.", [
+                ({}, stats["queue_depth"]),
+            ]),
+            ("evoke_scheduler_in_flight", "gauge", "Inference jobs running on the executor.", [
+                ({}, stats["in_flight"]),
+            ]),
+            ("evoke_scheduler_jobs_total", "counter", "Scheduled inference jobs by outcome.", [
+                ({"outcome": outcome}, stats[outcome])
+                for outcome in ("completed", "failed", "rejected", "timeouts")
+            ]),
+        ]
+    return collect
+
+
+def admission_collector(admission) -> Collector:
+    """Expose AdmissionControl load and outcome counters."""
+    def collect():
+        stats = admission.stats()
+        return [
+            ("evoke_admission_in_flight", "gauge", "Admitted analyses still running.", [
+                ({}, stats["in_flight"]),
+            ]),
+            ("evoke_admission_limit", "gauge", "Analyses admitted before shedding load.", [
+                ({}, stats["limit"]),
+            ]),
+            ("evoke_admission_total", "counter", "Admission decisions by outcome.", [
+                ({"outcome": "admitted"}, stats["admitted"]),
+                ({"outcome": "rejected"}, stats["rejected"]),
+            ]),
+        ]
+    return collect
+
+
+def render() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,108 @@
+"""
+Opt-in profiling of single requests.
+
+With PROFILING_ENABLED set, a request carrying the ``x-evoke-profile``
+header (HTTP) or metadata key (gRPC) is run under cProfile, bypassing
+the analysis cache. The profile is written to PROFILE_DIR as
+``<id>.prof`` (load with ``pstats`` or snakeviz) plus a ``<id>.txt``
+summary of the hottest functions. The ID is returned in the
+``x-evoke-profile-id`` response header or trailing metadata. Only the
+newest PROFILE_MAX_FILES profiles are kept.
+
+Requests without the header only pay for the flag check.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from .config import config
+
+PROFILE_HEADER = "x-evoke-profile"
+PROFILE_ID_HEADER = "x-evoke-profile-id"
+
+# Functions listed in the text summary
+SUMMARY_LINES = 40
+
+_PROFILE_ID = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+
+
+def requested(value: Optional[str]) -> bool:
+    """Whether a header or metadata value opts the request into profiling."""
+    return bool(value) and value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class ProfileStore:
+    """Bounded directory of request profiles, oldest removed first."""
+
+    def __init__(self, directory: Optional[str] = None, max_profiles: Optional[int] = None):
+        self.directory = Path(directory or config.PROFILE_DIR)
+        self.max_profiles = config.PROFILE_MAX_FILES if max_profiles is None else max_profiles
+        self._lock = threading.Lock()
+
+    def capture(self, label: str, fn: Callable, *args, **kwargs) -> Tuple[object, str]:
+        """
+        Run fn(*args, **kwargs) under cProfile and save the profile.
+
+        Exceptions from fn propagate after the profile is saved.
+
+        Returns:
+            Tuple of (fn's result, profile ID)
+        """
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        profiler = cProfile.Profile()
+        error = None
+
+        started = time.perf_counter()
+        try:
+            return profiler.runcall(fn, *args, **kwargs), profile_id
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self._save(profile_id, profiler, label, elapsed, error)
+
+    def path(self, profile_id: str, suffix: str = ".prof") -> Optional[Path]:
+        """Path of a stored profile, or None for unknown or malformed IDs."""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}{suffix}"
+        return path if path.exists() else None
+
+    def _save(self, profile_id: str, profiler: cProfile.Profile, label: str, elapsed: float, error):
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        summary = io.StringIO()
+        summary.write(f"profile {profile_id}\nrequest {label}\nwall {elapsed * 1000:.1f}ms\n")
+        if error is not None:
+            summary.write(f"error {type(error).__name__}: {error}\n")
+        summary.write("\n")
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(SUMMARY_LINES)
+
+        # Atomic writes so a concurrent reader never sees half a profile
+        for suffix, write in (
+            (".prof", lambda path: pstats.Stats(profiler).dump_stats(path)),
+            (".txt", lambda path: Path(path).write_text(summary.getvalue())),
+        ):
+            path = self.directory / f"{profile_id}{suffix}"
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            write(tmp_path)
+            os.replace(tmp_path, path)
+
+        print(f"Saved profile {profile_id} ({label}, {elapsed * 1000:.1f}ms)")
+        self._rotate()
+
+    def _rotate(self):
+        with self._lock:
+            profiles = sorted(self.directory.glob("*.prof"), key=lambda path: path.stat().st_mtime)
+            for path in profiles[:max(len(profiles) - self.max_profiles, 0)]:
+                path.unlink(missing_ok=True)
+                path.with_suffix(".txt").unlink(missing_ok=True)
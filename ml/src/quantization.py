@@ -0,0 +1,383 @@
+"""
+Compressed image embeddings for approximate search with exact re-ranking.
+
+Two codecs are supported:
+
+``sq8``
+    Per-dimension scalar quantization to uint8 (4x smaller than float32).
+    Each dimension is mapped linearly from its training [min, max] range
+    onto 0..255.
+
+``pq``
+    Product quantization: the vector is split into ``subspaces`` equal
+    chunks and each chunk is replaced by the index of its nearest
+    centroid in a 256-entry codebook trained with k-means (one byte per
+    subspace, e.g. 16x smaller for 512 dims and 128 subspaces).
+
+QuantizedIndex scans the codes to build a shortlist and re-ranks only
+that shortlist exactly against the float32 artifact, which stays
+memory-mapped on disk; the resident corpus is just the codes.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .config import config
+from .search import SearchIndex
+
+CODECS = ("sq8", "pq")
+
+# Corpus rows decoded per step of the approximate scan
+_SCAN_BLOCK = 16384
+
+PathLike = Union[str, Path]
+
+
+def quantized_path(path: PathLike) -> Path:
+    """Path of the quantized codes stored next to an artifact."""
+    return Path(path).with_suffix(".quant.npz")
+
+
+def corpus_fingerprint(embeddings: np.ndarray) -> str:
+    """Content hash of an (N, dim) float32 corpus, tying codes to the artifact they encode."""
+    digest = hashlib.blake2b(repr(embeddings.shape).encode(), digest_size=16)
+    for start in range(0, embeddings.shape[0], _SCAN_BLOCK):
+        digest.update(np.ascontiguousarray(embeddings[start:start + _SCAN_BLOCK], dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+
+class ScalarQuantizer:
+    """Per-dimension uint8 scalar quantizer."""
+
+    codec = "sq8"
+
+    def __init__(self, minimum: np.ndarray, scale: np.ndarray):
+        self.minimum = np.asarray(minimum, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+
+    @classmethod
+    def train(cls, embeddings: np.ndarray) -> "ScalarQuantizer":
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        minimum = embeddings.min(axis=0)
+        scale = (embeddings.max(axis=0) - minimum) / 255
+        # Constant dimensions decode exactly to their minimum
+        scale[scale == 0] = 1
+        return cls(minimum, scale)
+
+    @property
+    def code_size(self) -> int:
+        return self.minimum.shape[0]
+
+    def encode(self, embeddings: np.ndarray) -> np.ndarray:
+        codes = np.rint((np.asarray(embeddings, dtype=np.float32) - self.minimum) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.minimum + codes.astype(np.float32) * self.scale
+
+    def prepare(self, codes: np.ndarray) -> np.ndarray:
+        """Per-row constants for distances: squared norms of the decoded vectors."""
+        sq_norms = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], _SCAN_BLOCK):
+            decoded = self.decode(codes[start:start + _SCAN_BLOCK])
+            sq_norms[start:start + _SCAN_BLOCK] = np.einsum("ij,ij->i", decoded, decoded)
+        return sq_norms
+
+    def distances(self, query: np.ndarray, codes: np.ndarray, sq_norms: np.ndarray) -> np.ndarray:
+        """Approximate squared L2 distances from one query to every coded row."""
+        # q.x^ = q.min + (q * scale).codes
+        weighted = query * self.scale
+        offset = float(np.dot(query, self.minimum))
+        products = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], _SCAN_BLOCK):
+            products[start:start + _SCAN_BLOCK] = codes[start:start + _SCAN_BLOCK].astype(np.float32) @ weighted
+        return float(np.dot(query, query)) + sq_norms - 2 * (products + offset)
+
+    def state(self) -> dict:
+        return {"minimum": self.minimum, "scale": self.scale}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "ScalarQuantizer":
+        return cls(state["minimum"], state["scale"])
+
+
+class ProductQuantizer:
+    """Product quantizer with one 256-entry k-means codebook per subspace."""
+
+    codec = "pq"
+
+    def __init__(self, codebooks: np.ndarray):
+        # (subspaces, centroids, sub_dim)
+        self.codebooks = np.asarray(codebooks, dtype=np.float32)
+
+    @classmethod
+    def train(
+        cls,
+        embeddings: np.ndarray,
+        subspaces: Optional[int] = None,
+        iterations: int = 15,
+        max_samples: int = 32768,
+        seed: int = 0,
+    ) -> "ProductQuantizer":
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        subspaces = subspaces or config.PQ_SUBSPACES
+        dim = embeddings.shape[1]
+        if dim % subspaces:
+            raise ValueError(f"Embedding dim {dim} is not divisible by {subspaces} subspaces")
+
+        rng = np.random.default_rng(seed)
+        if embeddings.shape[0] > max_samples:
+            embeddings = embeddings[np.sort(rng.choice(embeddings.shape[0], max_samples, replace=False))]
+
+        sub_dim = dim // subspaces
+        centroids = min(256, embeddings.shape[0])
+        codebooks = np.empty((subspaces, centroids, sub_dim), dtype=np.float32)
+        for m in range(subspaces):
+            chunk = np.ascontiguousarray(embeddings[:, m * sub_dim:(m + 1) * sub_dim])
+            codebooks[m] = _kmeans(chunk, centroids, iterations, rng)
+        return cls(codebooks)
+
+    @property
+    def subspaces(self) -> int:
+        return self.codebooks.shape[0]
+
+    @property
+    def sub_dim(self) -> int:
+        return self.codebooks.shape[2]
+
+    @property
+    def code_size(self) -> int:
+        return self.subspaces
+
+    def encode(self, embeddings: np.ndarray) -> np.ndarray:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        codes = np.empty((embeddings.shape[0], self.subspaces), dtype=np.uint8)
+        for start in range(0, embeddings.shape[0], _SCAN_BLOCK):
+            block = embeddings[start:start + _SCAN_BLOCK]
+            for m in range(self.subspaces):
+                chunk = block[:, m * self.sub_dim:(m + 1) * self.sub_dim]
+                codes[start:start + _SCAN_BLOCK, m] = _nearest(chunk, self.codebooks[m])
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        parts = self.codebooks[np.arange(self.subspaces), codes]
+        return parts.reshape(codes.shape[0], -1)
+
+    def prepare(self, codes: np.ndarray) -> None:
+        """PQ distances need no per-row constants."""
+        return None
+
+    def distances(self, query: np.ndarray, codes: np.ndarray, _: None) -> np.ndarray:
+        """Approximate squared L2 distances via per-subspace lookup tables."""
+        chunks = query.reshape(self.subspaces, 1, self.sub_dim)
+        table = ((self.codebooks - chunks) ** 2).sum(axis=2)
+        subspace_ids = np.arange(self.subspaces)
+
+        distances = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], _SCAN_BLOCK):
+            distances[start:start + _SCAN_BLOCK] = table[subspace_ids, codes[start:start + _SCAN_BLOCK]].sum(axis=1)
+        return distances
+
+    def state(self) -> dict:
+        return {"codebooks": self.codebooks}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "ProductQuantizer":
+        return cls(state["codebooks"])
+
+
+_QUANTIZERS = {"sq8": ScalarQuantizer, "pq": ProductQuantizer}
+
+
+def train_quantizer(embeddings: np.ndarray, codec: str, **kwargs):
+    """Train a quantizer of the given codec on an (N, dim) matrix."""
+    if codec not in _QUANTIZERS:
+        raise ValueError(f"Unknown codec {codec!r}; expected one of {CODECS}")
+    return _QUANTIZERS[codec].train(embeddings, **kwargs)
+
+
+class QuantizedIndex:
+    """
+    Approximate top-k over quantized codes with exact float32 re-ranking.
+
+    Each query scans the compact codes to find the ``rerank`` nearest
+    candidates, which are then scored exactly by the underlying
+    SearchIndex. Results are exact whenever the true top-k fall inside
+    the shortlist; use recall_at_k to measure how often they do.
+
+    L2 only, matching the image service.
+    """
+
+    def __init__(
+        self,
+        quantizer,
+        codes: np.ndarray,
+        exact: SearchIndex,
+        rerank: Optional[int] = None,
+    ):
+        if exact.metric != "l2":
+            raise ValueError("QuantizedIndex only supports the l2 metric")
+        if codes.shape[0] != len(exact):
+            raise ValueError(f"Have {codes.shape[0]} codes for {len(exact)} embeddings")
+
+        self.quantizer = quantizer
+        self.codes = np.ascontiguousarray(codes)
+        self.exact = exact
+        self.rerank = rerank or config.SEARCH_RERANK
+        self._row_constants = quantizer.prepare(self.codes)
+
+    @classmethod
+    def build(
+        cls,
+        exact: SearchIndex,
+        codec: str,
+        rerank: Optional[int] = None,
+        **kwargs,
+    ) -> "QuantizedIndex":
+        """Train a quantizer on the exact index's corpus and encode it."""
+        quantizer = train_quantizer(exact.embeddings, codec, **kwargs)
+        return cls(quantizer, quantizer.encode(exact.embeddings), exact, rerank)
+
+    @classmethod
+    def load(cls, path: PathLike, exact: SearchIndex, rerank: Optional[int] = None) -> "QuantizedIndex":
+        """
+        Load codes saved with save() for the corpus in exact.
+
+        Raises:
+            ValueError: if the codes were built from a different corpus
+                (e.g. the artifact was rebuilt without --quantize)
+        """
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            state = {name: data[name] for name in data.files if name not in ("meta", "codes")}
+            codes = data["codes"]
+
+        if meta["codec"] not in _QUANTIZERS:
+            raise ValueError(f"Unknown codec {meta['codec']!r} in {path}")
+        if meta.get("fingerprint") != corpus_fingerprint(exact.embeddings):
+            raise ValueError(f"Quantized codes in {path} were built from a different corpus")
+        return cls(_QUANTIZERS[meta["codec"]].from_state(state), codes, exact, rerank)
+
+    def save(self, path: PathLike):
+        """Atomically write the codec state and codes."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        meta = {
+            "codec": self.quantizer.codec,
+            "count": int(self.codes.shape[0]),
+            "fingerprint": corpus_fingerprint(self.exact.embeddings),
+        }
+        with open(tmp_path, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), codes=self.codes, **self.quantizer.state())
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return self.codes.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.exact.dim
+
+    @property
+    def urls(self) -> Optional[Sequence[str]]:
+        return self.exact.urls
+
+    @property
+    def metric(self) -> str:
+        return self.exact.metric
+
+    @property
+    def bytes_per_vector(self) -> int:
+        return self.codes.shape[1] * self.codes.itemsize
+
+    def search(self, query: np.ndarray, top_k: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k for a single query.
+
+        Returns:
+            Tuple of (indices, scores), each of shape (k,), best first
+        """
+        indices, scores = self.search_batch(np.asarray(query).reshape(1, -1), top_k)
+        return indices[0], scores[0]
+
+    def search_batch(self, queries: np.ndarray, top_k: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k for each row of a (M, dim) query matrix.
+
+        Returns:
+            Tuple of (indices, scores), each of shape (M, k), best first
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        if queries.ndim != 2 or queries.shape[1] != self.dim:
+            raise ValueError(f"Expected queries of shape (M, {self.dim}), got {queries.shape}")
+
+        k = min(top_k, len(self))
+        shortlist = min(max(self.rerank, k), len(self))
+        indices = np.empty((queries.shape[0], k), dtype=np.int64)
+        scores = np.empty((queries.shape[0], k), dtype=np.float32)
+        if k == 0:
+            return indices, scores
+
+        for row, query in enumerate(queries):
+            approx = self.quantizer.distances(query, self.codes, self._row_constants)
+            if shortlist < len(self):
+                candidates = np.argpartition(approx, shortlist - 1)[:shortlist]
+            else:
+                candidates = np.arange(len(self))
+            indices[row], scores[row] = self.exact.rerank(query, candidates, k)
+
+        return indices, scores
+
+    def results(self, query: np.ndarray, top_k: int = 20) -> list[dict]:
+        """Top-k as {"id", "image_url", "score"} dicts (image_url needs urls)."""
+        indices, scores = self.search(query, top_k)
+        return [
+            {
+                "id": int(i),
+                "image_url": self.urls[int(i)] if self.urls is not None else None,
+                "score": float(score),
+            }
+            for i, score in zip(indices, scores)
+        ]
+
+
+def recall_at_k(index, exact: SearchIndex, queries: np.ndarray, top_k: int = 20) -> float:
+    """Mean fraction of the exact top-k that index also returns."""
+    found, _ = index.search_batch(queries, top_k)
+    truth, _ = exact.search_batch(queries, top_k)
+    if truth.shape[1] == 0:
+        return 1.0
+    hits = sum(len(np.intersect1d(f, t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def _nearest(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the nearest centroid for each point."""
+    # ||c||^2 - 2 p.c ranks the same as ||p - c||^2
+    scores = np.einsum("ij,ij->i", centroids, centroids)[None, :] - 2 * (points @ centroids.T)
+    return scores.argmin(axis=1)
+
+
+def _kmeans(points: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """Lloyd's k-means seeded from distinct sample points."""
+    centroids = points[rng.choice(points.shape[0], k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _nearest(points, centroids)
+        counts = np.bincount(assignment, minlength=k)
+        sums = np.stack(
+            [np.bincount(assignment, weights=points[:, d], minlength=k) for d in range(points.shape[1])],
+            axis=1,
+        )
+
+        # Re-seed empty clusters from random points
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        if empty.any():
+            centroids[empty] = points[rng.choice(points.shape[0], int(empty.sum()), replace=False)]
+    return centroids
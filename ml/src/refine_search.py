@@ -0,0 +1,124 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .bridge import CrossModalBridge
+from .config import config
+from .search import _ROUNDING_SLACK, SearchIndex
+
+
+class _BaseTerms:
+    """Per-clip terms of the refined-query distance, reused across slider moves."""
+
+    def __init__(self, index: SearchIndex, directions: np.ndarray, base_embedding: np.ndarray):
+        self.base_embedding = base_embedding
+        self.image_products = index.embeddings @ base_embedding  # (N,)
+        self.direction_products = directions @ base_embedding  # (4,)
+        self.sq_norm = float(np.dot(base_embedding, base_embedding))
+
+
+class RefineSearch:
+    """
+    Search for slider-refined queries in O(N * 5) per setting.
+
+    refine_embedding computes r = (b + w.D) / ||b + w.D|| for the base
+    embedding b, slider weights w (4,) and the fixed (4, dim) direction
+    matrix D. Hence, for every corpus image x,
+
+        x.r = (x.b + (x.D) w) / n,   n^2 = b.b + 2 w.(D.b) + w (D D^T) w
+
+    With the (N, 4) table x.D built once per corpus and the (N,) vector
+    x.b built once per base embedding, every slider setting is scored
+    with a rank-4 update instead of a full (N, dim) product. The
+    resulting shortlist is re-ranked exactly by the SearchIndex, so
+    results are identical to searching with the refined embedding.
+    """
+
+    def __init__(self, index: SearchIndex, bridge: CrossModalBridge, max_bases: Optional[int] = None):
+        self.index = index
+        self.bridge = bridge
+        self.max_bases = config.REFINE_BASE_CACHE if max_bases is None else max_bases
+
+        directions = np.ascontiguousarray(bridge.direction_matrix, dtype=np.float32)
+        self.directions = directions
+        self.image_directions = index.embeddings @ directions.T  # (N, 4)
+        self.direction_gram = directions @ directions.T  # (4, 4)
+        self._max_sq_norm = float(index.sq_norms.max()) if len(index) else 0.0
+
+        self._bases: OrderedDict[bytes, _BaseTerms] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def search(
+        self,
+        base_embedding: np.ndarray,
+        settings,
+        top_k: int = 20,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Refine base_embedding for (M, 4) slider settings and search each.
+
+        Returns:
+            Tuple of (refined, indices, scores): the (M, dim) refined
+            embeddings and (M, k) results as from SearchIndex.search_batch
+        """
+        base_embedding = np.ascontiguousarray(base_embedding, dtype=np.float32)
+        refined = self.bridge.refine_embeddings(base_embedding, settings)
+        weights = self.bridge.slider_weights(settings)
+
+        k = min(top_k, len(self.index))
+        indices = np.empty((len(refined), k), dtype=np.int64)
+        scores = np.empty((len(refined), k), dtype=np.float32)
+        if k == 0:
+            return refined, indices, scores
+
+        terms = self._base_terms(base_embedding)
+        norms = np.sqrt(np.maximum(
+            terms.sq_norm
+            + 2 * weights @ terms.direction_products
+            + np.einsum("mi,ij,mj->m", weights, self.direction_gram, weights),
+            0,
+        ))
+        products = terms.image_products[:, None] + self.image_directions @ weights.T  # (N, M)
+
+        for row in range(len(refined)):
+            if norms[row] <= 0:
+                # Degenerate setting: refine_embedding leaves it unnormalized
+                indices[row], scores[row] = self.index.search(refined[row], k)
+                continue
+
+            approx, slack = self._approx_scores(products[:, row] / norms[row])
+            candidates = self.index._candidates(approx, slack, k)
+            indices[row], scores[row] = self.index.rerank(refined[row], candidates, k)
+
+        return refined, indices, scores
+
+    def _approx_scores(self, products: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Proxy scores for a unit-norm query from its products with every image."""
+        if self.index.metric == "l2":
+            # ||r - x||^2 = 1 + ||x||^2 - 2 x.r
+            approx = 1 + self.index.sq_norms - 2 * products
+            slack = _ROUNDING_SLACK * (1 + self._max_sq_norm)
+        else:
+            norms = self.index.norms
+            approx = 1 - np.divide(products, norms, out=np.zeros_like(products), where=norms > 0)
+            slack = _ROUNDING_SLACK * 4
+        return approx, slack
+
+    def _base_terms(self, base_embedding: np.ndarray) -> _BaseTerms:
+        key = hashlib.sha256(base_embedding.tobytes()).digest()
+        with self._lock:
+            terms = self._bases.get(key)
+            if terms is not None:
+                self._bases.move_to_end(key)
+                return terms
+
+        terms = _BaseTerms(self.index, self.directions, base_embedding)
+
+        with self._lock:
+            self._bases[key] = terms
+            while len(self._bases) > self.max_bases:
+                self._bases.popitem(last=False)
+        return terms
@@ -0,0 +1,190 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from . import metrics
+from .config import config
+
+
+class SchedulerFullError(RuntimeError):
+    """Raised when the inference queue is at capacity."""
+
+
+class SchedulerTimeoutError(TimeoutError):
+    """Raised when a request does not finish within its timeout."""
+
+
+class InferenceScheduler:
+    """
+    Runs blocking inference off the asyncio event loop.
+
+    Work is handed to an executor through a submit callable (a thread pool
+    for torch, the AnalysisPool for librosa). At most max_concurrency jobs
+    run at once; up to max_queue more wait for a slot and anything beyond
+    that is rejected immediately. A slot is only released once the
+    executor job actually finishes, so timed-out work that can't be
+    interrupted still counts against capacity.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = config.INFERENCE_MAX_QUEUE if max_queue is None else max_queue
+        self.timeout = config.INFERENCE_TIMEOUT if timeout is None else timeout
+
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._queued = 0
+        self._in_flight = 0
+
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests waiting for an executor slot."""
+        return self._queued
+
+    @property
+    def in_flight(self) -> int:
+        """Jobs currently running on the executor."""
+        return self._in_flight
+
+    async def run(
+        self,
+        submit: Callable[..., Future],
+        *args,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Schedule submit(*args) and await its result.
+
+        Raises:
+            SchedulerFullError: if the queue is full.
+            SchedulerTimeoutError: if queueing plus execution exceed the timeout.
+        """
+        if self._slots is None:
+            # Created lazily so it binds to the running loop
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+
+        if self._slots.locked() and self._queued >= self.max_queue:
+            self.rejected += 1
+            raise SchedulerFullError(
+                f"Inference queue full ({self._queued} waiting, {self._in_flight} running)"
+            )
+
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        self._queued += 1
+        queued_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise SchedulerTimeoutError(f"Timed out after {timeout:.1f}s waiting in queue")
+        finally:
+            self._queued -= 1
+            metrics.observe_stage("queue", time.perf_counter() - queued_at)
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = submit(*args)
+        except Exception:
+            self._slots.release()
+            raise
+
+        self._in_flight += 1
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+
+        try:
+            result = await asyncio.wait_for(
+                asyncio.wrap_future(future),
+                max(deadline - time.monotonic(), 0),
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise SchedulerTimeoutError(f"Timed out after {timeout:.1f}s")
+        except Exception:
+            self.failed += 1
+            raise
+
+        self.completed += 1
+        return result
+
+    def stats(self) -> dict:
+        """Queue-depth and throughput gauges."""
+        return {
+            "queue_depth": self._queued,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+    def _release(self):
+        self._in_flight -= 1
+        self._slots.release()
+
+
+class AdmissionControl:
+    """
+    Non-blocking cap on concurrent work.
+
+    try_acquire never waits: work over the limit is turned away at once
+    rather than queueing behind jobs it would only outlive its deadline
+    waiting for. Slots are released from executor threads, hence the lock.
+    """
+
+    def __init__(self, limit: int):
+        if limit < 1:
+            raise ValueError(f"Admission limit must be at least 1, got {limit}")
+        self.limit = limit
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+        self.admitted = 0
+        self.rejected = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Slots currently held."""
+        return self._in_flight
+
+    @property
+    def load(self) -> float:
+        """Fraction of the limit in use."""
+        return self._in_flight / self.limit
+
+    def try_acquire(self, slots: int = 1) -> bool:
+        """Take slots if they are free; False (and counted) otherwise."""
+        with self._lock:
+            if self._in_flight + slots > self.limit:
+                self.rejected += 1
+                return False
+            self._in_flight += slots
+            self.admitted += 1
+            return True
+
+    def release(self, slots: int = 1):
+        with self._lock:
+            self._in_flight -= slots
+
+    def stats(self) -> dict:
+        """Load gauges and admission counters."""
+        return {
+            "in_flight": self._in_flight,
+            "limit": self.limit,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
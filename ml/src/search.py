@@ -0,0 +1,226 @@
+from pathlib import Path
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .config import config
+from .embedding_artifact import EmbeddingArtifact
+
+METRICS = ("l2", "cosine")
+
+# Slack for float32 rounding in the expanded distance, relative to the
+# squared norms involved; keeps near-ties in the exact re-ranking pass
+_ROUNDING_SLACK = 1e-4
+
+
+class SearchIndex:
+    """
+    Exact top-k search over an in-memory embedding matrix.
+
+    The corpus is held as one contiguous float32 (N, dim) matrix (memory-
+    mapped artifacts are used as-is) with precomputed squared norms. Each
+    query batch is scored with a single matrix product, candidates are
+    selected with a partial sort (np.partition), and only that shortlist
+    is re-scored with the direct difference formula and stably sorted.
+    Results, including tie order, match a sorted brute-force scan over
+    the corpus.
+
+    Scores are distances for both metrics: L2 distance, or 1 - cosine
+    similarity. Lower is better.
+    """
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        urls: Optional[Sequence[str]] = None,
+        metric: str = "l2",
+    ):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r}; expected one of {METRICS}")
+        if embeddings.ndim != 2:
+            raise ValueError(f"Expected a 2-D embedding matrix, got shape {embeddings.shape}")
+
+        self.embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        self.urls = urls
+        self.metric = metric
+
+        self.sq_norms = np.einsum("ij,ij->i", self.embeddings, self.embeddings)
+        self.norms = np.sqrt(self.sq_norms)
+
+    @classmethod
+    def from_artifact(cls, path: Union[str, Path], metric: str = "l2") -> "SearchIndex":
+        """Build an index over a binary embedding artifact."""
+        artifact = EmbeddingArtifact(path)
+        return cls(artifact.as_float32(), artifact.urls, metric)
+
+    def __len__(self) -> int:
+        return self.embeddings.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.embeddings.shape[1]
+
+    def search(self, query: np.ndarray, top_k: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k for a single query.
+
+        Returns:
+            Tuple of (indices, scores), each of shape (k,), best first
+        """
+        indices, scores = self.search_batch(np.asarray(query).reshape(1, -1), top_k)
+        return indices[0], scores[0]
+
+    def search_batch(self, queries: np.ndarray, top_k: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k for each row of a (M, dim) query matrix.
+
+        Returns:
+            Tuple of (indices, scores), each of shape (M, k), best first
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        if queries.ndim != 2 or queries.shape[1] != self.dim:
+            raise ValueError(f"Expected queries of shape (M, {self.dim}), got {queries.shape}")
+
+        k = min(top_k, len(self))
+        indices = np.empty((queries.shape[0], k), dtype=np.int64)
+        scores = np.empty((queries.shape[0], k), dtype=np.float32)
+        if k == 0:
+            return indices, scores
+
+        approx, slack = self._approx_scores(queries)
+        for row in range(queries.shape[0]):
+            candidates = self._candidates(approx[row], slack[row], k)
+            indices[row], scores[row] = self.rerank(queries[row], candidates, k)
+
+        return indices, scores
+
+    def rerank(self, query: np.ndarray, candidates: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exactly score a shortlist of corpus indices and return its top-k.
+
+        Returns:
+            Tuple of (indices, scores), best first, stable by (score, index)
+        """
+        candidates = np.asarray(candidates, dtype=np.int64)
+        exact = self._exact_scores(np.asarray(query, dtype=np.float32), candidates)
+
+        # Stable by (score, index), like sorting a scan in corpus order
+        order = np.lexsort((candidates, exact))[:top_k]
+        return candidates[order], exact[order]
+
+    def results(self, query: np.ndarray, top_k: int = 20) -> list[dict]:
+        """Top-k as {"id", "image_url", "score"} dicts (image_url needs urls)."""
+        indices, scores = self.search(query, top_k)
+        return [
+            {
+                "id": int(i),
+                "image_url": self.urls[int(i)] if self.urls is not None else None,
+                "score": float(score),
+            }
+            for i, score in zip(indices, scores)
+        ]
+
+    def _approx_scores(self, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Monotone proxy scores for every corpus row and their rounding slack."""
+        products = queries @ self.embeddings.T
+        q_sq_norms = np.einsum("ij,ij->i", queries, queries)
+
+        if self.metric == "l2":
+            # ||q - x||^2 = ||q||^2 + ||x||^2 - 2 q.x
+            approx = q_sq_norms[:, None] + self.sq_norms[None, :] - 2 * products
+            slack = _ROUNDING_SLACK * (q_sq_norms + self.sq_norms.max())
+        else:
+            denominators = np.sqrt(q_sq_norms)[:, None] * self.norms[None, :]
+            approx = 1 - np.divide(products, denominators, out=np.zeros_like(products), where=denominators > 0)
+            slack = np.full(queries.shape[0], _ROUNDING_SLACK * 4)
+
+        return approx, slack
+
+    @staticmethod
+    def _candidates(approx: np.ndarray, slack: float, k: int) -> np.ndarray:
+        """Indices whose proxy score could place them in the exact top-k."""
+        if k < approx.shape[0]:
+            kth = np.partition(approx, k - 1)[k - 1]
+        else:
+            kth = approx.max()
+        return np.flatnonzero(approx <= kth + slack)
+
+    def _exact_scores(self, query: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        """Score candidates the direct way, in one gathered pass."""
+        rows = self.embeddings[candidates]
+        if self.metric == "l2":
+            diffs = rows - query
+            return np.sqrt(np.einsum("ij,ij->i", diffs, diffs)).astype(np.float32)
+
+        denominators = np.linalg.norm(query) * self.norms[candidates]
+        products = rows @ query
+        similarity = np.divide(products, denominators, out=np.zeros_like(products), where=denominators > 0)
+        return (1 - similarity).astype(np.float32)
+
+
+def check_top_k(top_k: Optional[int]) -> int:
+    """
+    Result count for a search request; 0 or None means config.SEARCH_TOP_K.
+
+    Raises:
+        ValueError: if top_k is negative
+    """
+    if top_k is not None and top_k < 0:
+        raise ValueError(f"top_k must not be negative, got {top_k}")
+    return top_k or config.SEARCH_TOP_K
+
+
+def check_embedding(embedding: Sequence[float], dim: int) -> np.ndarray:
+    """
+    A search request's query embedding as a float32 vector.
+
+    Raises:
+        ValueError: if it does not have dim finite values
+    """
+    embedding = np.asarray(embedding, dtype=np.float32)
+    if embedding.shape != (dim,):
+        raise ValueError(f"Expected a {dim}-dim embedding, got {embedding.size} values")
+    if not np.isfinite(embedding).all():
+        raise ValueError("Embedding contains NaN or infinite values")
+    return embedding
+
+
+def load_index(path: Optional[Union[str, Path]] = None, metric: str = "l2"):
+    """
+    Memory-map the image index artifact at path (default config.IMAGE_INDEX_PATH).
+
+    With config.SEARCH_QUANTIZED set and quantized codes next to the
+    artifact, returns a QuantizedIndex over them instead; both expose the
+    same search/results interface. Codes built from a different corpus
+    are ignored with a warning.
+
+    Returns None, with a warning, if no artifact has been built yet.
+    """
+    path = Path(path or config.IMAGE_INDEX_PATH)
+    if not path.exists():
+        print(f"No image index at {path}; search is disabled")
+        return None
+
+    index = SearchIndex.from_artifact(path, metric)
+    print(f"Loaded image index: {len(index)} images from {path}")
+
+    if config.SEARCH_QUANTIZED:
+        # Imported here; quantization builds on this module
+        from .quantization import QuantizedIndex, quantized_path
+
+        codes_path = quantized_path(path)
+        if codes_path.exists():
+            try:
+                quantized = QuantizedIndex.load(codes_path, index)
+            except ValueError as e:
+                print(f"Ignoring quantized codes: {e}; using exact search")
+            else:
+                index = quantized
+                print(
+                    f"Using {index.quantizer.codec} codes from {codes_path} "
+                    f"({index.bytes_per_vector} bytes/image, re-ranking {index.rerank})"
+                )
+        else:
+            print(f"No quantized codes at {codes_path}; using exact search")
+
+    return index
@@ -1,5 +1,10 @@
+import asyncio
+import signal
 import sys
+import threading
 from concurrent import futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
 
 import grpc
 import numpy as np
@@ -10,9 +15,19 @@ _ml_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, _ml_root)
 sys.path.insert(0, os.path.join(_ml_root, "protos"))
 
+from src import metrics
+from src.analysis_cache import AnalysisCache
 from src.audio_encoder import AudioEncoder
+from src.audio_stream import StreamingDecoder
 from src.bridge import CrossModalBridge
+from src.cancellation import Deadline, RequestCancelled
 from src.config import config
+from src.profiling import PROFILE_HEADER, PROFILE_ID_HEADER, ProfileStore, requested as profile_requested
+from src.refine_search import RefineSearch
+from src.scheduler import AdmissionControl
+from src.search import check_embedding, check_top_k, load_index
+from src.warmup import StartupState, configure_numba_cache, warm_up
+from src.worker_pool import AnalysisPool
 
 # Import generated protobuf code
 try:
@@ -29,49 +44,184 @@ class MLServiceServicer(ml_service_pb2_grpc.MLServiceServicer):
     def __init__(self):
         self.audio_encoder = AudioEncoder()
         self.bridge = CrossModalBridge()
+        self.analysis_pool = AnalysisPool()
+        self.analysis_cache = AnalysisCache()
+        self.search_index = None
+        self.refine_search = None
+        self.startup = StartupState()
+        self.profiles = ProfileStore()
+        # cProfile is process-wide: profiled calls run one at a time, as on HTTP
+        self._profile_lock = threading.Lock()
+        # Set by the aio front end; HealthCheck reports its load
+        self.admission: Optional[AdmissionControl] = None
+        metrics.REGISTRY.add_collector("analysis_cache", metrics.cache_collector(self.analysis_cache))
 
-        # Preload models
-        print("Loading models...")
-        self.audio_encoder.load_model()
-        self.bridge.load_model()
-        print("Models loaded successfully")
+    def start_up(self):
+        """Load models and indexes, warm every hot path, then report ready."""
+        try:
+            configure_numba_cache()
+
+            with self.startup.phase("load_models"):
+                self.audio_encoder.load_model()
+                self.bridge.load_model()
+
+            with self.startup.phase("directions"):
+                self.bridge.load_direction_vectors()
+
+            # Memory-map the image index for SearchImages/AnalyzeAndSearch
+            with self.startup.phase("load_index"):
+                self.search_index = load_index()
+
+                # Low-rank rescoring for BatchRefine, over the exact float32 corpus
+                if self.search_index is not None:
+                    exact_index = getattr(self.search_index, "exact", self.search_index)
+                    self.refine_search = RefineSearch(exact_index, self.bridge)
+
+            # Spawn BatchAnalyzeAudio's workers now, so the first batch doesn't
+            # pay for their imports, model load and JIT
+            with self.startup.phase("analysis_pool"):
+                self.analysis_pool.warm_up()
+
+            if config.WARMUP:
+                warm_up(self.audio_encoder, self.bridge, self.startup, self.search_index, self.refine_search)
+        except Exception as e:
+            self.startup.mark_failed(e)
+            raise
+
+        self.startup.mark_ready()
+
+    def shut_down(self):
+        """Stop the analysis pool's worker processes."""
+        self.analysis_pool.shutdown()
 
     def AnalyzeAudio(self, request, context):
         """Analyze audio and return embedding with mood features."""
         try:
-            audio_data = request.audio_data
-            audio_format = request.format or "wav"
+            # Unknown feature profiles raise ValueError
+            self.audio_encoder.version_for(request.profile or None)
+        except ValueError as e:
+            return self._invalid_argument(context, e, ml_service_pb2.AnalyzeAudioResponse())
 
-            # Encode audio
-            embedding, mood = self.audio_encoder.encode(audio_data, audio_format)
+        try:
+            args = (request.audio_data, request.format or "wav", request.profile)
+            if self._profiling(context):
+                # Profile the real work, not a cache lookup
+                clip_embedding, mood = self._profiled(context, "AnalyzeAudio", self._analyze_uncached, *args)
+                degraded = False
+            else:
+                deadline = Deadline.from_grpc(context, request.allow_degraded)
+                clip_embedding, mood = self._analyze(*args, deadline)
+                degraded = bool(deadline.degraded)
+            return self._analysis_response(clip_embedding, mood, degraded)
+        except RequestCancelled as e:
+            return self._cancelled(context, e, ml_service_pb2.AnalyzeAudioResponse())
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return ml_service_pb2.AnalyzeAudioResponse()
 
-            # Project to CLIP space
-            clip_embedding = self.bridge.project_to_clip_space(embedding)
+    def AnalyzeAudioStream(self, request_iterator, context):
+        """Analyze audio uploaded as a stream of chunks, decoding as they arrive."""
+        decoder = None
+        complete = True
+        try:
+            for chunk in request_iterator:
+                if decoder is None:
+                    profile = chunk.profile or None
+                    try:
+                        version = self.audio_encoder.version_for(profile)
+                    except ValueError as e:
+                        return self._invalid_argument(context, e, ml_service_pb2.AnalyzeAudioResponse())
+                    decoder = StreamingDecoder(chunk.format or "wav")
+                    deadline = Deadline.from_grpc(context, chunk.allow_degraded)
+                    digest = self.analysis_cache.hasher(decoder.audio_format, version)
+                decoder.feed(chunk.audio_data)
+                digest.update(chunk.audio_data)
 
-            return ml_service_pb2.AnalyzeAudioResponse(
-                embedding=clip_embedding.tolist(),
-                mood_energy=mood["energy"],
-                mood_valence=mood["valence"],
-                mood_tempo=mood["tempo"],
-                mood_texture=mood["texture"],
-            )
+                # Stop reading the upload once AUDIO_MAX_DURATION is decoded
+                if decoder.done:
+                    complete = False
+                    break
+
+            if decoder is None:
+                return self._invalid_argument(
+                    context, ValueError("No audio chunks received"), ml_service_pb2.AnalyzeAudioResponse()
+                )
+
+            if complete:
+                # The whole upload was read: same key as a unary AnalyzeAudio of it
+                def encode(timings):
+                    waveform = self._finish_stream(decoder, deadline, timings)
+                    return self.audio_encoder.encode_waveform(waveform, profile, timings, deadline)
+
+                embedding, mood = self._cached(digest.hexdigest(), encode, deadline)
+            else:
+                # The rest of the upload was never read, so key by the decoded audio
+                timings = {}
+                waveform = self._finish_stream(decoder, deadline, timings)
+
+                def encode(timings):
+                    return self.audio_encoder.encode_waveform(waveform, profile, timings, deadline)
+
+                cache_key = self.analysis_cache.key(waveform.tobytes(), "pcm", version)
+                embedding, mood = self._cached(cache_key, encode, deadline, timings)
+
+            return self._analysis_response(self._project(embedding, deadline), mood, bool(deadline.degraded))
+        except RequestCancelled as e:
+            return self._cancelled(context, e, ml_service_pb2.AnalyzeAudioResponse())
         except Exception as e:
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(str(e))
             return ml_service_pb2.AnalyzeAudioResponse()
+        finally:
+            if decoder is not None:
+                decoder.abort()
+
+    def BatchAnalyzeAudio(self, request, context):
+        """Analyze many clips on the worker pool (cached clips skip it), with per-item errors."""
+        try:
+            items = [(item.audio_data, item.format or "wav", item.profile or None) for item in request.items]
+            results = []
+            outcomes = self.analysis_pool.analyze_batch(
+                items,
+                self.bridge.project_to_clip_space,
+                cache=self.analysis_cache,
+                version_for=self.audio_encoder.version_for,
+            )
+            for clip_embedding, mood, error in outcomes:
+                if error is not None:
+                    results.append(ml_service_pb2.BatchAnalyzeAudioResult(error=error))
+                    continue
+
+                results.append(ml_service_pb2.BatchAnalyzeAudioResult(
+                    result=self._analysis_response(clip_embedding, mood)
+                ))
+
+            return ml_service_pb2.BatchAnalyzeAudioResponse(results=results)
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return ml_service_pb2.BatchAnalyzeAudioResponse()
 
     def RefineEmbedding(self, request, context):
         """Refine embedding based on mood slider values."""
         try:
-            base_embedding = np.array(request.base_embedding, dtype=np.float32)
+            base_embedding = check_embedding(request.base_embedding, self.bridge.embedding_dim)
+        except ValueError as e:
+            return self._invalid_argument(context, e, ml_service_pb2.RefineEmbeddingResponse())
 
-            refined = self.bridge.refine_embedding(
-                base_embedding,
-                energy=request.energy,
-                valence=request.valence,
-                tempo=request.tempo,
-                texture=request.texture,
-            )
+        try:
+            def refine():
+                return self.bridge.refine_embedding(
+                    base_embedding,
+                    energy=request.energy,
+                    valence=request.valence,
+                    tempo=request.tempo,
+                    texture=request.texture,
+                )
+
+            with metrics.stage("refine"):
+                refined = self._profiled(context, "RefineEmbedding", refine) if self._profiling(context) else refine()
 
             return ml_service_pb2.RefineEmbeddingResponse(
                 embedding=refined.tolist()
@@ -81,33 +231,551 @@ class MLServiceServicer(ml_service_pb2_grpc.MLServiceServicer):
             context.set_details(str(e))
             return ml_service_pb2.RefineEmbeddingResponse()
 
+    def BatchRefine(self, request, context):
+        """Refine one embedding for many slider settings, optionally with top-k images each."""
+        try:
+            if request.top_k < 0:
+                raise ValueError(f"top_k must not be negative, got {request.top_k}")
+            base_embedding = check_embedding(request.base_embedding, self.bridge.embedding_dim)
+            if not request.settings:
+                raise ValueError("settings must not be empty")
+        except ValueError as e:
+            return self._invalid_argument(context, e, ml_service_pb2.BatchRefineResponse())
+
+        if request.top_k > 0 and self.search_index is None:
+            context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
+            context.set_details("No image index loaded")
+            return ml_service_pb2.BatchRefineResponse()
+
+        try:
+            settings = np.array(
+                [(s.energy, s.valence, s.tempo, s.texture) for s in request.settings],
+                dtype=np.float32,
+            )
+
+            if request.top_k > 0:
+                def search():
+                    return self.refine_search.search(base_embedding, settings, request.top_k)
+
+                with metrics.stage("refine_search"):
+                    if self._profiling(context):
+                        refined, indices, scores = self._profiled(context, "BatchRefine", search)
+                    else:
+                        refined, indices, scores = search()
+                images = [self._image_results(i, s) for i, s in zip(indices, scores)]
+            else:
+                def refine():
+                    return self.bridge.refine_embeddings(base_embedding, settings)
+
+                with metrics.stage("refine"):
+                    refined = self._profiled(context, "BatchRefine", refine) if self._profiling(context) else refine()
+                images = [[] for _ in range(len(refined))]
+
+            return ml_service_pb2.BatchRefineResponse(results=[
+                ml_service_pb2.RefinedResult(embedding=embedding.tolist(), images=row_images)
+                for embedding, row_images in zip(refined, images)
+            ])
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return ml_service_pb2.BatchRefineResponse()
+
+    def SearchImages(self, request, context):
+        """Top-k images for a CLIP-space embedding."""
+        if self.search_index is None:
+            context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
+            context.set_details("No image index loaded")
+            return ml_service_pb2.SearchImagesResponse()
+
+        try:
+            embedding = check_embedding(request.embedding, self.search_index.dim)
+            top_k = check_top_k(request.top_k)
+        except ValueError as e:
+            return self._invalid_argument(context, e, ml_service_pb2.SearchImagesResponse())
+
+        try:
+            return ml_service_pb2.SearchImagesResponse(
+                images=self._search(embedding, top_k)
+            )
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return ml_service_pb2.SearchImagesResponse()
+
+    def AnalyzeAndSearch(self, request, context):
+        """Analyze audio and return its top-k images in one round trip."""
+        if self.search_index is None:
+            context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
+            context.set_details("No image index loaded")
+            return ml_service_pb2.AnalyzeAndSearchResponse()
+
+        try:
+            top_k = check_top_k(request.top_k)
+            self.audio_encoder.version_for(request.profile or None)
+        except ValueError as e:
+            return self._invalid_argument(context, e, ml_service_pb2.AnalyzeAndSearchResponse())
+
+        try:
+            deadline = Deadline.from_grpc(context, request.allow_degraded)
+            clip_embedding, mood = self._analyze(request.audio_data, request.format or "wav", request.profile, deadline)
+            return ml_service_pb2.AnalyzeAndSearchResponse(
+                analysis=self._analysis_response(clip_embedding, mood, bool(deadline.degraded)),
+                images=self._search(clip_embedding, top_k),
+            )
+        except RequestCancelled as e:
+            return self._cancelled(context, e, ml_service_pb2.AnalyzeAndSearchResponse())
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return ml_service_pb2.AnalyzeAndSearchResponse()
+
     def HealthCheck(self, request, context):
-        """Health check endpoint."""
-        return ml_service_pb2.HealthCheckResponse(
-            healthy=True,
-            message="ML service is running"
+        """Health check endpoint; healthy is liveness, ready flips after warm-up."""
+        report = self.startup.report()
+        response = ml_service_pb2.HealthCheckResponse(
+            healthy=self.startup.live,
+            message=report["error"] or ("ML service is running" if self.startup.ready else "ML service is starting"),
+            ready=self.startup.ready,
+            startup_phases=report["phases"],
+        )
+        if self.admission is not None:
+            response.in_flight = self.admission.in_flight
+            response.max_in_flight = self.admission.limit
+            response.load = self.admission.load
+        return response
+
+    def GetMetrics(self, request, context):
+        """Latency, throughput and cache metrics in the Prometheus text format."""
+        return ml_service_pb2.GetMetricsResponse(text=metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+    def _analyze(
+        self,
+        audio_data: bytes,
+        audio_format: str,
+        profile: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ):
+        """
+        Encode audio (cached by content hash and profile) and project it to CLIP space.
+
+        Degraded results (see src/cancellation.py) are returned but not cached.
+        """
+        profile = profile or None
+        deadline = deadline or Deadline()
+        cache_key = self.analysis_cache.key(audio_data, audio_format, self.audio_encoder.version_for(profile))
+
+        def encode(timings):
+            return self.audio_encoder.encode(audio_data, audio_format, timings, profile, deadline)
+
+        embedding, mood = self._cached(cache_key, encode, deadline)
+        return self._project(embedding, deadline), mood
+
+    def _cached(self, cache_key: str, encode, deadline: Deadline, timings: Optional[dict] = None):
+        """Cached encode(timings) result, computing and caching it (unless degraded) on a miss."""
+        cached = self.analysis_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        timings = {} if timings is None else timings
+        embedding, mood = encode(timings)
+        metrics.observe_stages(timings)
+        if not deadline.degraded:
+            self.analysis_cache.put(cache_key, embedding, mood)
+        return embedding, mood
+
+    def _finish_stream(self, decoder: StreamingDecoder, deadline: Deadline, timings: dict) -> np.ndarray:
+        """Waveform of a finished upload; only the tail of an incremental decode is timed."""
+        deadline.checkpoint("decode")
+        with metrics.stage("stream_finish"):
+            waveform = decoder.finish(timings)
+        if waveform is None:
+            waveform = self.audio_encoder._load_audio(decoder.buffered_bytes(), decoder.audio_format, timings)
+        return waveform
+
+    def _project(self, embedding: np.ndarray, deadline: Deadline) -> np.ndarray:
+        deadline.checkpoint("project")
+        with metrics.stage("project"):
+            clip_embedding = self.bridge.project_to_clip_space(embedding)
+        deadline.finish()
+        return clip_embedding
+
+    def _analyze_uncached(self, audio_data: bytes, audio_format: str, profile: Optional[str] = None):
+        """Encode and project without consulting the analysis cache."""
+        timings = {}
+        embedding, mood = self.audio_encoder.encode(audio_data, audio_format, timings, profile or None)
+        metrics.observe_stages(timings)
+        with metrics.stage("project"):
+            clip_embedding = self.bridge.project_to_clip_space(embedding)
+        return clip_embedding, mood
+
+    @staticmethod
+    def _profiling(context) -> bool:
+        """Whether this call opted into profiling (and the server allows it)."""
+        if not config.PROFILING_ENABLED:
+            return False
+        return any(
+            key == PROFILE_HEADER and profile_requested(value)
+            for key, value in context.invocation_metadata()
         )
 
+    def _profiled(self, context, label: str, fn, *args):
+        """
+        Run fn under the profiler and return the profile ID in trailing metadata.
+
+        Waits for any profiled call already running, so profiles don't
+        overlap (or fail: only one profiler may be active at a time).
+        """
+        with self._profile_lock:
+            result, profile_id = self.profiles.capture(label, fn, *args)
+        context.set_trailing_metadata(((PROFILE_ID_HEADER, profile_id),))
+        return result
+
+    @staticmethod
+    def _cancelled(context, error: RequestCancelled, response):
+        """Report a request stopped at a stage boundary, with an empty response."""
+        code = grpc.StatusCode.DEADLINE_EXCEEDED if error.reason == "deadline" else grpc.StatusCode.CANCELLED
+        context.set_code(code)
+        context.set_details(str(error))
+        return response
+
+    @staticmethod
+    def _invalid_argument(context, error: ValueError, response):
+        """Report a malformed request, with an empty response."""
+        context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+        context.set_details(str(error))
+        return response
+
+    @staticmethod
+    def _analysis_response(clip_embedding: np.ndarray, mood: dict, degraded: bool = False):
+        return ml_service_pb2.AnalyzeAudioResponse(
+            embedding=clip_embedding.tolist(),
+            mood_energy=mood["energy"],
+            mood_valence=mood["valence"],
+            mood_tempo=mood["tempo"],
+            mood_texture=mood["texture"],
+            degraded=degraded,
+        )
+
+    def _search(self, embedding: np.ndarray, top_k: int):
+        with metrics.stage("search"):
+            results = self.search_index.results(embedding, top_k)
+        return [ml_service_pb2.ImageResult(**result) for result in results]
+
+    def _image_results(self, indices: np.ndarray, scores: np.ndarray):
+        urls = self.search_index.urls
+        return [
+            ml_service_pb2.ImageResult(
+                id=int(i),
+                image_url=urls[int(i)] if urls is not None else None,
+                score=float(score),
+            )
+            for i, score in zip(indices, scores)
+        ]
+
+
+def _wrap_handler(handler, behavior_wrapper):
+    """Rebuild a method handler around a wrapped behavior of the same arity."""
+    if handler.request_streaming and handler.response_streaming:
+        wrap, behavior = grpc.stream_stream_rpc_method_handler, handler.stream_stream
+    elif handler.request_streaming:
+        wrap, behavior = grpc.stream_unary_rpc_method_handler, handler.stream_unary
+    elif handler.response_streaming:
+        wrap, behavior = grpc.unary_stream_rpc_method_handler, handler.unary_stream
+    else:
+        wrap, behavior = grpc.unary_unary_rpc_method_handler, handler.unary_unary
+    return wrap(
+        behavior_wrapper(behavior),
+        request_deserializer=handler.request_deserializer,
+        response_serializer=handler.response_serializer,
+    )
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """Records latency, in-flight count and status code of every unary-response RPC."""
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or handler.response_streaming:
+            return handler
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+
+        def instrument(behavior):
+            def instrumented(request_or_iterator, context):
+                timer = metrics.RequestTimer("grpc", method)
+                try:
+                    response = behavior(request_or_iterator, context)
+                except Exception:
+                    # Aborts raise after setting a code; anything else fails the RPC as UNKNOWN
+                    timer.finish(_status_name(context.code() or grpc.StatusCode.UNKNOWN))
+                    raise
+                # Handlers report errors through set_code
+                timer.finish(_status_name(context.code() or grpc.StatusCode.OK))
+                return response
+            return instrumented
+
+        return _wrap_handler(handler, instrument)
+
+
+def _status_name(code) -> str:
+    return code.name if isinstance(code, grpc.StatusCode) else str(code)
+
+
+class ReadinessInterceptor(grpc.ServerInterceptor):
+    """Rejects everything but HealthCheck with UNAVAILABLE until the service is ready."""
+
+    def __init__(self, startup: StartupState):
+        self.startup = startup
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if (
+            handler is None
+            or self.startup.ready
+            or handler_call_details.method.endswith("/HealthCheck")
+        ):
+            return handler
+
+        def reject(request_or_iterator, context):
+            context.abort(grpc.StatusCode.UNAVAILABLE, "Service is starting up")
+
+        return _wrap_handler(handler, lambda behavior: reject)
+
+
+class _BlockingIterator:
+    """Lets a handler on an executor thread read an aio request stream."""
+
+    def __init__(self, request_iterator, loop: asyncio.AbstractEventLoop):
+        self._iterator = request_iterator.__aiter__()
+        self._loop = loop
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        async def read():
+            return await self._iterator.__anext__()
+
+        try:
+            return asyncio.run_coroutine_threadsafe(read(), self._loop).result()
+        except StopAsyncIteration:
+            raise StopIteration
+
+
+class AsyncMLServiceServicer(ml_service_pb2_grpc.MLServiceServicer):
+    """
+    grpc.aio front end for MLServiceServicer.
+
+    The event loop only admits, dispatches and answers health checks; the
+    servicer's handlers run unchanged on executor threads. Analyses take
+    a slot from AdmissionControl and run on their own executor sized to
+    the limit, so admitted work never queues. Analyses beyond the limit
+    fail at once with RESOURCE_EXHAUSTED instead of waiting out their
+    deadline, which keeps latency of admitted work bounded under
+    overload. A slot is held until the handler actually returns, even if
+    the client has gone.
+    """
+
+    def __init__(self, servicer: MLServiceServicer, max_in_flight: Optional[int] = None):
+        self.servicer = servicer
+        self.admission = AdmissionControl(max_in_flight or config.GRPC_MAX_IN_FLIGHT)
+        servicer.admission = self.admission
+        self.analysis_executor = futures.ThreadPoolExecutor(
+            max_workers=self.admission.limit, thread_name_prefix="analysis"
+        )
+        # Refinement and search are short; they get threads of their own
+        # so a full house of analyses doesn't delay them
+        self.executor = futures.ThreadPoolExecutor(
+            max_workers=config.GRPC_MAX_WORKERS, thread_name_prefix="rpc"
+        )
+        metrics.REGISTRY.add_collector("admission", metrics.admission_collector(self.admission))
+
+    async def AnalyzeAudio(self, request, context):
+        return await self._dispatch("AnalyzeAudio", self.servicer.AnalyzeAudio, request, context, slots=1)
+
+    async def AnalyzeAudioStream(self, request_iterator, context):
+        # Admission happens before the first chunk is read
+        requests = _BlockingIterator(request_iterator, asyncio.get_running_loop())
+        return await self._dispatch(
+            "AnalyzeAudioStream", self.servicer.AnalyzeAudioStream, requests, context, slots=1
+        )
+
+    async def BatchAnalyzeAudio(self, request, context):
+        # One slot per clip, capped so an oversized batch can still run on an idle server
+        slots = min(max(len(request.items), 1), self.admission.limit)
+        return await self._dispatch(
+            "BatchAnalyzeAudio", self.servicer.BatchAnalyzeAudio, request, context, slots=slots
+        )
+
+    async def AnalyzeAndSearch(self, request, context):
+        return await self._dispatch("AnalyzeAndSearch", self.servicer.AnalyzeAndSearch, request, context, slots=1)
+
+    async def RefineEmbedding(self, request, context):
+        return await self._dispatch("RefineEmbedding", self.servicer.RefineEmbedding, request, context)
+
+    async def BatchRefine(self, request, context):
+        return await self._dispatch("BatchRefine", self.servicer.BatchRefine, request, context)
+
+    async def SearchImages(self, request, context):
+        return await self._dispatch("SearchImages", self.servicer.SearchImages, request, context)
+
+    async def HealthCheck(self, request, context):
+        # Answered on the loop so a saturated server still reports its load
+        timer = metrics.RequestTimer("grpc", "HealthCheck")
+        try:
+            return self.servicer.HealthCheck(request, context)
+        finally:
+            timer.finish(grpc.StatusCode.OK.name)
+
+    async def GetMetrics(self, request, context):
+        return await self._dispatch("GetMetrics", self.servicer.GetMetrics, request, context)
+
+    async def _dispatch(self, method: str, handler, request, context, slots: int = 0):
+        """Run a servicer handler on an executor, behind readiness and admission checks."""
+        timer = metrics.RequestTimer("grpc", method)
+        status = None
+        try:
+            if not self.servicer.startup.ready:
+                await context.abort(grpc.StatusCode.UNAVAILABLE, "Service is starting up")
+
+            if not slots:
+                return await asyncio.wrap_future(self.executor.submit(handler, request, context))
+
+            if not self.admission.try_acquire(slots):
+                await context.abort(
+                    grpc.StatusCode.RESOURCE_EXHAUSTED,
+                    f"At capacity ({self.admission.in_flight}/{self.admission.limit} analyses in flight)",
+                )
+            try:
+                future = self.analysis_executor.submit(handler, request, context)
+            except Exception:
+                self.admission.release(slots)
+                raise
+            future.add_done_callback(lambda _: self.admission.release(slots))
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Client cancelled or its deadline passed; the handler stops at
+            # its next stage boundary (see src/cancellation.py)
+            remaining = context.time_remaining()
+            expired = remaining is not None and remaining <= 0
+            status = (grpc.StatusCode.DEADLINE_EXCEEDED if expired else grpc.StatusCode.CANCELLED).name
+            raise
+        except Exception:
+            # Aborts raise after setting a code; anything else fails the RPC as UNKNOWN
+            status = _status_name(context.code() or grpc.StatusCode.UNKNOWN)
+            raise
+        finally:
+            if status is None:
+                status = _status_name(context.code() or grpc.StatusCode.OK)
+            timer.finish(status)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves GET /metrics for scrapers that can't speak gRPC."""
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", metrics.CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int) -> ThreadingHTTPServer:
+    """Expose the metrics over plain HTTP on a daemon thread."""
+    httpd = ThreadingHTTPServer(("", port), _MetricsHandler)
+    threading.Thread(target=httpd.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"Serving metrics on :{port}/metrics")
+    return httpd
+
+
+def _server_options() -> list:
+    max_message_bytes = config.GRPC_MAX_MESSAGE_MB * 1024 * 1024
+    return [
+        ("grpc.max_receive_message_length", max_message_bytes),
+        ("grpc.max_send_message_length", max_message_bytes),
+    ]
+
 
 def serve():
-    """Start the gRPC server."""
+    """Start the gRPC server in the configured GRPC_SERVER_MODE."""
+    if config.GRPC_SERVER_MODE == "aio":
+        asyncio.run(serve_aio())
+        return
+    if config.GRPC_SERVER_MODE != "sync":
+        raise ValueError(f"Unknown GRPC_SERVER_MODE {config.GRPC_SERVER_MODE!r}; expected 'sync' or 'aio'")
+
+    servicer = MLServiceServicer()
+
     server = grpc.server(
         futures.ThreadPoolExecutor(max_workers=config.GRPC_MAX_WORKERS),
-        options=[
-            ("grpc.max_receive_message_length", 100 * 1024 * 1024),  # 100MB
-            ("grpc.max_send_message_length", 100 * 1024 * 1024),
-        ]
+        interceptors=[MetricsInterceptor(), ReadinessInterceptor(servicer.startup)],
+        options=_server_options(),
     )
+    ml_service_pb2_grpc.add_MLServiceServicer_to_server(servicer, server)
+
+    address = f"[::]:{config.GRPC_PORT}"
+    server.add_insecure_port(address)
+
+    if config.METRICS_PORT:
+        start_metrics_server(config.METRICS_PORT)
+
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    try:
+        # By default the port only opens once warm; in the background mode
+        # HealthCheck answers immediately and reports ready=false meanwhile
+        if not config.WARMUP_IN_BACKGROUND:
+            servicer.start_up()
 
+        print(f"Starting ML gRPC server on {address}")
+        server.start()
+
+        if config.WARMUP_IN_BACKGROUND:
+            servicer.start_up()
+        server.wait_for_termination()
+    finally:
+        servicer.shut_down()
+
+
+async def serve_aio():
+    """Start the asyncio gRPC server with admission control."""
     servicer = MLServiceServicer()
-    ml_service_pb2_grpc.add_MLServiceServicer_to_server(servicer, server)
+    async_servicer = AsyncMLServiceServicer(servicer)
+
+    server = grpc.aio.server(options=_server_options())
+    ml_service_pb2_grpc.add_MLServiceServicer_to_server(async_servicer, server)
 
     address = f"[::]:{config.GRPC_PORT}"
     server.add_insecure_port(address)
 
-    print(f"Starting ML gRPC server on {address}")
-    server.start()
-    server.wait_for_termination()
+    if config.METRICS_PORT:
+        start_metrics_server(config.METRICS_PORT)
+
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    try:
+        if not config.WARMUP_IN_BACKGROUND:
+            servicer.start_up()
+
+        print(f"Starting ML gRPC server (aio, {async_servicer.admission.limit} analyses in flight) on {address}")
+        await server.start()
+
+        if config.WARMUP_IN_BACKGROUND:
+            # Off the loop so HealthCheck keeps answering during warm-up
+            await asyncio.get_running_loop().run_in_executor(None, servicer.start_up)
+        await server.wait_for_termination()
+    finally:
+        servicer.shut_down()
+
+
+def _exit_on_sigterm(signum, frame):
+    # Unwind through serve()'s cleanup instead of dying with worker processes alive
+    sys.exit(0)
 
 
 if __name__ == "__main__":
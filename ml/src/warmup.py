@@ -0,0 +1,163 @@
+"""
+Startup warm-up and readiness tracking.
+
+A cold instance otherwise pays for CLIP loading, numba JIT compilation
+inside librosa (onset_strength, beat_track, peak picking) and the
+mood direction vectors on its first real requests. The services run
+synthetic audio and text through every hot path before reporting
+ready, and numba's compiled functions are cached on disk
+(config.NUMBA_CACHE_DIR) so later starts, and images warmed at build
+time, skip compilation entirely.
+
+Run ``python -m src.warmup`` to populate the caches ahead of time.
+"""
+
+import io
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import numpy as np
+import soundfile as sf
+
+from .config import config
+
+
+class StartupState:
+    """
+    Liveness, readiness and per-phase timings of a service start.
+
+    The process is live as soon as it can answer health checks; it is
+    ready only once every startup phase, including warm-up, completed.
+    A failed startup is neither, so orchestrators restart the process.
+    """
+
+    def __init__(self):
+        self.live = True
+        self.ready = False
+        self.error: Optional[str] = None
+        self.phases: dict[str, float] = {}
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a startup phase and report it."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.phases[name] = elapsed
+            print(f"Startup phase {name}: {elapsed:.2f}s")
+
+    def mark_ready(self):
+        self.ready = True
+        print(f"Service ready after {self.elapsed:.2f}s")
+
+    def mark_failed(self, error: Exception):
+        self.live = False
+        self.error = str(error) or type(error).__name__
+        print(f"Startup failed: {self.error}")
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def report(self) -> dict:
+        with self._lock:
+            phases = {name: round(seconds, 3) for name, seconds in self.phases.items()}
+        return {
+            "live": self.live,
+            "ready": self.ready,
+            "error": self.error,
+            "phases": phases,
+            "startup_seconds": round(sum(phases.values()), 3),
+        }
+
+
+def configure_numba_cache(path: Optional[str] = None):
+    """Point numba's on-disk cache at path (default config.NUMBA_CACHE_DIR)."""
+    path = path or config.NUMBA_CACHE_DIR
+    os.makedirs(path, exist_ok=True)
+    os.environ["NUMBA_CACHE_DIR"] = path
+
+    # numba reads its environment on import, which librosa has usually done
+    from numba.core import config as numba_config
+    numba_config.reload_config()
+
+
+def synthetic_clip(duration: float = 6.0, sample_rate: Optional[int] = None) -> bytes:
+    """
+    A WAV clip with a steady pulse over a chord.
+
+    The pulse gives onset detection and beat tracking real work, so
+    every JIT-compiled path runs with production dtypes and shapes.
+    """
+    sample_rate = sample_rate or config.AUDIO_SAMPLE_RATE
+    t = np.arange(int(duration * sample_rate), dtype=np.float32) / sample_rate
+
+    chord = sum(np.sin(2 * np.pi * freq * t) for freq in (220.0, 277.2, 329.6)) / 6
+    beat_phase = (t * 2.0) % 1.0  # 120 BPM
+    pulse = np.exp(-beat_phase * 40) * np.sin(2 * np.pi * 1000 * t)
+    waveform = (chord + 0.5 * pulse).astype(np.float32)
+
+    buffer = io.BytesIO()
+    sf.write(buffer, waveform, sample_rate, format="WAV", subtype="FLOAT")
+    return buffer.getvalue()
+
+
+def warm_up(
+    audio_encoder,
+    bridge,
+    startup: Optional[StartupState] = None,
+    search_index=None,
+    refine_search=None,
+):
+    """Run synthetic requests through the analysis, refine and search paths."""
+    startup = startup or StartupState()
+
+    with startup.phase("warmup_audio"):
+        embedding, _ = audio_encoder.encode(synthetic_clip(), "wav")
+        clip_embedding = bridge.project_to_clip_space(embedding)
+
+    with startup.phase("warmup_text"):
+        bridge.encode_text("a calm landscape")
+
+    with startup.phase("warmup_refine"):
+        settings = np.array([[0.5, 0.5, 0.5, 0.5], [1.0, 0.0, 1.0, 0.0]], dtype=np.float32)
+        bridge.refine_embeddings(clip_embedding, settings)
+
+    if search_index is not None:
+        with startup.phase("warmup_search"):
+            search_index.search(clip_embedding, config.SEARCH_TOP_K)
+            if refine_search is not None:
+                refine_search.search(clip_embedding, settings, config.SEARCH_TOP_K)
+
+
+def main():
+    """Load the models and warm every path, filling the on-disk caches."""
+    from .audio_encoder import AudioEncoder
+    from .bridge import CrossModalBridge
+
+    startup = StartupState()
+    configure_numba_cache()
+
+    with startup.phase("load_models"):
+        audio_encoder = AudioEncoder()
+        audio_encoder.load_model()
+        bridge = CrossModalBridge()
+        bridge.load_model()
+
+    with startup.phase("directions"):
+        bridge.load_direction_vectors()
+
+    warm_up(audio_encoder, bridge, startup)
+    startup.mark_ready()
+
+
+if __name__ == "__main__":
+    main()
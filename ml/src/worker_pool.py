@@ -0,0 +1,268 @@
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, Optional, Tuple
+
+import numpy as np
+
+from . import metrics
+from .analysis_cache import AnalysisCache
+from .config import config
+
+# (embedding, mood, error) of one batch item; see AnalysisPool.submit_batch
+BatchResult = Tuple[Optional[np.ndarray], Optional[dict], Optional[str]]
+
+# Per-process model, created once by the pool initializer
+_audio_encoder = None
+
+
+def _init_worker():
+    """Load the audio encoder into a freshly started worker process."""
+    global _audio_encoder
+
+    # Imported here so the parent process doesn't pay for them twice
+    from .audio_encoder import AudioEncoder
+    from .warmup import configure_numba_cache, synthetic_clip
+
+    # One process per core; keep BLAS/torch from oversubscribing
+    import torch
+    torch.set_num_threads(1)
+
+    _audio_encoder = AudioEncoder()
+    _audio_encoder.load_model()
+
+    configure_numba_cache()
+    if config.WARMUP:
+        _audio_encoder.encode(synthetic_clip(), "wav")
+
+
+def _ping() -> bool:
+    return True
+
+
+def _encode(audio_data: bytes, audio_format: str, profile: Optional[str] = None) -> Tuple[np.ndarray, dict, dict]:
+    """Run AudioEncoder.encode inside a worker process."""
+    timings = {}
+    embedding, mood = _audio_encoder.encode(audio_data, audio_format, timings, profile)
+    return embedding, mood, timings
+
+
+class AnalysisPool:
+    """
+    Pool of warm worker processes for CPU-bound audio analysis.
+
+    librosa feature extraction holds the GIL, so threads give almost no
+    speedup. Each worker process holds its own AudioEncoder and encodes
+    one clip at a time; projection to CLIP space stays in the parent, so
+    the CLIP bridge is loaded once rather than once per worker. Workers
+    return their stage timings with each result, since metrics recorded
+    in a worker process would never reach the parent's /metrics.
+
+    If a worker dies (e.g. OOM), the pool breaks and every pending future
+    with it; each affected job is retried once on a rebuilt pool.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or config.ANALYSIS_POOL_WORKERS
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the worker processes (lazy, idempotent)."""
+        with self._lock:
+            if self._executor is not None:
+                return
+
+            # spawn avoids forking a parent that already has torch threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            print(f"Analysis pool started with {self.max_workers} workers")
+
+    def warm_up(self):
+        """Start every worker and wait until each has loaded and warmed its model."""
+        self.start()
+        futures = [self._submit(_ping) for _ in range(self.max_workers)]
+        for future in futures:
+            future.result()
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            if self._executor is None:
+                return
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def submit_encode(self, audio_data: bytes, audio_format: str = "wav", profile: Optional[str] = None) -> Future:
+        """Schedule AudioEncoder.encode only; resolves to (embedding, mood, timings)."""
+        return self._submit(_encode, audio_data, audio_format, profile)
+
+    def submit_batch(
+        self,
+        items: Iterable[Tuple[bytes, str]],
+        profile: Optional[str] = None,
+        cache: Optional[AnalysisCache] = None,
+        version_for: Optional[Callable[[Optional[str]], str]] = None,
+    ) -> Future:
+        """
+        Schedule many clips as one job, encoded in parallel across the workers.
+
+        Items are (audio_data, audio_format) or (audio_data, audio_format,
+        profile); profile applies to items that don't set their own. With a
+        cache (and version_for, the encoder's cache version of a profile),
+        cached clips are answered without a worker and new results are
+        stored back.
+
+        Returns:
+            Future resolving, once every clip is done, to a list of
+            (embedding, mood, error) in input order. Failed items have
+            embedding and mood set to None and a non-empty error.
+        """
+        outcomes: list[Optional[BatchResult]] = []
+        jobs: dict[int, Tuple[Future, Optional[str]]] = {}
+        for item in items:
+            audio_data, audio_format = item[0], item[1]
+            item_profile = item[2] if len(item) > 2 and item[2] else profile
+            key = None
+            if cache is not None:
+                try:
+                    key = cache.key(audio_data, audio_format, version_for(item_profile))
+                except ValueError as e:
+                    # Unknown feature profile
+                    outcomes.append((None, None, str(e)))
+                    continue
+                cached = cache.get(key)
+                if cached is not None:
+                    outcomes.append((*cached, None))
+                    continue
+
+            jobs[len(outcomes)] = (self.submit_encode(audio_data, audio_format, item_profile), key)
+            outcomes.append(None)
+
+        batch = Future()
+        pending = len(jobs)
+        lock = threading.Lock()
+
+        def finish(_):
+            nonlocal pending
+            with lock:
+                pending -= 1
+                if pending:
+                    return
+            for index, (future, key) in jobs.items():
+                outcomes[index] = collect_result(future)
+                embedding, mood, error = outcomes[index]
+                if key is not None and error is None:
+                    cache.put(key, embedding, mood)
+            if not batch.cancelled():
+                batch.set_result(outcomes)
+
+        def cancel_jobs(_):
+            if batch.cancelled():
+                for future, _ in jobs.values():
+                    future.cancel()
+
+        if not jobs:
+            batch.set_result(outcomes)
+        batch.add_done_callback(cancel_jobs)
+        for future, _ in jobs.values():
+            future.add_done_callback(finish)
+        return batch
+
+    def analyze_batch(
+        self,
+        items: Iterable[Tuple[bytes, str]],
+        project: Callable[[np.ndarray], np.ndarray],
+        profile: Optional[str] = None,
+        cache: Optional[AnalysisCache] = None,
+        version_for: Optional[Callable[[Optional[str]], str]] = None,
+    ) -> list[BatchResult]:
+        """
+        Analyze many clips in parallel and wait for them (see submit_batch).
+
+        Each embedding is projected to CLIP space with project, in this process.
+
+        Returns:
+            List of (clip_embedding, mood, error) in input order.
+        """
+        batch = self.submit_batch(items, profile, cache, version_for)
+        return [project_result(outcome, project) for outcome in batch.result()]
+
+    def _submit(self, fn, *args) -> Future:
+        """Schedule fn(*args) on a worker; the future outlives one pool rebuild."""
+        result = Future()
+        self._submit_into(result, fn, args, retries=1)
+        return result
+
+    def _submit_into(self, result: Future, fn, args: tuple, retries: int):
+        self.start()
+        executor = self._executor
+        try:
+            job = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            if not retries:
+                raise
+            self._reset(executor)
+            self._submit_into(result, fn, args, retries - 1)
+            return
+
+        def cancel_job(future: Future):
+            if future.cancelled():
+                job.cancel()
+
+        def forward(job: Future):
+            if result.done():
+                return
+            if job.cancelled():
+                result.cancel()
+                return
+
+            error = job.exception()
+            if isinstance(error, BrokenProcessPool) and retries:
+                # A worker died (e.g. OOM) and took the pool's pending jobs with it
+                self._reset(executor)
+                try:
+                    self._submit_into(result, fn, args, retries - 1)
+                except Exception as e:
+                    result.set_exception(e)
+            elif error is not None:
+                result.set_exception(error)
+            else:
+                result.set_result(job.result())
+
+        result.add_done_callback(cancel_job)
+        job.add_done_callback(forward)
+
+    def _reset(self, broken: ProcessPoolExecutor):
+        """Replace the pool, unless another job already replaced it."""
+        with self._lock:
+            if self._executor is broken:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+        self.start()
+
+
+def collect_result(future: Future) -> BatchResult:
+    """Wait for an encode future, turning its exception into a per-item error."""
+    try:
+        embedding, mood, timings = future.result()
+        metrics.observe_stages(timings)
+        return embedding, mood, None
+    except Exception as e:
+        return None, None, str(e) or type(e).__name__
+
+
+def project_result(outcome: BatchResult, project: Callable[[np.ndarray], np.ndarray]) -> BatchResult:
+    """Project a successful (embedding, mood, error) to CLIP space; failures pass through."""
+    embedding, mood, error = outcome
+    if error is not None:
+        return outcome
+    try:
+        with metrics.stage("project"):
+            return project(embedding), mood, None
+    except Exception as e:
+        return None, None, str(e) or type(e).__name__
@@ -0,0 +1,94 @@
+import os
+import threading
+
+import numpy as np
+
+from src.analysis_cache import AnalysisCache
+
+MOOD = {"energy": 0.5, "valence": 0.25, "tempo": 0.75, "texture": 1.0}
+
+
+def _embedding(i: int) -> np.ndarray:
+    return np.full(64, i, dtype=np.float32)
+
+
+def _entry_size(tmp_path) -> int:
+    probe = AnalysisCache(max_entries=0, disk_dir=str(tmp_path / "probe"), disk_max_bytes=1 << 20)
+    probe.put("probe", _embedding(0), MOOD)
+    return probe.stats()["disk_bytes"]
+
+
+def test_disk_hit_after_memory_is_cleared(tmp_path):
+    cache = AnalysisCache(max_entries=4, disk_dir=str(tmp_path), disk_max_bytes=1 << 20)
+    cache.put("a", _embedding(1), MOOD)
+    cache.clear()
+
+    embedding, mood = cache.get("a")
+    np.testing.assert_array_equal(embedding, _embedding(1))
+    assert mood == MOOD
+    assert cache.stats()["disk_hits"] == 1
+
+    # Promoted back into memory
+    cache.get("a")
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_disk_evicts_least_recently_used(tmp_path):
+    size = _entry_size(tmp_path)
+    cache = AnalysisCache(max_entries=0, disk_dir=str(tmp_path / "cache"), disk_max_bytes=2 * size)
+    cache.put("a", _embedding(1), MOOD)
+    cache.put("b", _embedding(2), MOOD)
+    assert cache.get("a") is not None
+    cache.put("c", _embedding(3), MOOD)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert sorted(os.listdir(tmp_path / "cache")) == ["a.npz", "c.npz"]
+    assert cache.stats()["disk_evictions"] == 1
+
+
+def test_corrupt_disk_entry_is_a_miss(tmp_path):
+    cache = AnalysisCache(max_entries=0, disk_dir=str(tmp_path), disk_max_bytes=1 << 20)
+    cache.put("a", _embedding(1), MOOD)
+    (tmp_path / "a.npz").write_bytes(b"corrupt")
+
+    assert cache.get("a") is None
+    assert cache.stats()["disk_entries"] == 0
+
+    # Rewritten by the next put
+    cache.put("a", _embedding(1), MOOD)
+    assert cache.get("a") is not None
+
+
+def test_disk_index_survives_restart(tmp_path):
+    cache = AnalysisCache(max_entries=0, disk_dir=str(tmp_path), disk_max_bytes=1 << 20)
+    cache.put("a", _embedding(1), MOOD)
+
+    reopened = AnalysisCache(max_entries=0, disk_dir=str(tmp_path), disk_max_bytes=1 << 20)
+    np.testing.assert_array_equal(reopened.get("a")[0], _embedding(1))
+
+
+def test_concurrent_puts_and_gets_keep_the_books(tmp_path):
+    size = _entry_size(tmp_path)
+    cache = AnalysisCache(max_entries=8, disk_dir=str(tmp_path / "cache"), disk_max_bytes=16 * size)
+
+    def worker(offset: int):
+        for i in range(200):
+            key = str((i * 7 + offset) % 40)
+            value = cache.get(key)
+            if value is None:
+                cache.put(key, _embedding(int(key)), MOOD)
+            else:
+                np.testing.assert_array_equal(value[0], _embedding(int(key)))
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    files = {name[:-4] for name in os.listdir(tmp_path / "cache") if name.endswith(".npz")}
+    assert stats["disk_bytes"] <= stats["disk_max_bytes"]
+    assert stats["disk_entries"] == len(files)
+    assert stats["hits"] + stats["misses"] == 4 * 200
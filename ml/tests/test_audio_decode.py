@@ -0,0 +1,114 @@
+import io
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from src.audio_decode import decode_audio
+from src.audio_stream import StreamingDecoder, parse_wav_header
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+
+
+def _wav(seconds: float = 3.0, rate: int = 44100) -> bytes:
+    t = np.arange(int(seconds * rate)) / rate
+    stereo = np.stack([np.sin(2 * np.pi * 440 * t), 0.5 * np.sin(2 * np.pi * 660 * t)], axis=1)
+    buffer = io.BytesIO()
+    sf.write(buffer, (0.5 * stereo).astype(np.float32), rate, format="WAV", subtype="FLOAT")
+    return buffer.getvalue()
+
+
+def test_parse_wav_header_waits_for_the_data_chunk():
+    header = _wav(0.01)
+    sample_rate, channels, offset = parse_wav_header(header)
+
+    assert (sample_rate, channels) == (44100, 2)
+    assert header[offset - 8:offset - 4] == b"data"
+    assert parse_wav_header(header[:offset - 1]) is None
+    with pytest.raises(ValueError):
+        parse_wav_header(b"ID3" + header[3:])
+
+
+@needs_ffmpeg
+@pytest.mark.parametrize("quality", ["hq", "qq"])
+def test_ffmpeg_matches_soundfile(quality):
+    audio = _wav()
+    timings = {}
+
+    expected = decode_audio(audio, "wav", 16000, quality=quality)
+    # Not a soundfile format, so ffmpeg decodes it
+    decoded = decode_audio(audio, "bin", 16000, quality=quality, timings=timings)
+
+    assert timings["decoder"] == "ffmpeg"
+    assert timings["resample"] > 0
+    np.testing.assert_allclose(decoded, expected, atol=1e-5)
+
+
+@needs_ffmpeg
+def test_ffmpeg_reads_trailing_moov(tmp_path):
+    source = tmp_path / "clip.wav"
+    source.write_bytes(_wav(20))
+    target = tmp_path / "clip.m4a"
+    subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", str(source), "-c:a", "aac", str(target)],
+        check=True,
+    )
+
+    waveform = decode_audio(target.read_bytes(), "m4a", 16000, max_duration=10)
+
+    assert waveform.shape == (160000,)
+
+
+def _stream(audio: bytes, audio_format: str, chunk_size: int = 8192, **kwargs) -> StreamingDecoder:
+    decoder = StreamingDecoder(audio_format, 16000, **kwargs)
+    for start in range(0, len(audio), chunk_size):
+        decoder.feed(audio[start:start + chunk_size])
+    return decoder
+
+
+@needs_ffmpeg
+@pytest.mark.parametrize("quality", ["hq", "qq"])
+def test_stream_matches_unary_decode(quality):
+    audio = _wav()
+    decoder = _stream(audio, "wav", quality=quality)
+
+    assert decoder.incremental
+    np.testing.assert_allclose(decoder.finish(), decode_audio(audio, "wav", 16000, quality=quality), atol=1e-5)
+
+
+@needs_ffmpeg
+def test_stream_stops_at_max_duration():
+    decoder = _stream(_wav(20), "wav", chunk_size=4096, max_duration=2)
+    decoder._reader.join(10)
+
+    assert decoder.done
+    assert decoder.finish().shape == (32000,)
+
+
+@needs_ffmpeg
+def test_stream_does_not_keep_piped_input():
+    audio = _wav()
+    decoder = _stream(audio, "wav")
+
+    assert decoder.bytes_received == len(audio)
+    assert decoder.buffered_bytes() == b""
+
+
+@needs_ffmpeg
+def test_stream_reports_undecodable_input():
+    decoder = _stream(b"\x1aE\xdf\xa3 not really webm" * 100, "webm")
+
+    with pytest.raises(ValueError, match="Could not decode webm audio"):
+        decoder.finish()
+    assert decoder.error
+
+
+def test_mp4_family_is_buffered():
+    audio = _wav(0.5)
+    decoder = _stream(audio, "m4a")
+
+    assert not decoder.incremental
+    assert decoder.finish() is None
+    assert decoder.buffered_bytes() == audio
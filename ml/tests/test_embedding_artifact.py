@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from src.embedding_artifact import (
+    EmbeddingArtifact,
+    EmbeddingWriter,
+    open_artifact,
+    url_path,
+    write_artifact,
+)
+
+URLS = ["https://example.com/a.jpg", "", "https://例え.jp/画像.png", "x" * 3000]
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_round_trip(tmp_path, dtype):
+    embeddings = np.random.default_rng(0).standard_normal((len(URLS), 16)).astype(np.float32)
+    path = tmp_path / "images.emb"
+
+    write_artifact(path, URLS, embeddings, "openai/clip-vit-base-patch32", dtype=dtype, chunk_size=3)
+    artifact = EmbeddingArtifact(path)
+
+    assert len(artifact) == len(URLS)
+    assert artifact.dim == 16
+    assert artifact.dtype == dtype
+    assert artifact.model_id == "openai/clip-vit-base-patch32"
+    assert list(artifact.urls) == URLS
+    assert artifact.urls[-1] == URLS[-1]
+    expected = embeddings.astype(np.float16).astype(np.float32) if dtype == "float16" else embeddings
+    np.testing.assert_array_equal(artifact.as_float32(), expected)
+
+
+def test_streamed_batches_match_one_shot(tmp_path):
+    embeddings = np.random.default_rng(1).standard_normal((10, 8)).astype(np.float32)
+    urls = [f"https://example.com/{i}.jpg" for i in range(10)]
+
+    with EmbeddingWriter(tmp_path / "streamed.emb", 8, "m") as writer:
+        writer.append(urls[0], embeddings[0])
+        writer.append_batch(urls[1:7], embeddings[1:7])
+        writer.append_batch(urls[7:], embeddings[7:])
+    write_artifact(tmp_path / "whole.emb", urls, embeddings, "m")
+
+    assert (tmp_path / "streamed.emb").read_bytes() == (tmp_path / "whole.emb").read_bytes()
+    assert url_path(tmp_path / "streamed.emb").read_bytes() == url_path(tmp_path / "whole.emb").read_bytes()
+
+
+def test_empty_artifact(tmp_path):
+    path = tmp_path / "empty.emb"
+    write_artifact(path, [], np.empty((0, 4), dtype=np.float32), "m")
+    artifact = EmbeddingArtifact(path)
+
+    assert len(artifact) == 0
+    assert artifact.embeddings.shape == (0, 4)
+    assert list(artifact.urls) == []
+
+
+def test_failed_write_leaves_nothing(tmp_path):
+    path = tmp_path / "images.emb"
+    with pytest.raises(ValueError):
+        with EmbeddingWriter(path, 4, "m") as writer:
+            writer.append_batch(["a"], np.zeros((1, 4)))
+            writer.append_batch(["b"], np.zeros((1, 5)))
+
+    assert list(tmp_path.iterdir()) == []
+    assert open_artifact(path) is None
+
+
+def test_rejects_foreign_files(tmp_path):
+    path = tmp_path / "images.emb"
+    path.write_bytes(b"\0" * 512)
+    with pytest.raises(ValueError, match="not an embedding artifact"):
+        EmbeddingArtifact(path)
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from src.config import config
+from src.embedding_manifest import EmbeddingManifest
+
+DIM = config.EMBEDDING_DIM
+
+
+def _embeddings(n: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "image_manifest.npz"
+
+
+def test_checkpoints_append_shards(path):
+    manifest = EmbeddingManifest.load(path, "model-a")
+    urls = [f"u{i}" for i in range(6)]
+    embeddings = _embeddings(6)
+
+    manifest.record(urls[:3], embeddings[:3])
+    manifest.checkpoint()
+    manifest.record(urls[3:5], embeddings[3:5])
+    manifest.record_failures([("u5", "404")])
+    manifest.checkpoint()
+    manifest.checkpoint()
+
+    assert not path.exists()
+    shards = sorted(manifest.shard_dir.iterdir())
+    assert [p.name for p in shards] == ["000000.npz", "000001.npz"]
+    with np.load(shards[1]) as data:
+        assert data["embeddings"].shape == (2, DIM)
+
+    resumed = EmbeddingManifest.load(path, "model-a")
+    assert resumed.pending(urls) == ["u5"]
+    assert resumed.failures() == [("u5", "404")]
+    valid, matrix = resumed.embeddings(urls)
+    assert valid == urls[:5]
+    np.testing.assert_array_equal(matrix, embeddings[:5])
+
+
+def test_later_shards_win(path):
+    manifest = EmbeddingManifest.load(path, "model-a")
+    manifest.record_failures([("u0", "timeout")])
+    manifest.checkpoint()
+    manifest.record(["u0"], _embeddings(1))
+    manifest.checkpoint()
+
+    resumed = EmbeddingManifest.load(path, "model-a")
+    assert resumed.pending(["u0"]) == []
+    assert resumed.failures() == []
+
+
+def test_save_compacts_and_prunes_other_models(path):
+    old = EmbeddingManifest.load(path, "model-a")
+    old.record(["u0", "u1"], _embeddings(2, seed=1))
+    old.save()
+
+    manifest = EmbeddingManifest.load(path, "model-b")
+    manifest.record(["u0"], _embeddings(1, seed=2))
+    manifest.checkpoint()
+    resumed = EmbeddingManifest.load(path, "model-b")
+    assert len(resumed) == 3
+    resumed.record_failures([("u1", "decode failed")])
+    resumed.checkpoint()
+    resumed.save()
+
+    assert not resumed.shard_dir.exists()
+    compacted = EmbeddingManifest.load(path, "model-b")
+    assert len(compacted) == 2
+    assert compacted.pending(["u0", "u1"]) == ["u1"]
+    np.testing.assert_array_equal(compacted.embeddings(["u0"])[1], _embeddings(1, seed=2))
+    assert EmbeddingManifest.load(path, "model-a").pending(["u0", "u1"]) == ["u0", "u1"]
+
+
+def test_checkpoints_after_a_save_start_a_new_log(path):
+    manifest = EmbeddingManifest.load(path, "model-a")
+    manifest.record(["u0"], _embeddings(1))
+    manifest.checkpoint()
+    manifest.save()
+    manifest.record(["u1"], _embeddings(1, seed=3))
+    manifest.checkpoint()
+
+    assert [p.name for p in manifest.shard_dir.iterdir()] == ["000000.npz"]
+    assert EmbeddingManifest.load(path, "model-a").pending(["u0", "u1"]) == []
@@ -0,0 +1,55 @@
+import threading
+import time
+
+import pytest
+
+from src.config import config
+from src.server import MLServiceServicer
+
+
+class FakeContext:
+    def __init__(self):
+        self.trailing_metadata = None
+
+    def set_trailing_metadata(self, metadata):
+        self.trailing_metadata = metadata
+
+
+@pytest.fixture
+def servicer(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "ANALYSIS_CACHE_DIR", "")
+    monkeypatch.setattr(config, "PROFILE_DIR", str(tmp_path))
+    return MLServiceServicer()
+
+
+def test_profiled_calls_run_one_at_a_time(servicer):
+    running = 0
+    overlapped = False
+    lock = threading.Lock()
+
+    def work():
+        nonlocal running, overlapped
+        with lock:
+            running += 1
+            overlapped |= running > 1
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return "done"
+
+    contexts = [FakeContext() for _ in range(4)]
+    results = []
+    threads = [
+        threading.Thread(target=lambda context=context: results.append(servicer._profiled(context, "Test", work)))
+        for context in contexts
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["done"] * 4
+    assert not overlapped
+    profile_ids = {context.trailing_metadata[0][1] for context in contexts}
+    assert len(profile_ids) == 4
+    assert all(servicer.profiles.path(profile_id) for profile_id in profile_ids)
@@ -0,0 +1,73 @@
+import grpc
+import pytest
+
+from src.config import config
+from src.server import MLServiceServicer, ml_service_pb2
+
+
+class FakeContext:
+    """Records the status a handler sets."""
+
+    def __init__(self):
+        self.code = None
+        self.details = None
+
+    def set_code(self, code):
+        self.code = code
+
+    def set_details(self, details):
+        self.details = details
+
+    def invocation_metadata(self):
+        return ()
+
+
+@pytest.fixture
+def servicer(monkeypatch):
+    # No models are loaded; these requests must fail before reaching them
+    monkeypatch.setattr(config, "ANALYSIS_CACHE_DIR", "")
+    return MLServiceServicer()
+
+
+def test_empty_stream_is_invalid_argument(servicer):
+    context = FakeContext()
+
+    response = servicer.AnalyzeAudioStream(iter([]), context)
+
+    assert context.code == grpc.StatusCode.INVALID_ARGUMENT
+    assert context.details == "No audio chunks received"
+    assert response == ml_service_pb2.AnalyzeAudioResponse()
+
+
+def _slider(value: float = 0.5):
+    return ml_service_pb2.MoodSetting(energy=value, valence=value, tempo=value, texture=value)
+
+
+@pytest.mark.parametrize(
+    "base_embedding, settings, top_k, details",
+    [
+        ([], [_slider()], 0, "Expected a 512-dim embedding, got 0 values"),
+        ([0.1] * 3, [_slider()], 0, "Expected a 512-dim embedding, got 3 values"),
+        ([float("nan")] * 512, [_slider()], 0, "Embedding contains NaN or infinite values"),
+        ([0.1] * 512, [], 0, "settings must not be empty"),
+        ([0.1] * 512, [_slider()], -1, "top_k must not be negative, got -1"),
+    ],
+)
+def test_malformed_batch_refine_is_invalid_argument(servicer, base_embedding, settings, top_k, details):
+    context = FakeContext()
+    request = ml_service_pb2.BatchRefineRequest(base_embedding=base_embedding, settings=settings, top_k=top_k)
+
+    response = servicer.BatchRefine(request, context)
+
+    assert context.code == grpc.StatusCode.INVALID_ARGUMENT
+    assert context.details == details
+    assert response == ml_service_pb2.BatchRefineResponse()
+
+
+def test_malformed_refine_embedding_is_invalid_argument(servicer):
+    context = FakeContext()
+    request = ml_service_pb2.RefineEmbeddingRequest(base_embedding=[0.1] * 3, energy=0.5)
+
+    servicer.RefineEmbedding(request, context)
+
+    assert context.code == grpc.StatusCode.INVALID_ARGUMENT
@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from src import http_server
+from src.analysis_cache import AnalysisCache
+from src.audio_encoder import AudioEncoder
+from src.scheduler import InferenceScheduler
+from src.warmup import StartupState
+from src.worker_pool import AnalysisPool
+
+MOOD = {"energy": 0.5, "valence": 0.25, "tempo": 0.75, "texture": 1.0}
+
+
+class ThreadPool(AnalysisPool):
+    """AnalysisPool on threads, encoding a clip as its first byte."""
+
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.encoded = 0
+
+    def submit_encode(self, audio_data, audio_format="wav", profile=None):
+        def encode():
+            if audio_data == b"bad":
+                raise ValueError("Could not decode")
+            self.encoded += 1
+            return np.full(4, audio_data[0], dtype=np.float32), MOOD, {}
+
+        return self.executor.submit(encode)
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+
+class StubBridge:
+    def project_to_clip_space(self, embedding):
+        return embedding * 2
+
+
+@pytest.fixture
+def client(monkeypatch):
+    startup = StartupState()
+    startup.mark_ready()
+    pool = ThreadPool()
+    # A queue far smaller than the batch: only one admission fits
+    scheduler = InferenceScheduler(max_concurrency=1, max_queue=1)
+
+    monkeypatch.setattr(http_server, "startup_state", startup)
+    monkeypatch.setattr(http_server, "audio_encoder", AudioEncoder())
+    monkeypatch.setattr(http_server, "analysis_cache", AnalysisCache(max_entries=100, disk_dir=""))
+    monkeypatch.setattr(http_server, "bridge", StubBridge())
+    monkeypatch.setattr(http_server, "analysis_pool", pool)
+    monkeypatch.setattr(http_server, "scheduler", scheduler)
+
+    # Not entered as a context manager, so startup (model loading) never runs
+    yield TestClient(http_server.app)
+    pool.shutdown()
+
+
+def _files(payloads):
+    return [("audio", (f"clip{i}.wav", payload, "audio/wav")) for i, payload in enumerate(payloads)]
+
+
+def test_large_batch_takes_one_admission(client):
+    payloads = [bytes([i]) for i in range(45)]
+    response = client.post("/analyze/batch", files=_files(payloads))
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 45
+    assert all("error" not in result for result in results)
+    assert [result["embedding"][0] for result in results] == [2.0 * i for i in range(45)]
+
+    stats = http_server.scheduler.stats()
+    assert stats["completed"] == 1 and stats["rejected"] == 0
+
+
+def test_batch_reports_per_clip_errors(client):
+    response = client.post("/analyze/batch", files=_files([b"\x01", b"bad", b"\x03"]))
+
+    results = response.json()["results"]
+    assert results[0]["embedding"] == [2.0] * 4
+    assert results[1] == {"error": "Could not decode"}
+    assert results[2]["embedding"] == [6.0] * 4
+
+
+def test_batch_rejects_unknown_profile(client):
+    response = client.post("/analyze/batch", params={"profile": "nope"}, files=_files([b"\x01"]))
+    assert response.status_code == 400
+
+
+def test_batch_reuses_cached_analyses(client):
+    payloads = [b"\x01", b"\x02", b"bad"]
+    first = client.post("/analyze/batch", files=_files(payloads)).json()["results"]
+    assert http_server.analysis_pool.encoded == 2
+
+    # Same clips again, plus one new: only the new clip and the failure are retried
+    second = client.post("/analyze/batch", files=_files([*payloads, b"\x04"])).json()["results"]
+    assert http_server.analysis_pool.encoded == 3
+    assert second[:3] == first
+    assert second[3]["embedding"] == [8.0] * 4
+
+    stats = http_server.analysis_cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 5
@@ -0,0 +1,131 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.image_pipeline import ImagePipeline
+
+# Distinct solid colours, so an embedding identifies its source image
+COLORS = [(10 * i, 255 - 10 * i, (37 * i) % 256) for i in range(20)]
+
+
+def _png(color) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (8, 8), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class FakeBridge:
+    """Embeds an image as its mean RGB colour."""
+
+    embedding_dim = 3
+
+    def __init__(self):
+        self.batches = []
+
+    def encode_images(self, images):
+        self.batches.append(len(images))
+        return np.array([np.asarray(image, dtype=np.float32).mean(axis=(0, 1)) for image in images])
+
+
+@pytest.fixture(scope="module")
+def image_server():
+    """Local stand-in for the image host: /img/<i>.png, /broken.png, everything else 404."""
+    routes = {f"/img/{i}.png": _png(color) for i, color in enumerate(COLORS)}
+    routes["/broken.png"] = b"not an image"
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = routes.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def _run(pipeline: ImagePipeline, urls: list[str], timeout: float = 30):
+    """pipeline.run with a watchdog, so a lost result fails instead of hanging."""
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(value=pipeline.run(urls)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "ImagePipeline.run did not finish"
+    return result["value"]
+
+
+def test_preserves_input_order(image_server):
+    bridge = FakeBridge()
+    urls = [f"{image_server}/img/{i}.png" for i in range(len(COLORS))]
+    pipeline = ImagePipeline(bridge, download_workers=8, decode_workers=3, batch_size=4, retries=0)
+
+    kept, embeddings, failures = _run(pipeline, urls)
+
+    assert kept == urls
+    assert failures == []
+    np.testing.assert_allclose(embeddings, np.array(COLORS, dtype=np.float32))
+    assert sum(bridge.batches) == len(urls)
+    assert max(bridge.batches) <= 4
+
+
+def test_reports_failures_per_url(image_server):
+    good = [f"{image_server}/img/{i}.png" for i in range(3)]
+    missing = f"{image_server}/img/missing.png"
+    broken = f"{image_server}/broken.png"
+    urls = [good[0], missing, good[1], broken, "not-a-url", "http://", good[2]]
+    pipeline = ImagePipeline(FakeBridge(), download_workers=4, decode_workers=2, batch_size=2, retries=0)
+
+    kept, embeddings, failures = _run(pipeline, urls)
+
+    assert kept == good
+    np.testing.assert_allclose(embeddings, np.array(COLORS[:3], dtype=np.float32))
+    reasons = dict(failures)
+    assert [url for url, _ in failures] == [missing, broken, "not-a-url", "http://"]
+    assert "404" in reasons[missing]
+    assert reasons[broken].startswith("decode failed")
+    assert reasons["not-a-url"].startswith("download failed")
+    assert reasons["http://"].startswith("download failed")
+
+
+def test_unexpected_download_error_is_a_failure(image_server):
+    class ExplodingSession:
+        def get(self, url, timeout=None):
+            raise RuntimeError("boom")
+
+    urls = [f"{image_server}/img/0.png", f"{image_server}/img/1.png"]
+    pipeline = ImagePipeline(FakeBridge(), download_workers=2, decode_workers=1, session=ExplodingSession())
+
+    kept, embeddings, failures = _run(pipeline, urls)
+
+    assert kept == []
+    assert embeddings.shape == (0, FakeBridge.embedding_dim)
+    assert [reason for _, reason in failures] == ["download failed: boom"] * 2
+
+
+def test_encode_failure_fails_the_batch(image_server):
+    class FailingBridge(FakeBridge):
+        def encode_images(self, images):
+            raise RuntimeError("out of memory")
+
+    urls = [f"{image_server}/img/{i}.png" for i in range(3)]
+    pipeline = ImagePipeline(FailingBridge(), download_workers=2, decode_workers=1, batch_size=8, retries=0)
+
+    kept, _, failures = _run(pipeline, urls)
+
+    assert kept == []
+    assert [url for url, _ in failures] == urls
+    assert all(reason == "encode failed: out of memory" for _, reason in failures)
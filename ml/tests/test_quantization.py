@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from src.embedding_artifact import write_artifact
+from src.quantization import QuantizedIndex, quantized_path, recall_at_k
+from src.search import SearchIndex, load_index
+
+
+def clustered(rng: np.random.Generator, n: int = 4000, dim: int = 64) -> np.ndarray:
+    """Unit vectors around a few hundred centres, like CLIP image embeddings."""
+    centres = rng.standard_normal((200, dim))
+    embeddings = centres[rng.integers(0, len(centres), n)] + 0.3 * rng.standard_normal((n, dim))
+    return (embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = np.random.default_rng(0)
+    embeddings = clustered(rng)
+    queries = embeddings[rng.choice(len(embeddings), 100, replace=False)] + 0.05 * rng.standard_normal((100, 64))
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return SearchIndex(embeddings), queries.astype(np.float32)
+
+
+@pytest.mark.parametrize("codec, kwargs, minimum", [
+    ("sq8", {}, 0.99),
+    ("pq", {"subspaces": 16}, 0.95),
+])
+def test_recall(corpus, codec, kwargs, minimum):
+    exact, queries = corpus
+    quantized = QuantizedIndex.build(exact, codec, rerank=200, **kwargs)
+
+    assert recall_at_k(quantized, exact, queries, top_k=20) >= minimum
+
+
+def test_full_rerank_is_exact(corpus):
+    exact, queries = corpus
+    quantized = QuantizedIndex.build(exact, "pq", rerank=len(exact), subspaces=16)
+
+    indices, scores = quantized.search_batch(queries, 20)
+    expected_indices, expected_scores = exact.search_batch(queries, 20)
+
+    np.testing.assert_array_equal(indices, expected_indices)
+    np.testing.assert_array_equal(scores, expected_scores)
+
+
+@pytest.mark.parametrize("codec, kwargs", [("sq8", {}), ("pq", {"subspaces": 8})])
+def test_save_load_round_trip(tmp_path, corpus, codec, kwargs):
+    exact, queries = corpus
+    quantized = QuantizedIndex.build(exact, codec, rerank=50, **kwargs)
+    path = tmp_path / "images.quant.npz"
+    quantized.save(path)
+
+    loaded = QuantizedIndex.load(path, exact, rerank=50)
+
+    assert loaded.quantizer.codec == codec
+    np.testing.assert_array_equal(loaded.codes, quantized.codes)
+    for original, restored in zip(quantized.search_batch(queries, 20), loaded.search_batch(queries, 20)):
+        np.testing.assert_array_equal(original, restored)
+
+
+def test_rejects_codes_from_another_corpus(tmp_path, corpus):
+    exact, _ = corpus
+    path = tmp_path / "images.quant.npz"
+    QuantizedIndex.build(exact, "sq8").save(path)
+
+    rebuilt = SearchIndex(exact.embeddings[::-1].copy())
+    with pytest.raises(ValueError, match="different corpus"):
+        QuantizedIndex.load(path, rebuilt)
+
+
+def test_load_index_ignores_stale_codes(tmp_path, monkeypatch, corpus):
+    exact, _ = corpus
+    artifact = tmp_path / "images.emb"
+    urls = [str(i) for i in range(len(exact))]
+    write_artifact(artifact, urls, exact.embeddings, "m")
+    monkeypatch.setattr("src.search.config.SEARCH_QUANTIZED", True)
+
+    QuantizedIndex.build(SearchIndex.from_artifact(artifact), "sq8").save(quantized_path(artifact))
+    assert isinstance(load_index(artifact), QuantizedIndex)
+
+    write_artifact(artifact, urls[:100], exact.embeddings[:100], "m")
+    index = load_index(artifact)
+    assert isinstance(index, SearchIndex) and len(index) == 100
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from src.bridge import CrossModalBridge
+from src.refine_search import RefineSearch
+from src.search import SearchIndex
+
+DIM = 64
+
+
+class StubBridge(CrossModalBridge):
+    """CrossModalBridge with fixed random mood directions and no CLIP model."""
+
+    def __init__(self, directions: np.ndarray):
+        super().__init__()
+        self._direction_matrix = directions
+
+    def load_model(self):
+        pass
+
+
+@pytest.fixture(scope="module")
+def setup():
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((3000, DIM)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    # Duplicates, so tie order is exercised too
+    embeddings[2000:2050] = embeddings[7]
+    directions = rng.standard_normal((4, DIM)).astype(np.float32)
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+
+    settings = np.concatenate([
+        rng.random((20, 4)),
+        [[0.5, 0.5, 0.5, 0.5], [0, 0, 0, 0], [1, 1, 1, 1], [1, 0, 1, 0]],
+    ]).astype(np.float32)
+    return embeddings, StubBridge(directions), settings, rng
+
+
+@pytest.mark.parametrize("metric", ["l2", "cosine"])
+@pytest.mark.parametrize("top_k", [1, 20, 100])
+def test_matches_search_batch(setup, metric, top_k):
+    embeddings, bridge, settings, rng = setup
+    index = SearchIndex(embeddings, metric=metric)
+    refine = RefineSearch(index, bridge)
+
+    for base in (embeddings[7], embeddings[42] + 0.01 * rng.standard_normal(DIM).astype(np.float32)):
+        refined, indices, scores = refine.search(base, settings, top_k)
+        expected_indices, expected_scores = index.search_batch(refined, top_k)
+
+        np.testing.assert_array_equal(refined, bridge.refine_embeddings(base, settings))
+        np.testing.assert_array_equal(indices, expected_indices)
+        np.testing.assert_array_equal(scores, expected_scores)
+
+
+def test_cached_base_terms_give_the_same_results(setup):
+    embeddings, bridge, settings, _ = setup
+    refine = RefineSearch(SearchIndex(embeddings), bridge, max_bases=1)
+
+    first = refine.search(embeddings[3], settings)
+    refine.search(embeddings[4], settings)
+    again = refine.search(embeddings[3], settings)
+
+    for a, b in zip(first, again):
+        np.testing.assert_array_equal(a, b)
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from src.search import SearchIndex
+
+
+def brute_force(embeddings: np.ndarray, query: np.ndarray, top_k: int, metric: str):
+    """Score every row the direct way and sort by (score, index)."""
+    if metric == "l2":
+        scores = np.array([np.sqrt(np.dot(query - row, query - row)) for row in embeddings], dtype=np.float32)
+    else:
+        query_norm = np.linalg.norm(query)
+        scores = np.array([
+            1 - np.dot(query, row) / (query_norm * np.linalg.norm(row)) if np.linalg.norm(row) > 0 else 1.0
+            for row in embeddings
+        ], dtype=np.float32)
+    order = np.lexsort((np.arange(len(scores)), scores))[:top_k]
+    return order, scores[order]
+
+
+def corpus(rng: np.random.Generator, n: int = 2000, dim: int = 64) -> np.ndarray:
+    embeddings = rng.standard_normal((n, dim)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    # Exact duplicates make ties whose order must follow the corpus
+    embeddings[1500:1600] = embeddings[100]
+    embeddings[1999] = 0
+    return embeddings
+
+
+@pytest.mark.parametrize("metric", ["l2", "cosine"])
+@pytest.mark.parametrize("top_k", [1, 20, 150])
+def test_top_k_matches_brute_force(metric, top_k):
+    rng = np.random.default_rng(0)
+    embeddings = corpus(rng)
+    queries = np.concatenate([
+        rng.standard_normal((8, embeddings.shape[1])).astype(np.float32),
+        embeddings[[100, 5]] + 1e-3,
+    ])
+    index = SearchIndex(embeddings, metric=metric)
+
+    indices, scores = index.search_batch(queries, top_k)
+
+    for query, row_indices, row_scores in zip(queries, indices, scores):
+        expected_indices, expected_scores = brute_force(embeddings, query, top_k, metric)
+        np.testing.assert_array_equal(row_indices, expected_indices)
+        np.testing.assert_allclose(row_scores, expected_scores, rtol=1e-5, atol=1e-6)
+
+
+def test_ties_keep_corpus_order():
+    embeddings = np.ones((50, 8), dtype=np.float32)
+    indices, scores = SearchIndex(embeddings).search(np.zeros(8, dtype=np.float32), 10)
+
+    np.testing.assert_array_equal(indices, np.arange(10))
+    assert np.all(scores == scores[0])
+
+
+def test_top_k_larger_than_corpus():
+    embeddings = np.random.default_rng(1).standard_normal((5, 4)).astype(np.float32)
+    indices, scores = SearchIndex(embeddings).search(embeddings[2], 50)
+
+    assert sorted(indices) == list(range(5))
+    assert indices[0] == 2
+    assert np.all(np.diff(scores) >= 0)
+
+
+def test_results_carry_urls():
+    embeddings = np.eye(3, dtype=np.float32)
+    index = SearchIndex(embeddings, urls=["a", "b", "c"])
+
+    results = index.results(np.array([0, 1, 0], dtype=np.float32), 2)
+
+    assert [r["image_url"] for r in results] == ["b", "a"]
+    assert results[0]["score"] == pytest.approx(0.0)
+
+
+def test_rejects_wrong_query_dimension():
+    index = SearchIndex(np.zeros((3, 4), dtype=np.float32))
+    with pytest.raises(ValueError):
+        index.search(np.zeros(5, dtype=np.float32))
@@ -0,0 +1,62 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+from src.warmup import synthetic_clip
+from src.worker_pool import AnalysisPool
+
+
+def _die_once(marker: str) -> int:
+    """Kill the worker the first time it runs; return its pid after that."""
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return os.getpid()
+
+
+def _die() -> int:
+    os._exit(1)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    # Spawned workers read the config from the environment
+    monkeypatch.setenv("WARMUP", "false")
+    pool = AnalysisPool(max_workers=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_future_survives_worker_death(pool, tmp_path):
+    pool.warm_up()
+    future = pool._submit(_die_once, str(tmp_path / "died"))
+    assert future.result(timeout=120) != os.getpid()
+
+
+def test_pool_gives_up_after_one_rebuild(pool):
+    with pytest.raises(BrokenProcessPool):
+        pool._submit(_die).result(timeout=120)
+
+    # The pool is usable again afterwards
+    assert pool._submit(os.getpid).result(timeout=120) != os.getpid()
+
+
+def test_analyze_batch_projects_in_parent(pool):
+    parent = os.getpid()
+    projected_in = []
+
+    def project(embedding):
+        projected_in.append(os.getpid())
+        return np.asarray(embedding) * 2
+
+    results = pool.analyze_batch([(synthetic_clip(2.0), "wav"), (b"not audio", "wav")], project)
+
+    clip_embedding, mood, error = results[0]
+    assert error is None
+    assert clip_embedding.ndim == 1 and set(mood) >= {"energy", "valence", "tempo", "texture"}
+    assert projected_in == [parent]
+
+    clip_embedding, mood, error = results[1]
+    assert clip_embedding is None and mood is None and error
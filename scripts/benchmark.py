@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the ML pipeline.
+
+Everything runs on synthetic inputs, so no network or dataset is needed
+(only the CLIP weights, from the local HuggingFace cache):
+
+- audio: sine, noise and click tracks of 5s, 30s and 5min at several
+  sample rates and formats, timed per AudioEncoder.encode stage
+  (decode, resample, features, embedding, mood)
+- bridge: project_to_clip_space, refine_embedding, refine_embeddings
+- clip: encode_images / encode_texts at several batch sizes
+- search: exact SearchIndex top-k over random corpora of 1k to 1M
+
+Each case reports median and p95 wall time over --repeats runs and the
+peak resident memory it added. Results are tagged with the machine
+(CPU model, core count, Python and torch versions). --save-baseline
+stores them under scripts/baselines/<machine>.json; --compare checks a
+run against that baseline and exits non-zero on regressions.
+
+Usage:
+    cd ml && uv run python ../scripts/benchmark.py [--quick] [--filter audio/] [--save-baseline | --compare]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "ml"))
+
+from src.audio_encoder import AudioEncoder
+from src.config import config
+from src.search import SearchIndex
+from src.warmup import configure_numba_cache
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+SIGNALS = ("sine", "noise", "click")
+DURATIONS = (5, 30, 300)
+SAMPLE_RATES = (16000, 22050, 44100, 48000)
+FORMATS = {"wav": "PCM_16", "flac": "PCM_16", "mp3": "MPEG_LAYER_III", "ogg": "VORBIS"}
+CLIP_BATCH_SIZES = (1, 8, 32)
+CORPUS_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+# Cases whose median moved by less than this are never flagged, whatever the ratio
+NOISE_FLOOR_MS = 0.5
+
+
+def machine_tag() -> str:
+    """Identifier of the hardware and runtime the numbers are comparable on."""
+    cpu = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpu = next(line.split(":", 1)[1] for line in f if line.startswith("model name"))
+    except (OSError, StopIteration):
+        pass
+    cpu = re.sub(r"\(r\)|\(tm\)|cpu|processor|@.*", "", cpu, flags=re.IGNORECASE)
+    cpu = re.sub(r"[^a-z0-9]+", "-", cpu.lower()).strip("-")
+
+    import torch
+    torch_version = torch.__version__.split("+")[0]
+    python = f"py{sys.version_info.major}{sys.version_info.minor}"
+    return f"{platform.machine()}-{cpu}-{os.cpu_count()}c-{python}-torch{torch_version}"
+
+
+class PeakMemory:
+    """
+    Peak memory added while the block runs, in MB.
+
+    On Linux the kernel's resident high-water mark is reset on entry, so
+    native allocations (numpy, torch, libsndfile) count. Elsewhere only
+    Python-visible allocations are tracked, via tracemalloc.
+    """
+
+    def __enter__(self):
+        self.peak_mb = 0.0
+        self._native = _reset_rss_peak()
+        if self._native:
+            self._start_kb = _proc_status_kb("VmRSS")
+        else:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._native:
+            self.peak_mb = max(_proc_status_kb("VmHWM") - self._start_kb, 0) / 1024
+        else:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.peak_mb = peak / 1024 / 1024
+
+
+def _reset_rss_peak() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _proc_status_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _stats(seconds: list[float]) -> dict:
+    ms = np.asarray(seconds) * 1000
+    return {
+        "median_ms": round(float(np.median(ms)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "min_ms": round(float(ms.min()), 3),
+        "runs": len(ms),
+    }
+
+
+class Suite:
+    """Runs benchmark cases and collects their statistics."""
+
+    def __init__(self, repeats: int, warmup: int, pattern: Optional[str]):
+        self.repeats = repeats
+        self.warmup = warmup
+        self.pattern = re.compile(pattern) if pattern else None
+        self.results: dict[str, dict] = {}
+
+    def wants(self, name: str) -> bool:
+        return self.pattern is None or bool(self.pattern.search(name))
+
+    def run(self, name: str, fn: Callable[[], Optional[dict]], repeats: Optional[int] = None):
+        """
+        Time fn. If it returns a dict of stage timings (seconds), each
+        stage is also reported as "<name>/<stage>".
+        """
+        if not self.wants(name):
+            return
+        repeats = repeats or self.repeats
+
+        for _ in range(self.warmup):
+            fn()
+
+        totals, stages = [], {}
+        with PeakMemory() as memory:
+            for _ in range(repeats):
+                started = time.perf_counter()
+                timings = fn()
+                totals.append(time.perf_counter() - started)
+                if isinstance(timings, dict):
+                    for stage, seconds in timings.items():
+                        if isinstance(seconds, float):
+                            stages.setdefault(stage, []).append(seconds)
+
+        self.results[name] = {**_stats(totals), "peak_mb": round(memory.peak_mb, 1)}
+        for stage, seconds in stages.items():
+            self.results[f"{name}/{stage}"] = _stats(seconds)
+
+        result = self.results[name]
+        print(
+            f"{name:<44} median {result['median_ms']:>10.3f}ms  p95 {result['p95_ms']:>10.3f}ms  "
+            f"peak {result['peak_mb']:>7.1f}MB"
+        )
+
+
+def synth_audio(signal: str, duration: float, sample_rate: int, seed: int = 0) -> np.ndarray:
+    """Mono float32 test signal: a chord, white noise, or a 120 BPM click track."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * sample_rate), dtype=np.float32) / sample_rate
+    if signal == "sine":
+        waveform = sum(np.sin(2 * np.pi * freq * t) for freq in (220.0, 277.2, 329.6)) / 4
+    elif signal == "noise":
+        waveform = rng.standard_normal(t.size).astype(np.float32) * 0.2
+    elif signal == "click":
+        beat_phase = (t * 2.0) % 1.0
+        waveform = np.exp(-beat_phase * 60) * np.sin(2 * np.pi * 1500 * t) * 0.8
+    else:
+        raise ValueError(f"Unknown signal {signal!r}")
+    return waveform.astype(np.float32)
+
+
+def encode_file(waveform: np.ndarray, sample_rate: int, audio_format: str) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, waveform, sample_rate, format=audio_format.upper(), subtype=FORMATS[audio_format])
+    return buffer.getvalue()
+
+
+def audio_cases(quick: bool) -> list[tuple[str, int, int, str]]:
+    """(signal, duration, sample_rate, format) combinations to benchmark."""
+    durations = DURATIONS[:2] if quick else DURATIONS
+    cases = [(signal, duration, 44100, "wav") for signal in SIGNALS for duration in durations]
+    for audio_format in (("flac",) if quick else ("flac", "mp3", "ogg")):
+        cases.append(("sine", 30, 44100, audio_format))
+    for sample_rate in ((16000,) if quick else SAMPLE_RATES):
+        if sample_rate != 44100:
+            cases.append(("sine", 30, sample_rate, "wav"))
+
+    # libsndfile may lack MP3; long Vorbis encodes crash some builds, so Ogg stays at 30s
+    available = {name.lower() for name in sf.available_formats()}
+    return [case for case in cases if case[3] in available or case[3] == "wav"]
+
+
+def bench_audio(suite: Suite, quick: bool):
+    cases = [
+        (f"audio/{signal}-{duration}s-{sample_rate}hz.{audio_format}", signal, duration, sample_rate, audio_format)
+        for signal, duration, sample_rate, audio_format in audio_cases(quick)
+    ]
+    cases = [case for case in cases if suite.wants(case[0])]
+    if not cases:
+        return
+
+    encoder = AudioEncoder()
+    encoder.load_model()
+    for name, signal, duration, sample_rate, audio_format in cases:
+        audio_data = encode_file(synth_audio(signal, duration, sample_rate), sample_rate, audio_format)
+
+        def encode():
+            timings = {}
+            encoder.encode(audio_data, audio_format, timings)
+            return timings
+
+        suite.run(name, encode)
+
+
+def synth_images(count: int, seed: int = 0) -> list:
+    """Noise-over-gradient RGB images at a typical photo size."""
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(0, 255, 512, dtype=np.float32)[None, :, None]
+    images = []
+    for _ in range(count):
+        pixels = gradient * rng.random(3, dtype=np.float32) + rng.normal(0, 40, (384, 512, 3))
+        images.append(Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)))
+    return images
+
+
+def bench_bridge(suite: Suite, quick: bool):
+    batch_sizes = CLIP_BATCH_SIZES[:2] if quick else CLIP_BATCH_SIZES
+    names = ["bridge/project", "bridge/refine", "bridge/refine_batch-64"]
+    names += [f"clip/{kind}-b{size}" for size in batch_sizes for kind in ("image", "text")]
+    if not any(suite.wants(name) for name in names):
+        return
+
+    from src.bridge import CrossModalBridge
+
+    bridge = CrossModalBridge()
+    bridge.load_model()
+    bridge.load_direction_vectors()
+
+    rng = np.random.default_rng(0)
+    audio_embedding = rng.standard_normal(config.EMBEDDING_DIM).astype(np.float32)
+    audio_embedding /= np.linalg.norm(audio_embedding)
+    base = bridge.project_to_clip_space(audio_embedding)
+    settings = rng.random((64, 4), dtype=np.float32)
+
+    suite.run("bridge/project", lambda: bridge.project_to_clip_space(audio_embedding))
+    suite.run("bridge/refine", lambda: bridge.refine_embedding(base, 0.8, 0.3, 0.6, 0.2))
+    suite.run("bridge/refine_batch-64", lambda: bridge.refine_embeddings(base, settings))
+
+    images = synth_images(max(batch_sizes))
+    words = [word for mood in bridge.MOOD_PROMPTS.values() for group in mood.values() for word in group]
+    texts = [f"a photo that feels {words[i % len(words)]}" for i in range(max(batch_sizes))]
+    for size in batch_sizes:
+        suite.run(f"clip/image-b{size}", lambda: bridge.encode_images(images[:size], batch_size=size))
+        suite.run(f"clip/text-b{size}", lambda: bridge.encode_texts(texts[:size], batch_size=size))
+
+
+def random_corpus(size: int, seed: int = 0, chunk: int = 100_000) -> np.ndarray:
+    """Unit-norm float32 corpus, generated in chunks to bound temporaries."""
+    rng = np.random.default_rng(seed)
+    corpus = np.empty((size, config.EMBEDDING_DIM), dtype=np.float32)
+    for start in range(0, size, chunk):
+        block = corpus[start:start + chunk]
+        block[:] = rng.standard_normal(block.shape, dtype=np.float32)
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+    return corpus
+
+
+def bench_search(suite: Suite, corpus_sizes: tuple[int, ...]):
+    rng = np.random.default_rng(1)
+    queries = rng.standard_normal((16, config.EMBEDDING_DIM), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    for size in corpus_sizes:
+        names = (f"search/exact-{size}", f"search/exact-batch16-{size}")
+        if not any(suite.wants(name) for name in names):
+            continue
+        index = SearchIndex(random_corpus(size))
+        # Large scans are slow enough that fewer runs keep the suite practical
+        repeats = max(3, suite.repeats // 4) if size >= 1_000_000 else None
+        suite.run(names[0], lambda: index.search(queries[0], config.SEARCH_TOP_K), repeats)
+        suite.run(names[1], lambda: index.search_batch(queries, config.SEARCH_TOP_K), repeats)
+        del index
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Print the change of every case against a baseline; returns the regressed names."""
+    regressions = []
+    print(f"\nComparison with baseline from {baseline.get('created', '?')} (threshold {threshold:.0%})")
+    for name, current in results.items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        ratio = current["median_ms"] / previous["median_ms"] if previous["median_ms"] else 1.0
+        regressed = ratio > 1 + threshold and current["median_ms"] - previous["median_ms"] > NOISE_FLOOR_MS
+        if regressed:
+            regressions.append(name)
+        flag = "REGRESSION" if regressed else ("improved" if ratio < 1 - threshold else "")
+        print(
+            f"{name:<52} {previous['median_ms']:>10.3f}ms -> {current['median_ms']:>10.3f}ms "
+            f"({ratio - 1:+7.1%}) {flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ML pipeline on synthetic data")
+    parser.add_argument("--quick", action="store_true", help="Smaller matrix for a fast check")
+    parser.add_argument("--filter", help="Only run cases whose name matches this regex")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed runs before each case")
+    parser.add_argument("--corpus-sizes", type=lambda value: tuple(int(v) for v in value.split(",")),
+                        help=f"Comma-separated search corpus sizes (default {','.join(map(str, CORPUS_SIZES))})")
+    parser.add_argument("--output", type=Path, help="Write the results JSON here")
+    parser.add_argument("--save-baseline", action="store_true", help="Store results as this machine's baseline")
+    parser.add_argument("--compare", action="store_true", help="Compare with this machine's baseline")
+    parser.add_argument("--baseline", type=Path, help="Baseline file (default scripts/baselines/<machine>.json)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Median slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    configure_numba_cache()
+    tag = machine_tag()
+    print(f"Machine: {tag}")
+
+    suite = Suite(args.repeats, args.warmup, args.filter)
+    corpus_sizes = args.corpus_sizes or (CORPUS_SIZES[:3] if args.quick else CORPUS_SIZES)
+
+    bench_audio(suite, args.quick)
+    bench_bridge(suite, args.quick)
+    bench_search(suite, corpus_sizes)
+
+    import librosa
+    import torch
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    report = {
+        "machine": tag,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "versions": {"numpy": np.__version__, "torch": torch.__version__, "librosa": librosa.__version__},
+        "config": {
+            "clip_model": config.CLIP_MODEL,
+            "clip_backend": config.CLIP_BACKEND,
+            "clip_quantize": config.CLIP_QUANTIZE,
+            "resample_quality": config.AUDIO_RESAMPLE_QUALITY,
+            "feature_profile": config.AUDIO_FEATURE_PROFILE,
+        },
+        "quick": args.quick,
+        "repeats": args.repeats,
+        "results": suite.results,
+    }
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    baseline_path = args.baseline or BASELINE_DIR / f"{tag}.json"
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        if baseline_path.exists():
+            # Keep cases this (possibly filtered) run didn't cover
+            previous = json.loads(baseline_path.read_text())
+            report["results"] = {**previous.get("results", {}), **report["results"]}
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Saved baseline to {baseline_path}")
+
+    if args.compare:
+        if not baseline_path.exists():
+            sys.exit(f"No baseline at {baseline_path}; run with --save-baseline first")
+        baseline = json.loads(baseline_path.read_text())
+        if baseline.get("config") != report["config"]:
+            print(f"Warning: baseline config differs: {baseline.get('config')}")
+        regressions = compare(suite.results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
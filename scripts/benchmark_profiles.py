@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Compare the "full" and "fast" audio feature profiles.
+
+Reports per-clip feature extraction latency under each profile and how
+far the fast profile drifts from full: cosine similarity of the audio
+embeddings and of their CLIP projections, and the absolute difference
+of each mood dimension.
+
+Usage:
+    cd ml && uv run python ../scripts/benchmark_profiles.py [audio files...]
+
+Without files, synthetic clips at a range of tempos are used.
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "ml"))
+
+from src.audio_encoder import AudioEncoder
+from src.bridge import CrossModalBridge
+from src.config import config
+from src.warmup import configure_numba_cache, synthetic_clip
+
+MOODS = ("energy", "valence", "tempo", "texture")
+
+
+def synthetic_clips(duration: float) -> dict[str, bytes]:
+    """Pulse-over-chord clips at several tempos and keys."""
+    sample_rate = config.AUDIO_SAMPLE_RATE
+    t = np.arange(int(duration * sample_rate), dtype=np.float32) / sample_rate
+    clips = {"warmup": synthetic_clip(duration)}
+    for bpm, root, minor in ((72, 196.0, True), (96, 261.6, False), (128, 220.0, True), (150, 293.7, False)):
+        third = root * (1.189 if minor else 1.26)
+        chord = sum(np.sin(2 * np.pi * freq * t) for freq in (root, third, root * 1.498)) / 6
+        beat_phase = (t * bpm / 60) % 1.0
+        pulse = np.exp(-beat_phase * 40) * np.sin(2 * np.pi * 1000 * t)
+        buffer = io.BytesIO()
+        sf.write(buffer, (chord + 0.5 * pulse).astype(np.float32), sample_rate, format="WAV", subtype="FLOAT")
+        clips[f"{bpm}bpm-{'minor' if minor else 'major'}"] = buffer.getvalue()
+    return clips
+
+
+def time_encode(encoder: AudioEncoder, waveform: np.ndarray, profile: str, repeats: int):
+    """Best-of-repeats encode_waveform time, with the last result."""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = encoder.encode_waveform(waveform, profile)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark audio feature profiles")
+    parser.add_argument("files", nargs="*", type=Path)
+    parser.add_argument("--duration", type=float, default=config.AUDIO_MAX_DURATION,
+                        help="Length of synthetic clips in seconds")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-clip", action="store_true", help="Skip the CLIP projection comparison")
+    args = parser.parse_args()
+
+    configure_numba_cache()
+    encoder = AudioEncoder()
+    bridge = None if args.no_clip else CrossModalBridge()
+
+    if args.files:
+        clips = {path.name: path.read_bytes() for path in args.files}
+        formats = {path.name: path.suffix for path in args.files}
+    else:
+        clips = synthetic_clips(args.duration)
+        formats = {name: "wav" for name in clips}
+
+    # Compile librosa's numba paths before timing anything
+    encoder.encode(synthetic_clip(), "wav", profile="full")
+    encoder.encode(synthetic_clip(), "wav", profile="fast")
+
+    rows = []
+    for name, audio_data in clips.items():
+        waveform = encoder._load_audio(audio_data, formats[name])
+        full_seconds, (full_embedding, full_mood) = time_encode(encoder, waveform, "full", args.repeats)
+        fast_seconds, (fast_embedding, fast_mood) = time_encode(encoder, waveform, "fast", args.repeats)
+
+        row = {
+            "clip": name,
+            "seconds": round(waveform.size / encoder.sample_rate, 1),
+            "full_ms": round(full_seconds * 1000, 1),
+            "fast_ms": round(fast_seconds * 1000, 1),
+            "speedup": round(full_seconds / fast_seconds, 2),
+            "embedding_cosine": round(float(np.dot(full_embedding, fast_embedding)), 4),
+            **{f"{mood}_drift": round(abs(full_mood[mood] - fast_mood[mood]), 4) for mood in MOODS},
+        }
+        if bridge is not None:
+            full_clip = bridge.project_to_clip_space(full_embedding)
+            fast_clip = bridge.project_to_clip_space(fast_embedding)
+            row["clip_cosine"] = round(float(np.dot(full_clip, fast_clip)), 4)
+        rows.append(row)
+        print(json.dumps(row))
+
+    summary = {
+        "clips": len(rows),
+        "mean_speedup": round(float(np.mean([row["speedup"] for row in rows])), 2),
+        "min_embedding_cosine": min(row["embedding_cosine"] for row in rows),
+        **{f"max_{mood}_drift": max(row[f"{mood}_drift"] for row in rows) for mood in MOODS},
+    }
+    if bridge is not None:
+        summary["min_clip_cosine"] = min(row["clip_cosine"] for row in rows)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,551 @@
+#!/usr/bin/env python3
+"""
+Load generator for the ML service (gRPC MLService or the FastAPI app).
+
+Modes:
+    closed  --concurrency clients each send the next request as soon as
+            the previous one returns (measures capacity)
+    open    requests arrive as a Poisson process at --rate per second,
+            regardless of how fast the server answers (measures latency
+            under a given load). Latency counts from the scheduled
+            arrival, so a backed-up client doesn't hide server queueing.
+
+The request mix is weighted, e.g. ``--mix analyze=8,refine=1,health=1``
+(gRPC: analyze, refine, health; HTTP: analyze, health). Audio comes
+from --audio files or directories, or synthetic clips. By default each
+WAV upload carries a request counter in its last samples, so the
+analysis cache doesn't turn the test into a cache benchmark.
+
+The report has throughput, latency percentiles and error counts per
+operation. It also has server-side handler time and queueing, scraped
+from the metrics endpoint before and after the run, and the mean time
+each operation spent outside its handler (client latency minus handler
+time), which is where gRPC thread-pool queueing shows up. With
+--start-server the tool launches a local server and waits for it to
+be ready. With --sweep-workers it also restarts the server for each
+worker count (GRPC_MAX_WORKERS, GRPC_MAX_IN_FLIGHT for the aio server,
+or INFERENCE_WORKERS) to find where throughput stops scaling.
+
+Usage:
+    cd ml && uv run python ../scripts/loadtest.py --target grpc --start-server --mode closed --concurrency 4
+    cd ml && uv run python ../scripts/loadtest.py --target http --start-server --sweep-workers 1,2,4,8
+    cd ml && uv run python ../scripts/loadtest.py --target grpc --start-server --mode open --rate 12 \
+        --server-env GRPC_SERVER_MODE=aio --server-env GRPC_MAX_IN_FLIGHT=2
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import random
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+ML_DIR = Path(__file__).resolve().parent.parent / "ml"
+sys.path.insert(0, str(ML_DIR))
+sys.path.insert(0, str(ML_DIR / "protos"))
+
+OPERATIONS = {"grpc": ("analyze", "refine", "health"), "http": ("analyze", "health")}
+AUDIO_SUFFIXES = {".wav", ".flac", ".mp3", ".ogg", ".m4a", ".aac", ".webm", ".opus", ".aiff"}
+
+# Server-side series used for the queueing report
+_SAMPLE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(.*)\})? (\S+)$")
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_metrics(text: str) -> dict:
+    """Prometheus text samples as {(name, ((label, value), ...)): value}."""
+    samples = {}
+    for line in text.splitlines():
+        match = _SAMPLE.match(line)
+        if match is None:
+            continue
+        name, _, labels, value = match.groups()
+        samples[(name, tuple(sorted(_LABEL.findall(labels or ""))))] = float(value)
+    return samples
+
+
+def _histogram_delta(before: dict, after: dict, name: str, **labels) -> tuple[float, float]:
+    """(sum, count) added to one histogram series between two scrapes."""
+    key = tuple(sorted(labels.items()))
+    total = after.get((f"{name}_sum", key), 0.0) - before.get((f"{name}_sum", key), 0.0)
+    count = after.get((f"{name}_count", key), 0.0) - before.get((f"{name}_count", key), 0.0)
+    return total, count
+
+
+def load_corpus(paths: list[Path], clips: int) -> list[tuple[bytes, str]]:
+    """(audio_data, format) pairs from files and directories, or synthetic clips."""
+    corpus = []
+    for path in paths:
+        files = sorted(p for p in path.rglob("*") if p.suffix.lower() in AUDIO_SUFFIXES) if path.is_dir() else [path]
+        corpus.extend((f.read_bytes(), f.suffix.lstrip(".").lower()) for f in files)
+    if corpus:
+        return corpus
+
+    from src.warmup import synthetic_clip
+    return [(synthetic_clip(duration), "wav") for duration in np.linspace(5, 30, clips)]
+
+
+def _wav_data(audio_data: bytes) -> Optional[tuple[int, int]]:
+    """(end offset of the sample data, bytes per sample) of a WAV file, or None."""
+    if audio_data[:4] != b"RIFF" or audio_data[8:12] != b"WAVE":
+        return None
+    offset, sample_bytes = 12, None
+    while offset + 8 <= len(audio_data):
+        chunk_id = audio_data[offset:offset + 4]
+        size = int.from_bytes(audio_data[offset + 4:offset + 8], "little")
+        if chunk_id == b"fmt ":
+            sample_bytes = int.from_bytes(audio_data[offset + 22:offset + 24], "little") // 8
+        elif chunk_id == b"data" and sample_bytes:
+            end = min(offset + 8 + size, len(audio_data))
+            return (end, sample_bytes) if end - offset - 8 >= 4 * sample_bytes else None
+        offset += 8 + size + (size & 1)
+    return None
+
+
+_request_ids = itertools.count()
+
+
+def _unique_wav(audio_data: bytes) -> bytes:
+    """
+    The same WAV with a per-request counter in its last four samples, so its content hash is new.
+
+    Each counter byte replaces the least significant byte of one sample,
+    so the audio is unchanged but for those samples' lowest bits.
+    """
+    layout = _wav_data(audio_data)
+    if layout is None:
+        return audio_data
+    end, sample_bytes = layout
+    data = bytearray(audio_data)
+    # Samples are little-endian, so a sample's first byte is its lowest
+    for i, byte in enumerate((next(_request_ids) % 2 ** 32).to_bytes(4, "little")):
+        data[end - (i + 1) * sample_bytes] = byte
+    return bytes(data)
+
+
+class Outcome:
+    __slots__ = ("operation", "latency", "status")
+
+    def __init__(self, operation: str, latency: float, status: str):
+        self.operation = operation
+        self.latency = latency
+        self.status = status
+
+
+class GrpcClient:
+    def __init__(self, address: str, timeout: float):
+        import grpc
+        import ml_service_pb2
+        import ml_service_pb2_grpc
+
+        self.grpc = grpc
+        self.pb = ml_service_pb2
+        max_message_bytes = 100 * 1024 * 1024
+        self.channel = grpc.insecure_channel(address, options=[
+            ("grpc.max_receive_message_length", max_message_bytes),
+            ("grpc.max_send_message_length", max_message_bytes),
+        ])
+        self.stub = ml_service_pb2_grpc.MLServiceStub(self.channel)
+        self.timeout = timeout
+        rng = np.random.default_rng(0)
+        base = rng.standard_normal(512).astype(np.float32)
+        self.base_embedding = (base / np.linalg.norm(base)).tolist()
+
+    def call(self, operation: str, audio: tuple[bytes, str]) -> str:
+        try:
+            if operation == "analyze":
+                audio_data, audio_format = audio
+                self.stub.AnalyzeAudio(
+                    self.pb.AnalyzeAudioRequest(audio_data=audio_data, format=audio_format), timeout=self.timeout
+                )
+            elif operation == "refine":
+                self.stub.RefineEmbedding(self.pb.RefineEmbeddingRequest(
+                    base_embedding=self.base_embedding,
+                    energy=random.random(), valence=random.random(),
+                    tempo=random.random(), texture=random.random(),
+                ), timeout=self.timeout)
+            else:
+                self.stub.HealthCheck(self.pb.HealthCheckRequest(), timeout=self.timeout)
+            return "OK"
+        except self.grpc.RpcError as e:
+            return e.code().name
+
+    def ready(self) -> bool:
+        try:
+            return self.stub.HealthCheck(self.pb.HealthCheckRequest(), timeout=2).ready
+        except self.grpc.RpcError:
+            return False
+
+    def metrics(self) -> Optional[str]:
+        try:
+            return self.stub.GetMetrics(self.pb.GetMetricsRequest(), timeout=5).text
+        except self.grpc.RpcError:
+            return None
+
+
+class HttpClient:
+    """Keep-alive HTTP/1.1 client, one connection per thread."""
+
+    def __init__(self, address: str, timeout: float):
+        host, _, port = address.rpartition(":")
+        self.host, self.port = host or "localhost", int(port)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _request(self, method: str, path: str, body: bytes = b"", headers: Optional[dict] = None):
+        connection = getattr(self._local, "connection", None)
+        # A kept-alive connection may have been closed by the server while idle
+        for reused in ((True, False) if connection is not None else (False,)):
+            if connection is None:
+                connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                self._local.connection = connection
+            try:
+                connection.request(method, path, body=body, headers=headers or {})
+                response = connection.getresponse()
+                return response.status, response.read()
+            except TimeoutError:
+                connection.close()
+                self._local.connection = None
+                raise
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = self._local.connection = None
+                if not reused:
+                    raise
+
+    def call(self, operation: str, audio: tuple[bytes, str]) -> str:
+        try:
+            if operation == "analyze":
+                audio_data, audio_format = audio
+                boundary = uuid.uuid4().hex
+                body = (
+                    f"--{boundary}\r\nContent-Disposition: form-data; name=\"audio\"; "
+                    f"filename=\"clip.{audio_format}\"\r\nContent-Type: application/octet-stream\r\n\r\n"
+                ).encode() + audio_data + f"\r\n--{boundary}--\r\n".encode()
+                status, _ = self._request(
+                    "POST", "/analyze", body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+                )
+            else:
+                status, _ = self._request("GET", "/health")
+            return "OK" if status == 200 else str(status)
+        except TimeoutError:
+            return "TIMEOUT"
+        except (OSError, http.client.HTTPException) as e:
+            return type(e).__name__
+
+    def ready(self) -> bool:
+        try:
+            return self._request("GET", "/health/ready")[0] == 200
+        except (OSError, http.client.HTTPException):
+            return False
+
+    def metrics(self) -> Optional[str]:
+        try:
+            status, body = self._request("GET", "/metrics")
+            return body.decode() if status == 200 else None
+        except (OSError, http.client.HTTPException):
+            return None
+
+
+class LoadTest:
+    """Drives one run against a client and collects outcomes."""
+
+    def __init__(self, client, corpus: list[tuple[bytes, str]], mix: dict[str, float], unique_audio: bool):
+        self.client = client
+        self.corpus = corpus
+        self.operations = list(mix)
+        self.weights = [mix[operation] for operation in self.operations]
+        self.unique_audio = unique_audio
+        self.outcomes: list[Outcome] = []
+        self._lock = threading.Lock()
+
+    def _one(self, scheduled: float):
+        operation = random.choices(self.operations, self.weights)[0]
+        audio_data, audio_format = random.choice(self.corpus)
+        if self.unique_audio and operation == "analyze" and audio_format == "wav":
+            audio_data = _unique_wav(audio_data)
+        status = self.client.call(operation, (audio_data, audio_format))
+        outcome = Outcome(operation, time.perf_counter() - scheduled, status)
+        with self._lock:
+            self.outcomes.append(outcome)
+
+    def closed_loop(self, concurrency: int, duration: float):
+        deadline = time.perf_counter() + duration
+
+        def client_loop():
+            while time.perf_counter() < deadline:
+                self._one(time.perf_counter())
+
+        threads = [threading.Thread(target=client_loop, daemon=True) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def open_loop(self, rate: float, duration: float, max_outstanding: int):
+        started = time.perf_counter()
+        scheduled = started
+        with ThreadPoolExecutor(max_workers=max_outstanding) as executor:
+            while True:
+                scheduled += random.expovariate(rate)
+                if scheduled - started >= duration:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self._one, scheduled)
+
+
+def summarize(outcomes: list[Outcome], elapsed: float) -> dict:
+    """Throughput, latency percentiles and status counts, overall and per operation."""
+    def stats(group: list[Outcome]) -> dict:
+        ok = np.array([o.latency for o in group if o.status == "OK"]) * 1000
+        statuses = {}
+        for o in group:
+            statuses[o.status] = statuses.get(o.status, 0) + 1
+        return {
+            "requests": len(group),
+            "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+            "error_rate": round(1 - len(ok) / len(group), 4) if group else 0.0,
+            "mean_ms": round(float(ok.mean()), 1) if len(ok) else None,
+            "p50_ms": round(float(np.percentile(ok, 50)), 1) if len(ok) else None,
+            "p90_ms": round(float(np.percentile(ok, 90)), 1) if len(ok) else None,
+            "p99_ms": round(float(np.percentile(ok, 99)), 1) if len(ok) else None,
+            "max_ms": round(float(ok.max()), 1) if len(ok) else None,
+            "statuses": statuses,
+        }
+
+    operations = sorted({o.operation for o in outcomes})
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "total": stats(outcomes),
+        "operations": {op: stats([o for o in outcomes if o.operation == op]) for op in operations},
+    }
+
+
+def server_side(
+    target: str,
+    before: Optional[str],
+    after: Optional[str],
+    operations: list[str],
+    client: Optional[dict] = None,
+) -> dict:
+    """
+    Mean handler time per method and mean queue wait from two metrics scrapes.
+
+    With client (summarize()'s per-operation stats), also reports each
+    operation's mean latency outside the handler as <operation>_wait_ms:
+    time queued for a gRPC worker thread or aio admission slot, which no
+    server metric sees, plus transport.
+    """
+    if before is None or after is None:
+        return {}
+    client = client or {}
+    before, after = parse_metrics(before), parse_metrics(after)
+    methods = {
+        "grpc": {"analyze": "AnalyzeAudio", "refine": "RefineEmbedding", "health": "HealthCheck"},
+        "http": {"analyze": "/analyze", "health": "/health"},
+    }[target]
+
+    report = {}
+    for operation in operations:
+        total, count = _histogram_delta(
+            before, after, "evoke_request_seconds", transport=target, method=methods[operation]
+        )
+        if count:
+            handler_ms = total / count * 1000
+            report[f"{operation}_handler_ms"] = round(handler_ms, 1)
+            client_ms = client.get(operation, {}).get("mean_ms")
+            if client_ms is not None:
+                report[f"{operation}_wait_ms"] = round(max(client_ms - handler_ms, 0.0), 1)
+    total, count = _histogram_delta(before, after, "evoke_stage_seconds", stage="queue")
+    if count:
+        # The HTTP scheduler's wait for an inference slot
+        report["scheduler_queue_ms"] = round(total / count * 1000, 1)
+    for stage in ("decode", "features", "project"):
+        total, count = _histogram_delta(before, after, "evoke_stage_seconds", stage=stage)
+        if count:
+            report[f"{stage}_ms"] = round(total / count * 1000, 1)
+    return report
+
+
+class LocalServer:
+    """A server subprocess started for the run."""
+
+    def __init__(self, target: str, port: int, env: dict, log_path: Path):
+        env = {**os.environ, **env}
+        env.pop("PORT", None)  # takes precedence over GRPC_PORT in config
+        if target == "grpc":
+            env["GRPC_PORT"] = str(port)
+            command = [sys.executable, "src/server.py"]
+        else:
+            command = [sys.executable, "-m", "uvicorn", "src.http_server:app", "--port", str(port)]
+        self.log = open(log_path, "ab")
+        self.process = subprocess.Popen(command, cwd=ML_DIR, env=env, stdout=self.log, stderr=subprocess.STDOUT)
+
+    def wait_ready(self, client, timeout: float):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {self.process.returncode}; see {self.log.name}")
+            if client.ready():
+                return
+            time.sleep(1)
+        raise TimeoutError(f"Server not ready after {timeout:.0f}s; see {self.log.name}")
+
+    def stop(self):
+        self.process.send_signal(signal.SIGINT)
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.log.close()
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def run_once(args, client, corpus, workers: Optional[int] = None) -> dict:
+    test = LoadTest(client, corpus, args.mix, not args.allow_cache_hits)
+    before = client.metrics()
+
+    started = time.perf_counter()
+    if args.mode == "closed":
+        test.closed_loop(args.concurrency, args.duration)
+    else:
+        test.open_loop(args.rate, args.duration, args.max_outstanding)
+    elapsed = time.perf_counter() - started
+
+    report = summarize(test.outcomes, elapsed)
+    report["server"] = server_side(args.target, before, client.metrics(), list(args.mix), report["operations"])
+    report["workers"] = workers
+    return report
+
+
+def print_report(report: dict):
+    label = f" [{report['workers']} workers]" if report.get("workers") else ""
+    print(f"\nRun{label}: {report['elapsed_s']}s")
+    print(f"{'operation':<10} {'requests':>8} {'rps':>8} {'errors':>7} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}")
+    for name, stats in [("total", report["total"]), *report["operations"].items()]:
+        cells = [f"{stats[key]:>8.1f}ms" if stats[key] is not None else f"{'-':>10}"
+                 for key in ("p50_ms", "p90_ms", "p99_ms", "max_ms")]
+        print(
+            f"{name:<10} {stats['requests']:>8} {stats['throughput_rps']:>8.2f} "
+            f"{stats['error_rate']:>7.1%} {' '.join(cells)}"
+        )
+    errors = {s: n for s, n in report["total"]["statuses"].items() if s != "OK"}
+    if errors:
+        print(f"errors: {errors}")
+    if report["server"]:
+        print("server: " + ", ".join(f"{key}={value}" for key, value in report["server"].items()))
+
+
+def find_knee(reports: list[dict]) -> Optional[int]:
+    """First worker count after which more workers add under 10% throughput."""
+    for current, following in zip(reports, reports[1:]):
+        if following["total"]["throughput_rps"] < current["total"]["throughput_rps"] * 1.10:
+            return current["workers"]
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the ML service")
+    parser.add_argument("--target", choices=("grpc", "http"), default="grpc")
+    parser.add_argument("--address", help="host:port (default localhost:50051 / localhost:8000)")
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--concurrency", type=int, default=4, help="Clients in closed-loop mode")
+    parser.add_argument("--rate", type=float, default=5.0, help="Arrivals per second in open-loop mode")
+    parser.add_argument("--max-outstanding", type=int, default=256, help="Open-loop client concurrency cap")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per run")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request deadline in seconds")
+    parser.add_argument("--mix", type=parse_mix, default=None, help="Weighted operations, e.g. analyze=8,health=1")
+    parser.add_argument("--audio", type=Path, nargs="*", default=[], help="Audio files or directories")
+    parser.add_argument("--clips", type=int, default=4, help="Synthetic clips when no --audio is given")
+    parser.add_argument("--allow-cache-hits", action="store_true", help="Send identical uploads as-is")
+    parser.add_argument("--start-server", action="store_true", help="Launch a local server for the run")
+    parser.add_argument("--sweep-workers", type=lambda v: [int(w) for w in v.split(",")],
+                        help="Restart the local server with each worker count, e.g. 1,2,4,8")
+    parser.add_argument("--server-env", action="append", default=[], help="KEY=VALUE for the local server")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--output", type=Path, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    args.mix = args.mix or ({"analyze": 8, "refine": 1, "health": 1} if args.target == "grpc" else {"analyze": 9, "health": 1})
+    unknown = set(args.mix) - set(OPERATIONS[args.target])
+    if unknown:
+        parser.error(f"{args.target} supports {OPERATIONS[args.target]}, not {sorted(unknown)}")
+    if args.sweep_workers:
+        args.start_server = True
+
+    default_port = 50051 if args.target == "grpc" else 8000
+    address = args.address or f"localhost:{default_port}"
+    port = int(address.rpartition(":")[2])
+    make_client = (lambda: GrpcClient(address, args.timeout)) if args.target == "grpc" else (
+        lambda: HttpClient(address, args.timeout)
+    )
+
+    corpus = load_corpus(args.audio, args.clips)
+    print(f"{args.target} {args.mode}-loop load on {address}, {len(corpus)} clips, mix {args.mix}")
+
+    server_env = dict(item.split("=", 1) for item in args.server_env)
+    worker_setting = "GRPC_MAX_WORKERS" if args.target == "grpc" else "INFERENCE_WORKERS"
+    if args.target == "grpc" and server_env.get("GRPC_SERVER_MODE") == "aio":
+        # The aio server's analysis concurrency is its admission limit
+        worker_setting = "GRPC_MAX_IN_FLIGHT"
+    reports = []
+    for workers in args.sweep_workers or [None]:
+        server = None
+        if args.start_server:
+            env = dict(server_env)
+            if workers is not None:
+                env[worker_setting] = str(workers)
+            server = LocalServer(args.target, port, env, Path(f"/tmp/loadtest-{args.target}-server.log"))
+        try:
+            client = make_client()
+            if server is not None:
+                server.wait_ready(client, args.startup_timeout)
+            report = run_once(args, client, corpus, workers)
+        finally:
+            if server is not None:
+                server.stop()
+        print_report(report)
+        reports.append(report)
+
+    result = {"target": args.target, "mode": args.mode, "mix": args.mix, "runs": reports}
+    if args.sweep_workers:
+        print(f"\n{worker_setting:>18} {'rps':>8} {'p50':>9} {'p99':>9} {'errors':>7}")
+        for report in reports:
+            total = report["total"]
+            print(
+                f"{report['workers']:>18} {total['throughput_rps']:>8.2f} {total['p50_ms'] or 0:>8.1f}ms "
+                f"{total['p99_ms'] or 0:>8.1f}ms {total['error_rate']:>7.1%}"
+            )
+        knee = find_knee(reports)
+        result["knee_workers"] = knee
+        if knee is not None:
+            print(f"Throughput stops scaling beyond {knee} workers")
+
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
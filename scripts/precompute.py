@@ -3,6 +3,8 @@
 Pre-compute all deployment data for Evoke.
 
 Generates:
+- data/embeddings/images.emb    (binary image embedding matrix + .urls sidecar)
+- data/embeddings/images.quant.npz (quantized codes, with --quantize)
 - worker/src/data/images.json   (image URLs + CLIP embeddings)
 - worker/src/data/directions.json (mood direction vectors)
 - worker/src/data/demo.json      (pre-computed demo results)
@@ -14,20 +16,25 @@ Usage:
 import argparse
 import json
 import sys
-from io import BytesIO
 from pathlib import Path
 
 import numpy as np
-import requests
-from PIL import Image
 
 # Add ml/ to path so we can import src.bridge and src.audio_encoder
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "ml"))
 
 from src.audio_encoder import AudioEncoder
 from src.bridge import CrossModalBridge
+from src.config import config
+from src.embedding_artifact import EmbeddingWriter
+from src.embedding_manifest import EmbeddingManifest
+from src.image_pipeline import ImagePipeline
+from src.quantization import CODECS, QuantizedIndex, quantized_path, recall_at_k
+from src.search import SearchIndex
 
 OUTPUT_DIR = Path(__file__).resolve().parent.parent / "worker" / "src" / "data"
+MANIFEST_PATH = Path(__file__).resolve().parent.parent / "data" / "embeddings" / "image_manifest.npz"
+ARTIFACT_PATH = Path(__file__).resolve().parent.parent / "data" / "embeddings" / "images.emb"
 
 # Curated Unsplash images (~250 images organized by mood category)
 SAMPLE_IMAGES = [
@@ -327,13 +334,6 @@ SAMPLE_IMAGES = [
 ]
 
 
-def download_image(url: str) -> Image.Image:
-    """Download an image from a URL."""
-    response = requests.get(url, timeout=30)
-    response.raise_for_status()
-    return Image.open(BytesIO(response.content)).convert("RGB")
-
-
 def compute_direction_vectors(bridge: CrossModalBridge) -> dict:
     """Compute semantic direction vectors using CLIP text embeddings via bridge."""
     print("Computing semantic direction vectors from CLIP...")
@@ -341,26 +341,25 @@ def compute_direction_vectors(bridge: CrossModalBridge) -> dict:
     return {k: v.tolist() for k, v in directions.items()}
 
 
-def l2_distance(a: np.ndarray, b: np.ndarray) -> float:
-    """Compute L2 (Euclidean) distance between two vectors."""
-    diff = a - b
-    return float(np.sqrt(np.dot(diff, diff)))
-
-
-def brute_force_search(
-    query: np.ndarray,
-    images: list[dict],
-    top_k: int = 20,
-) -> list[dict]:
-    """Brute-force L2 search over image embeddings."""
-    scored = []
-    for i, img in enumerate(images):
-        emb = np.array(img["embedding"], dtype=np.float32)
-        dist = l2_distance(query, emb)
-        scored.append({"id": i, "image_url": img["url"], "score": dist})
-
-    scored.sort(key=lambda x: x["score"])
-    return scored[:top_k]
+def build_quantized_index(search_index: SearchIndex, codec: str, rerank: int, path: Path):
+    """Quantize the corpus, save the codes and report their size and recall@20."""
+    print(f"\nBuilding {codec} codes...")
+    quantized = QuantizedIndex.build(search_index, codec, rerank)
+    quantized.save(path)
+
+    # Perturbed corpus rows stand in for real queries
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(search_index), min(len(search_index), 200), replace=False)
+    queries = search_index.embeddings[sample] + rng.normal(0, 0.05, (len(sample), search_index.dim))
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    recall = recall_at_k(quantized, search_index, queries.astype(np.float32), top_k=20)
+
+    full_bytes = search_index.dim * 4
+    print(
+        f"Wrote {path} ({quantized.bytes_per_vector} bytes/image vs {full_bytes}, "
+        f"{full_bytes / quantized.bytes_per_vector:.0f}x smaller); "
+        f"recall@20 with {quantized.rerank} re-ranked: {recall:.3f}"
+    )
 
 
 def main():
@@ -370,6 +369,46 @@ def main():
         type=str,
         help="Path to demo audio file (mp3/wav). If provided, generates demo data and copies to frontend/public/demo.mp3",
     )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        default=MANIFEST_PATH,
+        help="Embedding manifest used to skip images embedded by previous runs",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=200,
+        help="Checkpoint the manifest after this many images",
+    )
+    parser.add_argument(
+        "--artifact",
+        type=Path,
+        default=ARTIFACT_PATH,
+        help="Output path of the binary embedding artifact",
+    )
+    parser.add_argument(
+        "--artifact-dtype",
+        choices=["float32", "float16"],
+        default="float32",
+        help="Storage precision of the binary embedding artifact",
+    )
+    parser.add_argument(
+        "--quantize",
+        choices=CODECS,
+        help="Also build quantized codes for approximate search (sq8: 4x smaller, pq: dim * 4 / PQ_SUBSPACES, 16x by default)",
+    )
+    parser.add_argument(
+        "--rerank",
+        type=int,
+        default=config.SEARCH_RERANK,
+        help="Shortlist size re-ranked exactly when reporting quantized recall",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Ignore the manifest and re-embed every image",
+    )
     args = parser.parse_args()
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -387,30 +426,52 @@ def main():
             seen.add(url)
             unique_images.append(url)
 
-    # Step 1: Compute image embeddings
+    # Step 1: Compute image embeddings (only new or previously failed URLs)
     total = len(unique_images)
-    print(f"\nProcessing {total} unique images...")
-    image_entries = []
-    failed = 0
-    for i, url in enumerate(unique_images):
-        print(f"  [{i + 1}/{total}] {url[:60]}...")
-        try:
-            image = download_image(url)
-            embedding = bridge.encode_image(image)
-            image_entries.append({
-                "url": url,
-                "embedding": embedding.tolist(),
-            })
-        except requests.RequestException as e:
-            print(f"    Failed to download: {e}")
-            failed += 1
-        except Exception as e:
-            print(f"    Failed to encode: {e}")
-            failed += 1
+    if args.rebuild:
+        manifest = EmbeddingManifest(args.manifest, config.CLIP_MODEL)
+        # Clear the old base and shards, so an interrupted rebuild resumes from scratch
+        manifest.save()
+    else:
+        manifest = EmbeddingManifest.load(args.manifest, config.CLIP_MODEL)
+    removed = manifest.retain(unique_images)
+    pending = manifest.pending(unique_images)
+    print(f"\n{total} unique images: {total - len(pending)} already embedded, "
+          f"{len(pending)} to process, {removed} removed from manifest")
+
+    pipeline = ImagePipeline(bridge)
+    for start in range(0, len(pending), args.checkpoint_every):
+        chunk = pending[start:start + args.checkpoint_every]
+        chunk_urls, chunk_embeddings, chunk_failures = pipeline.run(chunk)
+        manifest.record(chunk_urls, chunk_embeddings)
+        manifest.record_failures(chunk_failures)
+        manifest.checkpoint()
+        print(f"Checkpointed {min(start + len(chunk), len(pending))}/{len(pending)} to {manifest.shard_dir}")
+    manifest.save()
+
+    valid_urls, embeddings = manifest.embeddings(unique_images)
+    failed = total - len(valid_urls)
+    image_entries = [
+        {"url": url, "embedding": embedding.tolist()}
+        for url, embedding in zip(valid_urls, embeddings)
+    ]
+    search_index = SearchIndex(embeddings, valid_urls)
 
     print(f"\nSuccessfully processed {len(image_entries)}/{total} images ({failed} failed)")
 
-    # Write images.json
+    # Write the binary artifact
+    with EmbeddingWriter(args.artifact, config.EMBEDDING_DIM, config.CLIP_MODEL, args.artifact_dtype) as writer:
+        for start in range(0, len(valid_urls), args.checkpoint_every):
+            writer.append_batch(
+                valid_urls[start:start + args.checkpoint_every],
+                embeddings[start:start + args.checkpoint_every],
+            )
+    print(f"Wrote {args.artifact} ({writer.count} x {writer.dim} {writer.dtype})")
+
+    if args.quantize and len(valid_urls):
+        build_quantized_index(search_index, args.quantize, args.rerank, quantized_path(args.artifact))
+
+    # Write images.json (still read by the worker)
     images_path = OUTPUT_DIR / "images.json"
     with open(images_path, "w") as f:
         json.dump(image_entries, f)
@@ -435,7 +496,7 @@ def main():
         embedding, mood = encoder.encode(audio_data, "auto")
         clip_embedding = bridge.project_to_clip_space(embedding)
 
-        demo_images = brute_force_search(clip_embedding, image_entries, top_k=20)
+        demo_images = search_index.results(clip_embedding, top_k=20)
 
         demo_data = {
             "embedding": clip_embedding.tolist(),
@@ -466,7 +527,7 @@ def main():
         if norm > 0:
             demo_embedding = demo_embedding / norm
 
-        demo_images = brute_force_search(demo_embedding, image_entries, top_k=20)
+        demo_images = search_index.results(demo_embedding, top_k=20)
 
         demo_data = {
             "embedding": demo_embedding.tolist(),
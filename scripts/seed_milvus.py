@@ -15,11 +15,8 @@ Run from the ml container:
 
 import os
 import sys
-from io import BytesIO
 
 import numpy as np
-import requests
-from PIL import Image
 from pymilvus import (
     Collection,
     CollectionSchema,
@@ -31,6 +28,7 @@ from pymilvus import (
 
 sys.path.insert(0, "/app")
 from src.bridge import CrossModalBridge
+from src.image_pipeline import ImagePipeline
 
 MILVUS_HOST = os.getenv("MILVUS_HOST", "milvus")
 MILVUS_PORT = os.getenv("MILVUS_PORT", "19530")
@@ -93,33 +91,15 @@ def create_collection():
     return collection
 
 
-def download_image(url: str) -> Image.Image:
-    """Download an image from a URL."""
-    response = requests.get(url, timeout=30)
-    response.raise_for_status()
-    return Image.open(BytesIO(response.content)).convert("RGB")
-
-
 def compute_clip_embeddings(
     image_urls: list[str], bridge: CrossModalBridge
 ) -> tuple[list[str], np.ndarray]:
     """Download images and compute CLIP embeddings."""
-    embeddings = []
-    valid_urls = []
-
-    for i, url in enumerate(image_urls):
-        print(f"  [{i + 1}/{len(image_urls)}] Processing {url[:60]}...")
-        try:
-            image = download_image(url)
-            embedding = bridge.encode_image(image)
-            embeddings.append(embedding)
-            valid_urls.append(url)
-        except requests.RequestException as e:
-            print(f"    Failed to download: {e}")
-        except Exception as e:
-            print(f"    Failed to encode: {e}")
-
-    return valid_urls, np.array(embeddings, dtype=np.float32)
+    valid_urls, embeddings, failures = ImagePipeline(bridge).run(image_urls)
+    if failures:
+        print(f"  {len(failures)} images failed")
+
+    return valid_urls, embeddings
 
 
 def seed_data(